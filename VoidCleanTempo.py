@@ -5,37 +5,40 @@
 import os  # Para interactuar con el sistema operativo (acceder a archivos, rutas, etc.).
 import tkinter as tk  # La biblioteca principal para crear la interfaz gráfica de usuario (GUI).
 from tkinter import ttk, messagebox, filedialog  # Módulos específicos de tkinter para widgets mejorados, cuadros de diálogo y selección de archivos.
-import psutil  # Para obtener información del sistema, como el uso del disco duro.
-import textwrap  # Para formatear texto largo en múltiples líneas, útil para nombres de archivo largos.
-from datetime import datetime  # Para trabajar con fechas y horas (ej. fecha de creación/eliminación de archivos).
-import pandas as pd  # Para crear y manejar DataFrames, que facilitan la exportación a Excel.
+from datetime import datetime, timedelta  # Para trabajar con fechas y horas (ej. fecha de creación/eliminación de archivos).
+import time  # Para medir el tiempo de arranque.
 import threading  # Para ejecutar tareas pesadas (como escanear archivos) en un hilo separado y no congelar la interfaz.
-from openpyxl import load_workbook  # Para cargar un archivo Excel existente y modificarlo.
-from openpyxl.utils import get_column_letter  # Para convertir un número de columna (ej. 1) a su letra correspondiente en Excel (ej. 'A').
+from array import array  # Lista compacta de números de fila para la vista de duplicados.
+import sqlite3  # Para detectar errores al abrir el índice persistente de escaneos.
+from concurrent.futures import ThreadPoolExecutor  # Hilo único que escribe y consulta el historial, en orden.
+from contextlib import closing  # Para cerrar el generador de registros (y soltar el índice) si se cancela el escaneo.
+from collections import defaultdict  # Un candado por archivo de índice, creado la primera vez que se pide.
+from voidclean.clasificacion import ruta_temp_por_defecto  # Carpeta TEMP del sistema.
+from voidclean.escaneo import escanear_directorio, escanear_recursivo, EscaneoCancelado  # Motor de escaneo compartido (os.scandir, un stat por archivo).
+from voidclean.indice import IndiceEscaneo, Cambios, directorio_datos_app, ruta_indice_por_defecto  # Índice en SQLite para escaneos incrementales.
+from voidclean.raices import (ConfiguracionRaices, UsoVolumenes, agrupar_por_volumen, cargar_raices,  # Raíces del escaneo por volumen.
+                              escanear_volumenes, guardar_raices, normalizar_raices, raices_por_defecto)
+from voidclean.eliminacion import eliminar_en_paralelo, ResultadoEliminacion  # Eliminación en un grupo de hilos con progreso y cancelación.
+from voidclean.cuarentena import Cuarentena  # Eliminación instantánea con opción de deshacer.
+from voidclean.detector_uso import DetectorUso  # Detección de archivos en uso con psutil (sin renombrar cada archivo).
+from voidclean.vigilancia import crear_vigilante  # Modo vigilancia (inotify en Linux o sondeo de carpetas).
+from voidclean.resultados import ConjuntoResultados, FLAG_QUITADO  # Resultados en memoria guardados por columnas compactas.
+from voidclean.seleccion import Seleccion  # Estado de selección de archivos sin variables de Tk por fila.
+from lista_virtual import ListaVirtual  # Lista que solo crea las filas visibles y las reutiliza al desplazarse.
+from voidclean.exportacion import exportar_filas, formato_desde_ruta  # Exportación en streaming (openpyxl se importa solo al exportar a Excel).
+from voidclean.canal import CanalTrabajo  # Cola entre el hilo de escaneo y la interfaz, revisada ~60 veces por segundo.
+from voidclean.analitica import analizar  # Análisis del espacio recuperable (NumPy se importa solo al calcularlo).
+from voidclean.duplicados import (buscar_duplicados, candidatos_de_conjunto, CacheHashes,  # Archivos duplicados por etapas.
+                                   ruta_cache_por_defecto)
+from voidclean.busqueda import IndiceBusqueda, interpretar, CONSULTA_VACIA  # Filtro instantáneo de la lista.
+from voidclean.historial import HistorialEliminaciones, entradas_desde, ruta_historial_por_defecto  # Historial en SQLite.
+from voidclean.metricas import Metricas, carpeta_perfil_por_defecto, ruta_metricas_por_defecto  # Tiempos por fase.
+from voidclean.politicas import (cargar_politicas, crear_archivo_ejemplo, evaluar_politicas,
+                                 ruta_politicas_por_defecto)  # Políticas de limpieza automática (archivo JSON).
 
 
 # --- VARIABLES GLOBALES Y DICCIONARIOS DE CONFIGURACIÓN ---
 
-# Diccionario que asocia extensiones de archivo con una descripción de su propósito.
-# Esto ayuda al usuario a entender qué tipo de archivo es.
-purpose_keywords = {
-    ".log": "Archivo de registro del sistema o aplicaciones",
-    ".tmp": "Archivo temporal generado por programas",
-    ".temp": "Archivo temporal generado automáticamente",
-    ".bak": "Copia de seguridad de un archivo antiguo",
-    ".dmp": "Volcado de memoria para depurar errores",
-    ".cache": "Archivo de caché usado para acelerar procesos",
-    ".old": "Versión anterior de un archivo reemplazado",
-    ".msi": "Instalador de software temporal",
-    ".config": "Archivo de configuración o parámetros",
-    ".json": "Datos temporales estructurados",
-    ".txt": "Archivo de texto auxiliar o log de errores",
-    ".zip": "Archivo comprimido generado temporalmente",
-    ".csv": "Datos temporales en tabla (Excel)",
-    ".etl": "Archivo de seguimiento de eventos del sistema",
-    ".wer": "Informe de errores de Windows",
-}
-
 # Diccionario que mapea el texto de las opciones del menú desplegable a un valor interno.
 # Facilita el manejo de la lógica de ordenamiento de archivos.
 opciones_orden_map = {
@@ -47,30 +50,77 @@ opciones_orden_map = {
     "Nombre (Z-A)": "nombre_za"
 }
 
-# Obtiene la ruta de la carpeta de archivos temporales del sistema.
-# Usa la variable de entorno "TEMP". Si no existe, usa "/tmp" como alternativa (común en Linux).
-temp_path = os.environ.get("TEMP", "/tmp")
-
-# Lista para guardar un registro de los archivos que han sido eliminados durante la sesión.
-historial_eliminados = []
+# Columnas de las exportaciones y formatos que se ofrecen al guardar.
+COLUMNAS_HISTORIAL = ["Nombre", "Descripción", "Peso", "RAM estimada", "Fecha de creación", "Fecha Cuarentena", "Fecha Eliminación", "Ruta"]
+# Rangos de fechas rápidos de la ventana del historial: texto -> días hacia atrás (None = todo el historial).
+RANGOS_HISTORIAL = {"Últimos 7 días": 7, "Últimos 30 días": 30, "Últimos 365 días": 365, "Todo el historial": None}
+COLUMNAS_ARCHIVOS = ["Nombre", "Descripción", "Estado", "Peso (bytes)", "Fecha de creación", "Ruta"]
+TIPOS_EXPORTACION = [("Excel files", "*.xlsx"), ("CSV", "*.csv"), ("JSON Lines comprimido", "*.jsonl.gz")]
+
+# Obtiene la ruta de la carpeta de archivos temporales del sistema ("TEMP" o "/tmp" como alternativa).
+temp_path = ruta_temp_por_defecto()
+
+# Carpetas raíz que se escanean (TEMP, /tmp, /var/tmp, cachés del usuario...). Se leen del archivo de raíces al
+# iniciar y se agrupan por volumen: cada volumen se escanea en su propio hilo y tiene su barra de almacenamiento.
+configuracion_raices = ConfiguracionRaices([temp_path], {})
+volumenes = []  # Volumen de raices.py con las raíces de cada dispositivo, en el orden de las barras.
+barras_volumenes = {}  # Punto de montaje -> (etiqueta, barra) de almacenamiento de cada volumen.
+INTERVALO_USO_DISCO_MS = 10000  # Cada cuánto se vuelve a medir el uso de los volúmenes (en segundo plano).
+# Uso de cada volumen en caché: las barras se redibujan con estos datos, sin consultar el disco tras cada acción.
+uso_volumenes = UsoVolumenes(al_actualizar=lambda: ventana.after(0, actualizar_barras_almacenamiento))
+
+# Historial de archivos eliminados, guardado en SQLite (se conserva entre sesiones).
+# Todas las escrituras y consultas pasan por un único hilo, así se aplican en el orden en que se hicieron
+# (por ejemplo, una restauración nunca se adelanta al registro de su eliminación) sin bloquear la interfaz.
+hilo_historial = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Historial")
+ventana_historial = None  # Ventana del historial, si está abierta.
+
+# Cuarentenas: una carpeta oculta por volumen, junto a su primera raíz (o dentro, si no se puede), donde se
+# mueven los archivos antes de borrarlos definitivamente. Mover es un simple renombrado solo dentro del mismo
+# disco, por eso cada volumen tiene la suya ({punto de montaje: Cuarentena}). Se preparan con los volúmenes, pero
+# la carpeta no se crea hasta que se mueve a ella el primer archivo, y no se quitan aunque cambien las raíces
+# (pueden tener lotes pendientes). Los lotes se purgan pasado 'PLAZO_PURGA_MS'.
+cuarentenas = {}
+PLAZO_PURGA_MS = 5 * 60 * 1000  # Tiempo durante el que se puede deshacer una eliminación en cuarentena.
+lotes_en_cuarentena = []  # Eliminaciones aún sin purgar, con sus lotes (las últimas son las primeras en deshacerse).
 
 # Variables globales para llevar la cuenta de los archivos.
 total_archivos = 0  # Contador total de archivos encontrados.
-checkbox_vars = {}  # Diccionario para almacenar las variables de los checkboxes y los datos de cada archivo.
+seleccion = Seleccion()  # Archivos marcados para eliminar (por número de fila), sin una variable de Tk por archivo.
 no_accesibles = 0  # Contador de archivos que no se pudieron leer (por permisos, etc.).
-archivos_encontrados = []  # Lista que almacena la información de todos los archivos encontrados para poder exportarla.
+archivos_encontrados = ConjuntoResultados()  # Resultados del último escaneo, en memoria, para ordenarlos y exportarlos.
+subtotales_carpetas = {}  # Número de archivos y bytes de cada carpeta escaneada (modo recursivo).
+ultimos_cambios = None  # Archivos agregados/eliminados/modificados según el índice en el último escaneo.
+vigilantes = []  # Un vigilante de cambios por raíz cuando el modo vigilancia está activo.
+ultimo_analisis = None  # Último análisis del espacio recuperable (ver 'actualizar_analisis').
+ventana_analisis = None  # Ventana con el detalle del análisis, si está abierta.
+grupos_duplicados = []  # Grupos de archivos idénticos de la última búsqueda (GrupoDuplicados con números de fila).
+indice_busqueda = None  # Índice de búsqueda de los resultados actuales (se construye en segundo plano).
+construyendo_indice = False  # Hay un índice construyéndose en segundo plano.
+generacion_indice = 0  # Aumenta cada vez que el índice deja de valer: un índice que termina tarde se descarta.
+consulta_actual = CONSULTA_VACIA  # Condiciones del cuadro de búsqueda (vacía = sin filtro).
+busqueda_pendiente = None  # Temporizador de la búsqueda (se reinicia con cada tecla).
+RETARDO_BUSQUEDA_MS = 150  # Espera tras la última tecla antes de filtrar.
+generacion_escaneo = 0  # Aumenta con cada escaneo: los resultados de duplicados de un escaneo anterior se descartan.
+# El escaneo y el modo vigilancia no actualizan el mismo índice a la vez (un candado por archivo de índice,
+# es decir, por volumen: volúmenes distintos sí se actualizan a la vez).
+bloqueos_indice = defaultdict(threading.Lock)
+metricas_escaneo = None  # Métricas por fase del escaneo en curso (se guardan al terminar, ver 'guardar_metricas').
+# Archivos abiertos por algún proceso, en caché unos segundos. Cuando termina de calcularse se redibuja la lista.
+detector_uso = DetectorUso(al_actualizar=lambda: ventana.after(0, al_actualizar_uso))
 
 
 # --- FUNCIONES DE LA APLICACIÓN ---
 
-def mostrar_ventana_proceso():
+def mostrar_ventana_proceso(al_cancelar=None):
     """
     Crea y muestra una pequeña ventana emergente con una barra de progreso.
     Esta función se usa para indicar al usuario que una tarea larga (como escanear archivos) está en curso.
+    Si se pasa 'al_cancelar', la ventana tiene un botón "Cancelar" (y cerrarla también cancela la tarea).
     """
     ventana_proceso = tk.Toplevel(ventana)  # Crea una ventana secundaria.
     ventana_proceso.title("Cargando...")
-    ventana_proceso.geometry("300x100")
+    ventana_proceso.geometry("300x140" if al_cancelar else "300x100")
     ventana_proceso.resizable(False, False)
     ventana_proceso.grab_set()  # Bloquea la interacción con la ventana principal.
     ventana_proceso.attributes("-topmost", True)  # Mantiene la ventana siempre visible.
@@ -82,200 +132,881 @@ def mostrar_ventana_proceso():
     barra.pack(pady=5)
     barra.start(10)  # Inicia la animación de la barra.
 
+    if al_cancelar is not None:
+        def cancelar():
+            boton.config(state="disabled")
+            label.config(text="Cancelando...")
+            al_cancelar()
+        boton = ttk.Button(ventana_proceso, text="Cancelar", command=cancelar)
+        boton.pack(pady=5)
+        ventana_proceso.protocol("WM_DELETE_WINDOW", cancelar)
+
+    ventana_proceso.label = label  # Para mostrar el progreso en la misma ventana.
     return ventana_proceso  # Devuelve la ventana para poder cerrarla después.
 
-def actualizar_barra_almacenamiento():
+def preparar_volumenes():
+    """
+    Agrupa las raíces configuradas por volumen (dispositivo) y crea una barra de almacenamiento por cada uno.
+    Se llama al iniciar, antes de cada escaneo (una raíz puede aparecer o desaparecer) y al cambiar las raíces.
     """
-    Calcula el porcentaje de uso del disco donde se encuentra la carpeta TEMP y actualiza la barra de progreso de almacenamiento.
-    Cambia de color según el porcentaje de uso (verde, naranja, rojo).
+    global volumenes
+
+    nuevos = agrupar_por_volumen(configuracion_raices.raices, configuracion_raices.hilos)
+    if [v.punto_montaje for v in nuevos] != [v.punto_montaje for v in volumenes]:
+        for etiqueta, barra in barras_volumenes.values():
+            etiqueta.destroy()
+            barra.destroy()
+        barras_volumenes.clear()
+        for volumen in nuevos:
+            etiqueta = tk.Label(frame_volumenes, text=f"{volumen.punto_montaje}: --%", bg="#d0e8ff", font=("Arial", 10))
+            etiqueta.pack(side="top", anchor="w")
+            barra = ttk.Progressbar(frame_volumenes, orient="horizontal", length=250, mode="determinate")
+            barra.pack(side="top", anchor="w")
+            barras_volumenes[volumen.punto_montaje] = (etiqueta, barra)
+    volumenes = nuevos
+    preparar_cuarentenas(nuevos)
+    actualizar_barras_almacenamiento()
+
+def preparar_cuarentenas(volumenes_nuevos):
     """
-    disco = os.path.splitdrive(temp_path)[0] or "C:"  # Obtiene la letra de la unidad (ej. "C:").
-    uso = psutil.disk_usage(disco)  # Obtiene las estadísticas de uso del disco.
-    porcentaje = uso.percent  # Extrae el porcentaje de uso.
-    barra_almacenamiento['value'] = porcentaje  # Actualiza el valor de la barra de progreso.
+    Prepara la cuarentena de los volúmenes que aún no tienen una, sin crear su carpeta: se crea al mover a ella
+    el primer archivo. Si entonces no se puede crear, los archivos de ese volumen se borran directamente
+    aunque esté activado el modo cuarentena.
+    """
+    for volumen in volumenes_nuevos:
+        if volumen.punto_montaje not in cuarentenas:
+            cuarentenas[volumen.punto_montaje] = Cuarentena(temp_path=volumen.raices[0])
 
-    # Cambia el estilo (color) de la barra según el nivel de uso.
-    if porcentaje <= 50:
-        barra_almacenamiento.configure(style="Verde.Horizontal.TProgressbar")
-    elif porcentaje <= 80:
-        barra_almacenamiento.configure(style="Naranja.Horizontal.TProgressbar")
-    else:
-        barra_almacenamiento.configure(style="Rojo.Horizontal.TProgressbar")
+def cuarentena_de(ruta):
+    """
+    Devuelve la cuarentena del volumen de la raíz que contiene 'ruta', o None si ese volumen no tiene.
+    """
+    raiz = raiz_de(ruta)
+    for volumen in volumenes:
+        if raiz in volumen.raices:
+            return cuarentenas.get(volumen.punto_montaje)
+    return None
+
+def raiz_de(ruta):
+    """
+    Devuelve la raíz escaneada que contiene 'ruta' (TEMP si no está en ninguna).
+    """
+    for volumen in volumenes:
+        for raiz in volumen.raices:
+            if ruta.startswith(os.path.join(raiz, "")):
+                return raiz
+    return temp_path
+
+def actualizar_barras_almacenamiento():
+    """
+    Actualiza la barra de almacenamiento de cada volumen con su porcentaje de uso y el espacio recuperable de sus raíces.
+    El uso sale de la caché de 'uso_volumenes' (psutil se consulta en segundo plano, como mucho cada pocos segundos),
+    así que se puede llamar tras cada acción sin tocar el disco. Cambia de color según el porcentaje de uso (verde, naranja, rojo).
+    """
+    # Espacio recuperable de cada volumen: la suma del de sus raíces según el último análisis.
+    punto_de_raiz = {raiz: v.punto_montaje for v in volumenes for raiz in v.raices}
+    recuperable = {}
+    for grupo in (ultimo_analisis.por_raiz if ultimo_analisis is not None else ()):
+        punto = punto_de_raiz.get(grupo.nombre)
+        if punto is not None:
+            recuperable[punto] = recuperable.get(punto, 0) + grupo.recuperables
+
+    for volumen in volumenes:
+        etiqueta, barra = barras_volumenes[volumen.punto_montaje]
+        uso = uso_volumenes.uso(volumen.punto_montaje)
+        texto = f"Uso de almacenamiento en {volumen.punto_montaje}: "
+        if uso is None:
+            texto += "--%" # Todavía se está midiendo.
+        else:
+            barra['value'] = uso.percent # Actualiza el valor de la barra de progreso.
+            # Cambia el estilo (color) de la barra según el nivel de uso.
+            if uso.percent <= 50:
+                barra.configure(style="Verde.Horizontal.TProgressbar")
+            elif uso.percent <= 80:
+                barra.configure(style="Naranja.Horizontal.TProgressbar")
+            else:
+                barra.configure(style="Rojo.Horizontal.TProgressbar")
+            texto += f"{uso.percent}% ({formatear_peso(uso.free)} libres)"
+        if volumen.punto_montaje in recuperable:
+            texto += f"  -  recuperable: {formatear_peso(recuperable[volumen.punto_montaje])}"
+        etiqueta.config(text=texto) # Actualiza el texto informativo.
+
+def muestrear_almacenamiento():
+    """
+    Redibuja las barras de almacenamiento cada 'INTERVALO_USO_DISCO_MS'. Si la caché de uso caducó, se vuelve
+    a medir en segundo plano y las barras se redibujan otra vez al terminar.
+    """
+    actualizar_barras_almacenamiento()
+    ventana.after(INTERVALO_USO_DISCO_MS, muestrear_almacenamiento)
+
+def configurar_raices():
+    """
+    Abre una ventana para elegir las carpetas que se escanean. La lista se guarda en el archivo de raíces
+    (con los límites de hilos por volumen que tuviera) y se usa desde el siguiente escaneo.
+    """
+    ventana_raices = tk.Toplevel(ventana)
+    ventana_raices.title("Carpetas a escanear")
+    ventana_raices.geometry("560x320")
+    ventana_raices.transient(ventana)
+
+    tk.Label(ventana_raices, text="Carpetas temporales y de caché que se escanean (las subcarpetas de otra de la lista se omiten):",
+             justify="left").pack(anchor="w", padx=10, pady=(10, 5))
+    lista = tk.Listbox(ventana_raices, selectmode="extended")
+    lista.pack(fill="both", expand=True, padx=10)
+    for raiz in configuracion_raices.raices:
+        lista.insert("end", raiz)
+
+    def anadir():
+        carpeta = filedialog.askdirectory(parent=ventana_raices)
+        if carpeta:
+            lista.insert("end", os.path.normpath(carpeta))
+
+    def quitar():
+        for i in reversed(lista.curselection()):
+            lista.delete(i)
+
+    def restablecer():
+        lista.delete(0, "end")
+        for raiz in raices_por_defecto(temp_path):
+            lista.insert("end", raiz)
+
+    def guardar():
+        global configuracion_raices
+
+        raices = normalizar_raices(lista.get(0, "end"))
+        if not raices:
+            messagebox.showwarning("Carpetas a escanear", "Indica al menos una carpeta que exista.", parent=ventana_raices)
+            return
+        nueva = configuracion_raices._replace(raices=raices)
+        try:
+            guardar_raices(nueva)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar la lista de carpetas:\n{e}", parent=ventana_raices)
+            return
+        configuracion_raices = nueva
+        ventana_raices.destroy()
+        preparar_volumenes()
+        if vigilantes:
+            alternar_vigilancia() # Vuelve a crear los vigilantes con las raíces nuevas.
+
+    botones = tk.Frame(ventana_raices)
+    botones.pack(fill="x", padx=10, pady=10)
+    ttk.Button(botones, text="Añadir carpeta...", command=anadir).pack(side="left")
+    ttk.Button(botones, text="Quitar", command=quitar).pack(side="left", padx=5)
+    ttk.Button(botones, text="Restablecer", command=restablecer).pack(side="left")
+    ttk.Button(botones, text="Guardar", command=guardar).pack(side="right")
+
+def actualizar_analisis(en_uso=None):
+    """
+    Recalcula el análisis del espacio recuperable (por extensión, categoría, antigüedad, archivos más grandes
+    y en uso/libres) y muestra el resumen junto a la barra de almacenamiento.
+    El cálculo es vectorizado sobre las columnas de los resultados, así que tarda milisegundos incluso con
+    un millón de archivos y se puede repetir tras cada escaneo o eliminación.
+    'en_uso' son las filas en uso, si ya se calcularon (ver 'filas_en_uso').
+    """
+    global ultimo_analisis
+
+    try:
+        ultimo_analisis = analizar(archivos_encontrados, filas_en_uso() if en_uso is None else en_uso)
+    except ImportError:
+        label_recuperable.config(text="Espacio recuperable: no disponible (instala NumPy)")
+        return
+
+    a = ultimo_analisis
+    label_recuperable.config(text=f"Recuperable: {formatear_peso(a.recuperables)} de {formatear_peso(a.bytes)}"
+                                  f" ({a.en_uso.archivos} archivo(s) en uso)")
+    if ventana_analisis is not None and ventana_analisis.winfo_exists():
+        llenar_ventana_analisis()
+    actualizar_barras_almacenamiento() # Espacio recuperable de cada volumen.
+
+def filas_en_uso():
+    """
+    Números de fila de los archivos que algún proceso tiene abiertos, buscados de una vez a partir del
+    conjunto de archivos abiertos de cada raíz (sin datos todavía, se consideran todos libres).
+    """
+    return archivos_encontrados.filas_de([ruta for volumen in volumenes for raiz in volumen.raices
+                                          for ruta in detector_uso.abiertos_en(raiz) or ()])
+
+def al_actualizar_uso():
+    """
+    Se ejecuta en el hilo principal cuando se recalcula el conjunto de archivos abiertos:
+    redibuja el estado de las filas visibles y el reparto en uso/libres del análisis.
+    """
+    lista_archivos.refrescar()
+    actualizar_analisis()
 
-    label_almacenamiento.config(text=f"Uso de almacenamiento en {disco}: {porcentaje}%") # Actualiza el texto informativo.
+def mostrar_analisis():
+    """
+    Abre (o trae al frente) la ventana con el detalle del espacio recuperable.
+    """
+    global ventana_analisis
+
+    if ventana_analisis is not None and ventana_analisis.winfo_exists():
+        ventana_analisis.lift()
+        return
+    if ultimo_analisis is None:
+        messagebox.showinfo("Sin datos", "No hay datos para analizar. Primero actualiza la lista.")
+        return
+
+    ventana_analisis = tk.Toplevel(ventana)
+    ventana_analisis.title("¿Dónde está el espacio?")
+    ventana_analisis.geometry("700x420")
+
+    ventana_analisis.label = tk.Label(ventana_analisis, font=("Arial", 10, "bold"), justify="left")
+    ventana_analisis.label.pack(anchor="w", padx=10, pady=(10, 5))
+
+    # Una pestaña por cada vista del análisis; las tablas son pequeñas, así que se usan Treeview normales.
+    pestanas = ttk.Notebook(ventana_analisis)
+    pestanas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    columnas_grupo = [("Grupo", 300), ("Archivos", 80), ("Peso", 100), ("Recuperable", 100)]
+    ventana_analisis.tablas = {}
+    for clave, titulo, columnas in (("por_extension", "Por extensión", columnas_grupo),
+                                    ("por_categoria", "Por categoría", columnas_grupo),
+                                    ("por_edad", "Por antigüedad", columnas_grupo),
+                                    ("mayores", "Más grandes", [("Archivo", 380), ("Peso", 100), ("Fecha de creación", 120)])):
+        marco = ttk.Frame(pestanas)
+        tabla = ttk.Treeview(marco, columns=[c for c, _ in columnas], show="headings")
+        for titulo_columna, ancho in columnas:
+            tabla.heading(titulo_columna, text=titulo_columna, anchor="w")
+            tabla.column(titulo_columna, width=ancho, anchor="w")
+        barra = ttk.Scrollbar(marco, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=barra.set)
+        barra.pack(side="right", fill="y")
+        tabla.pack(fill="both", expand=True)
+        pestanas.add(marco, text=titulo)
+        ventana_analisis.tablas[clave] = tabla
+
+    llenar_ventana_analisis()
+
+def llenar_ventana_analisis():
+    """
+    Vuelca el último análisis en la ventana de detalle.
+    """
+    a = ultimo_analisis
+    ventana_analisis.label.config(text=(
+        f"Total: {a.archivos} archivo(s), {formatear_peso(a.bytes)}. Recuperable: {formatear_peso(a.recuperables)}.\n"
+        f"Libres: {a.libres.archivos} ({formatear_peso(a.libres.bytes)})    "
+        f"En uso: {a.en_uso.archivos} ({formatear_peso(a.en_uso.bytes)})"))
+
+    for clave, tabla in ventana_analisis.tablas.items():
+        tabla.delete(*tabla.get_children())
+        if clave == "mayores":
+            for fila, size in a.mayores:
+                tabla.insert("", "end", values=(archivos_encontrados.ruta_relativa(fila), formatear_peso(size),
+                                                 archivos_encontrados.fecha(fila)))
+        else:
+            for grupo in getattr(a, clave):
+                tabla.insert("", "end", values=(grupo.nombre, grupo.archivos, formatear_peso(grupo.bytes),
+                                                 formatear_peso(grupo.recuperables)))
+
+def guardar_metricas(metricas, elementos=None, **datos):
+    """
+    Da por terminada una operación medida por fases y la añade al archivo de métricas.
+    Si el archivo no se puede escribir, la operación sigue igual (las métricas no son imprescindibles).
+    """
+    metricas.terminar(elementos)
+    metricas.datos.update(datos)
+    try:
+        metricas.guardar(ruta_metricas_por_defecto())
+    except OSError:
+        pass
 
 def actualizar_archivos():
     """
     Función principal que inicia el proceso de escaneo y listado de archivos.
     Muestra la ventana de "Cargando" y ejecuta la tarea de escaneo en un hilo separado para no bloquear la GUI.
+    Cada fase (lectura del disco, conversión a columnas, lista, orden, análisis) se mide en 'metricas_escaneo'.
     """
+    global metricas_escaneo
+
     progress_bar.pack(fill="x", padx=20, pady=(5, 10))  # Muestra la barra de progreso.
     progress_var.set(0) # Resetea la barra.
+    progress_bar.start(10) # Como el total no se conoce de antemano, la barra solo indica actividad.
     btn_actualizar.config(state="disabled")  # Deshabilita el botón de actualizar para evitar múltiples clics.
 
-    ventana_cargando = mostrar_ventana_proceso()  # Muestra la ventana de carga.
+    # Lo que el hilo necesita de la interfaz se lee aquí: el hilo de escaneo nunca toca Tkinter.
+    profundidad = var_profundidad.get() if var_recursivo.get() else 0 # Solo el primer nivel (0) o recursivo.
+    seleccion.desmarcar_todo()
+    subtotales_carpetas.clear()
+    reiniciar_lista() # Los resultados se llenan por lotes a medida que llegan por el canal.
+    preparar_volumenes()
+    metricas_escaneo = Metricas("escaneo", perfil=carpeta_perfil_por_defecto(), profundidad=profundidad,
+                                raices=len(configuracion_raices.raices), volumenes=len(volumenes))
+
+    canal = CanalTrabajo()
+    ventana_cargando = mostrar_ventana_proceso(al_cancelar=canal.cancelar)  # Muestra la ventana de carga.
+
+    def al_progresar(leidos):
+        ventana_cargando.label.config(text=f"Escaneando... {leidos} archivo(s) leídos")
+
+    def al_terminar(datos):
+        ventana_cargando.destroy()
+        finalizar_escaneo(datos)
 
-    # Crea y ejecuta un nuevo hilo que llamará a la función de carga.
-    # Esto es crucial para mantener la interfaz receptiva.
-    threading.Thread(target=lambda: cargar_archivos_con_progreso_con_ventana(ventana_cargando)).start()
+    def al_fallar(mensaje):
+        ventana_cargando.destroy()
+        error_escaneo(mensaje)
 
-def cargar_archivos_con_progreso_con_ventana(ventana_cargando):
+    # Crea y ejecuta un nuevo hilo que hace el trabajo pesado. Esto es crucial para mantener la interfaz receptiva.
+    threading.Thread(target=cargar_archivos_con_progreso, args=(canal, profundidad, volumenes, metricas_escaneo),
+                     daemon=True).start()
+
+    # Un único temporizador vacía el canal ~60 veces por segundo: junta los lotes y muestra el progreso una vez por fotograma.
+    canal.atender(ventana, {"lote": agregar_lote_a_lista, "progreso": al_progresar, "fin": al_terminar, "error": al_fallar})
+
+def estado_archivo(ruta):
     """
-    Función intermediaria que es llamada por el hilo.
-    Ejecuta la carga de archivos y, una vez terminada, cierra la ventana de "Cargando".
+    Devuelve el estado de un archivo ("En uso" o "Libre") según el conjunto de archivos abiertos.
+    Se calcula solo cuando hace falta (filas visibles, archivos seleccionados o exportación), no durante el escaneo.
     """
-    cargar_archivos_con_progreso()  # Llama a la función que hace el trabajo pesado.
-    ventana.after(100, ventana_cargando.destroy)  # Programa el cierre de la ventana de carga en el hilo principal de Tkinter.
+    en_uso = detector_uso.en_uso(ruta)
+    if en_uso is None:
+        return "Comprobando..." # El conjunto de archivos abiertos se está calculando en segundo plano.
+    return "En uso" if en_uso else "Libre"
 
-def get_file_description(nombre):
+def formatear_peso(size):
     """
-    Obtiene la descripción de un archivo basada en su extensión, usando el diccionario 'purpose_keywords'.
+    Convierte un tamaño en bytes a un texto legible (B, KB, MB, GB, TB).
     """
-    ext = os.path.splitext(nombre)[1].lower()  # Obtiene la extensión del archivo en minúsculas (ej. ".log").
-    return purpose_keywords.get(ext, "Archivo temporal no clasificado del sistema") # Devuelve la descripción o un texto por defecto.
+    for unidad in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unidad}" if unidad == "B" else f"{size:.1f} {unidad}"
+        size /= 1024
+    return f"{size:.1f} TB"
 
-def is_file_locked(filepath):
+def formatear_fila_archivo(fila):
     """
-    Verifica si un archivo está bloqueado o en uso por otro proceso.
-    Intenta renombrar el archivo a su mismo nombre. Si falla, es porque está bloqueado.
+    Devuelve los textos que la lista virtual muestra para un archivo (un número de fila de 'archivos_encontrados').
+    Solo se llama para las filas visibles, así que el coste no depende del total de archivos.
+    En modo recursivo el nombre ya es la ruta relativa a TEMP; con varias raíces se muestra la ruta completa.
     """
-    try:
-        os.rename(filepath, filepath)  # Intento de operación inofensiva.
-        return False  # Si tiene éxito, no está bloqueado.
-    except:
-        return True  # Si falla, está bloqueado.
+    a = archivos_encontrados
+    ruta = a.ruta(fila)
+    nombre = ruta if len(configuracion_raices.raices) > 1 else a.ruta_relativa(fila)
+    return (nombre, a.descripcion(fila), estado_archivo(ruta), formatear_peso(a.size[fila]), a.fecha(fila))
 
-def cargar_archivos_con_progreso():
+def agregar_lote_a_lista(bloques):
+    """
+    Añade a la interfaz los archivos recién escaneados (se llama desde el hilo principal, como mucho una vez por fotograma).
+    Así la lista se va llenando mientras el escaneo continúa, en lugar de esperar al final.
+    Los bloques ya llegan convertidos a columnas, así que añadirlos no crea objetos por archivo.
     """
-    El corazón del programa. Escanea la carpeta TEMP, recopila información de cada archivo,
-    los ordena según la selección del usuario y los muestra en la interfaz.
+    with metricas_escaneo.fase("agregar_columnas", sum(len(b.rel) for b in bloques)):
+        for bloque in bloques:
+            archivos_encontrados.agregar(bloque)
+    with metricas_escaneo.fase("dibujar_lista"):
+        lista_archivos.refrescar() # Solo se redibujan las filas visibles.
+    label_total.config(text=f"Archivos temporales encontrados: {len(archivos_encontrados)} (escaneando...)")
+
+def ordenar_archivos():
     """
-    global total_archivos, no_accesibles, archivos_encontrados
-    
-    # Limpia la lista de archivos de la interfaz y los datos anteriores.
-    for widget in frame_archivos.winfo_children():
-        widget.destroy()
-    checkbox_vars.clear()
-    archivos = []
-    no_accesibles = 0
+    Ordena los resultados en memoria según la opción seleccionada en el ComboBox.
+    Las claves de orden ya están precalculadas, así que no se vuelve a leer el disco.
+    """
+    archivos_encontrados.ordenar(opciones_orden_map.get(combo_orden.get(), "original"))
 
-    try:
-        lista = os.listdir(temp_path) # Obtiene una lista con todos los nombres de archivos y carpetas en TEMP.
-    except Exception as e:
-        messagebox.showerror("Error", f"No se puede acceder al directorio TEMP:\n{e}")
-        return
+def reiniciar_lista():
+    """
+    Vacía los resultados y la lista de la interfaz antes de un nuevo escaneo (hilo principal).
+    """
+    global grupos_duplicados, generacion_escaneo
 
-    total_items = len(lista)
-    procesados = 0
+    archivos_encontrados.limpiar()
+    grupos_duplicados = [] # Los números de fila de la búsqueda anterior ya no son válidos.
+    generacion_escaneo += 1
+    invalidar_indice_busqueda()
+    var_solo_duplicados.set(False)
+    lista_archivos.establecer_filas(archivos_encontrados.filas) # Durante el escaneo se muestra todo lo que llega.
 
-    # Itera sobre cada elemento encontrado en la carpeta TEMP.
-    for archivo in lista:
-        ruta = os.path.join(temp_path, archivo)  # Construye la ruta completa del archivo.
-        try:
-            if os.path.isfile(ruta): # Asegura que es un archivo y no una carpeta.
-                # Recopila toda la información relevante del archivo en un diccionario.
-                archivos.append({
-                    "ruta": ruta,
-                    "nombre": archivo,
-                    "descripcion": get_file_description(archivo),
-                    "estado": "En uso" if is_file_locked(ruta) else "Libre",
-                    "ram": "-",  # Placeholder, no se usa actualmente.
-                    "peso": "-", # Placeholder, se usa 'size' para el cálculo real.
-                    "fecha": datetime.fromtimestamp(os.path.getctime(ruta)).strftime("%d-%m-%Y %H:%M"),
-                    "size": os.path.getsize(ruta),  # Peso en bytes.
-                    "ctime": os.path.getctime(ruta) # Fecha de creación en formato timestamp para ordenar.
-                })
-        except:
-            no_accesibles += 1 # Incrementa el contador si no se puede acceder al archivo.
-
-        # Actualiza la barra de progreso en la interfaz.
-        procesados += 1
-        if total_items:
-            progress = int(procesados / total_items * 100)
-            ventana.after(1, progress_var.set, progress) # Se usa 'after' para actualizar desde el hilo principal de la GUI.
-
-    total_archivos = len(archivos)
-    label_total.config(text=f"Archivos temporales encontrados: {total_archivos}") # Actualiza la etiqueta del contador.
-
-    # Ordena la lista de archivos según la opción seleccionada en el ComboBox.
-    orden = opciones_orden_map.get(combo_orden.get(), "original")
-    if orden == "peso_mayor":
-        archivos.sort(key=lambda x: x["size"], reverse=True)
-    elif orden == "peso_menor":
-        archivos.sort(key=lambda x: x["size"])
-    elif orden == "recientes":
-        archivos.sort(key=lambda x: x["ctime"], reverse=True)
-    elif orden == "antiguos":
-        archivos.sort(key=lambda x: x["ctime"])
-    elif orden == "nombre_az":
-        archivos.sort(key=lambda x: x["nombre"].lower())
-    elif orden == "nombre_za":
-        archivos.sort(key=lambda x: x["nombre"].lower(), reverse=True)
-
-    archivos_encontrados = archivos.copy() # Guarda una copia de los archivos para la función de exportar.
-
-    # Crea y muestra los widgets para cada archivo en una cuadrícula de 2 columnas.
-    columnas = 2
-    for idx, archivo in enumerate(archivos):
-        row = idx // columnas
-        col = idx % columnas
-
-        frame = ttk.Frame(frame_archivos, borderwidth=2, relief="groove", padding=10) # Contenedor para cada archivo.
-        frame.grid(row=row, column=col, padx=10, pady=8, sticky="nsew")
-
-        nombre_formateado = "\n".join(textwrap.wrap(archivo["nombre"], width=100)) # Ajusta nombres largos.
-        color_estado = "green" if archivo["estado"] == "Libre" else "red"
-
-        # Crea las etiquetas con la información del archivo.
-        ttk.Label(frame, text=f"Nombre: {nombre_formateado}", font=("Arial", 10, "bold")).pack(anchor="w")
-        ttk.Label(frame, text=f"Descripción: {archivo['descripcion']}", wraplength=400).pack(anchor="w", pady=(2, 0))
-        ttk.Label(frame, text=f"Estado: {archivo['estado']}", foreground=color_estado).pack(anchor="w")
-        ttk.Label(frame, text=f"Fecha de creación: {archivo['fecha']}").pack(anchor="w")
-
-        # Crea el checkbox para seleccionar el archivo.
-        var = tk.BooleanVar()
-        chk = ttk.Checkbutton(frame, text="Seleccionar para eliminar", variable=var)
-        chk.pack(anchor="w", pady=(5, 0))
-        checkbox_vars[archivo["ruta"]] = (var, archivo) # Almacena la variable y los datos del archivo.
+def finalizar_escaneo(datos):
+    """
+    Se ejecuta en el hilo principal cuando termina el escaneo: ordena los archivos según la opción elegida
+    (solo se reordenan los datos; la lista virtual redibuja las filas visibles), actualiza el contador
+    y muestra las advertencias. 'datos' es el diccionario que el hilo envía al terminar.
+    """
+    global total_archivos, no_accesibles
+
+    no_accesibles = datos["no_accesibles"] # Archivos o carpetas que no se pudieron leer (por permisos, etc.).
+
+    # Ordena los resultados en el hilo principal, donde también se dibujan, y muestra la lista desde el inicio.
+    metricas = metricas_escaneo
+    total_archivos = len(archivos_encontrados)
+    with metricas.fase("ordenar", total_archivos):
+        ordenar_archivos()
+    preparar_indice_busqueda() # Una vez por escaneo, en segundo plano, para que filtrar sea instantáneo.
+    with metricas.fase("dibujar_lista"):
+        actualizar_vista(desde_inicio=True)
+
+    texto = f"Archivos temporales encontrados: {total_archivos}"
+    if len(subtotales_carpetas) > 1:
+        texto += f" en {len(subtotales_carpetas)} carpetas"
+    if ultimos_cambios is not None: # Resumen de lo que cambió desde el escaneo anterior.
+        texto += (f"  (+{len(ultimos_cambios.agregados)} nuevos, -{len(ultimos_cambios.eliminados)} eliminados,"
+                  f" {len(ultimos_cambios.modificados)} modificados)")
+    if datos["cancelado"]:
+        texto += "  (escaneo cancelado)"
+    label_total.config(text=texto) # Actualiza la etiqueta del contador.
+    with metricas.fase("archivos_en_uso", total_archivos):
+        en_uso = filas_en_uso()
+    with metricas.fase("analisis", total_archivos):
+        actualizar_analisis(en_uso)
+    guardar_metricas(metricas, total_archivos, no_accesibles=no_accesibles, cancelado=datos["cancelado"])
 
     # Muestra una advertencia si algunos archivos no se pudieron leer.
     if no_accesibles > 0:
         messagebox.showwarning("Advertencia", f"{no_accesibles} archivo(s) no pudieron accederse por permisos o bloqueo.")
 
     # Oculta la barra de progreso y reactiva el botón de actualizar.
-    ventana.after(1, lambda: progress_bar.pack_forget())
+    progress_bar.stop()
+    progress_bar.pack_forget()
+    btn_actualizar.config(state="normal")
+
+def error_escaneo(mensaje):
+    """
+    Se ejecuta en el hilo principal si el escaneo falla: muestra el error y deja la interfaz lista para reintentar.
+    """
+    messagebox.showerror("Error", mensaje)
+    progress_bar.stop()
+    progress_bar.pack_forget()
     btn_actualizar.config(state="normal")
 
+def rutas_excluidas():
+    """
+    Rutas que el escaneo no debe recorrer: las carpetas de cuarentena, si están dentro de una raíz, y la carpeta
+    de datos de la aplicación (índices, historial...), que está dentro de la caché del usuario.
+    """
+    return (directorio_datos_app(),) + tuple(carpeta for c in cuarentenas.values() for carpeta in c.carpetas())
+
+def registros_de_volumen(volumen, profundidad, errores, cancelacion=None, cambios=None, metricas=None):
+    """
+    Se ejecuta en el hilo de un volumen (ver escanear_volumenes). Actualiza el índice persistente del volumen
+    con los cambios de cada una de sus raíces y devuelve (como generador) tuplas (raíz, registro) de todos sus
+    archivos, leyendo con 'volumen.hilos' hilos como mucho. Si el índice no se puede abrir (permisos, disco
+    lleno...), escanea las raíces directamente con el motor de escaneo.
+    Las raíces que no se pueden leer se añaden a 'errores' y los Cambios de cada raíz, a 'cambios'.
+    Con 'metricas', se mide la actualización del índice de cada raíz (fase "actualizar_indice").
+    Si se activa 'cancelacion' durante la actualización del índice se lanza EscaneoCancelado.
+    """
+    ruta_bd = ruta_indice_por_defecto(volumen.punto_montaje)
+    try:
+        indice = IndiceEscaneo(ruta_bd)
+    except (sqlite3.Error, OSError):
+        indice = None
+
+    if indice is None:
+        for raiz in volumen.raices:
+            try:
+                if profundidad:
+                    registros = escanear_recursivo(raiz, profundidad_max=profundidad, hilos=volumen.hilos, errores=errores,
+                                                   subtotales=subtotales_carpetas, excluir=rutas_excluidas())
+                else:
+                    registros = escanear_directorio(raiz, errores)
+                for registro in registros:
+                    yield raiz, registro
+            except OSError as e:
+                errores.append((raiz, e)) # La raíz no se puede leer: se siguen escaneando las demás.
+        return
+
+    with bloqueos_indice[ruta_bd], indice: # Evita que el modo vigilancia use el índice a la vez.
+        for raiz in volumen.raices:
+            inicio = time.perf_counter()
+            try:
+                cambios_raiz = indice.actualizar(raiz, profundidad_max=profundidad, hilos=volumen.hilos, errores=errores,
+                                                 excluir=rutas_excluidas(), cancelacion=cancelacion)
+            except OSError as e:
+                errores.append((raiz, e))
+                continue
+            if metricas is not None:
+                metricas.anotar("actualizar_indice", time.perf_counter() - inicio, sum(map(len, cambios_raiz)))
+            if cambios is not None:
+                cambios.append(cambios_raiz)
+            subtotales_carpetas.update(indice.subtotales(raiz))
+            for registro in indice.registros(raiz):
+                yield raiz, registro
+
+def cargar_archivos_con_progreso(canal, profundidad, volumenes_escaneo, metricas):
+    """
+    El corazón del programa (se ejecuta en un hilo aparte). Escanea las raíces (y sus subcarpetas si se activó la opción)
+    a través del índice persistente de cada volumen, recopila información de cada archivo y la va enviando por lotes a la interfaz.
+    Los volúmenes se escanean a la vez, cada uno con su límite de hilos (ver raices.escanear_volumenes).
+    Toda la comunicación con la interfaz pasa por 'canal' (lotes, progreso, fin o error); el hilo nunca toca Tkinter.
+    En 'metricas' se separa el tiempo esperando a los volúmenes (listado y stat en disco, fase "leer_disco")
+    del de convertir cada lote a columnas (fase "preparar_columnas").
+    """
+    global ultimos_cambios
+
+    ultimos_cambios = None
+    errores = []  # Entradas que el motor de escaneo no pudo leer.
+    cambios = []  # Cambios de cada raíz según su índice.
+    leidos = 0
+
+    def escanear(volumen):
+        return registros_de_volumen(volumen, profundidad, errores, canal.cancelacion, cambios, metricas)
+
+    # Recorre las raíces a través de los índices (solo se releen las carpetas que cambiaron). Cada volumen
+    # entrega los archivos en lotes de una misma raíz; se envían ya convertidos a columnas (ver ConjuntoResultados.preparar).
+    # 'closing' cierra el generador si se cancela, y así los hilos de los volúmenes sueltan los índices enseguida.
+    try:
+        with metricas.perfilar(), closing(escanear_volumenes(volumenes_escaneo, escanear, canal.cancelacion)) as lotes:
+            espera = time.perf_counter()
+            for raiz, lote in lotes:
+                metricas.anotar("leer_disco", time.perf_counter() - espera, len(lote))
+                if canal.cancelado:
+                    break
+                leidos += len(lote)
+                canal.progreso(leidos) # Solo se muestra el último valor de cada fotograma.
+                with metricas.fase("preparar_columnas", len(lote)):
+                    bloque = archivos_encontrados.preparar(lote, raiz)
+                canal.enviar("lote", [bloque]) # Los mensajes "lote" son listas: el canal junta las de cada fotograma.
+                espera = time.perf_counter()
+    except EscaneoCancelado:
+        pass # Se canceló mientras se actualizaba un índice: se muestra lo que ya se había leído.
+    except Exception as e: # Cualquier otro fallo también debe cerrar la ventana de carga.
+        canal.error(f"Error durante el escaneo:\n{e}")
+        return
+
+    if cambios:
+        ultimos_cambios = Cambios(*([r for c in cambios for r in getattr(c, campo)] for campo in Cambios._fields))
+    canal.terminar({"no_accesibles": len(errores), "cancelado": canal.cancelado})
+
+
+def alternar_vigilancia():
+    """
+    Activa o desactiva el modo vigilancia: la lista se actualiza sola cuando cambian archivos en TEMP,
+    sin pulsar 'Actualizar' ni repetir el escaneo completo.
+    """
+    global vigilantes
+
+    for vigilante in vigilantes:
+        vigilante.detener()
+    vigilantes = []
+
+    if var_vigilar.get():
+        profundidad = var_profundidad.get() if var_recursivo.get() else 0
+        for volumen in volumenes:
+            for raiz in volumen.raices:
+                vigilante = crear_vigilante(raiz, lambda carpetas, v=volumen, r=raiz: al_detectar_cambios(v, r, profundidad, carpetas),
+                                            profundidad_max=profundidad)
+                vigilante.iniciar()
+                vigilantes.append(vigilante)
+
+def al_detectar_cambios(volumen, raiz, profundidad, carpetas):
+    """
+    Se ejecuta en el hilo del vigilante de 'raiz' con las carpetas donde hubo cambios, ya agrupadas. Actualiza el
+    índice de su volumen releyendo solo esas carpetas, con un stat por archivo (así también se ven los archivos
+    reescritos en el sitio, que no cambian el mtime de su carpeta), y envía la diferencia a la interfaz para
+    aplicarla de una sola vez.
+    """
+    if not vigilantes:
+        return # La vigilancia se desactivó mientras tanto.
+    ruta_bd = ruta_indice_por_defecto(volumen.punto_montaje)
+    try:
+        with bloqueos_indice[ruta_bd], IndiceEscaneo(ruta_bd) as indice:
+            cambios = indice.actualizar_carpetas(raiz, carpetas, profundidad_max=profundidad, hilos=volumen.hilos,
+                                                 excluir=rutas_excluidas())
+    except (sqlite3.Error, OSError):
+        return
+
+    nuevas = archivos_encontrados.preparar(cambios.agregados + cambios.modificados, raiz)
+    if nuevas.rel or cambios.eliminados:
+        ventana.after(0, aplicar_cambios_en_lista, nuevas, cambios.eliminados)
+
+def aplicar_cambios_en_lista(nuevas, rutas_quitadas):
+    """
+    Aplica en el hilo principal una diferencia detectada por el modo vigilancia (archivos nuevos,
+    modificados y eliminados) sobre los resultados en memoria y redibuja la lista.
+    """
+    global total_archivos
+
+    quitadas = archivos_encontrados.aplicar_cambios(nuevas, rutas_quitadas)
+    seleccion.descartar(quitadas)
+    invalidar_indice_busqueda() # Hay archivos nuevos o modificados: el índice se vuelve a construir.
+    actualizar_vista()
+    total_archivos = len(archivos_encontrados)
+    label_total.config(text=f"Archivos temporales encontrados: {total_archivos}")
+    actualizar_analisis()
 
 def cambio_orden(event=None):
     """
     Se ejecuta cuando el usuario cambia la opción en el menú desplegable de orden.
-    Llama a 'actualizar_archivos' para volver a cargar y mostrar la lista ordenada.
+    Reordena los resultados ya escaneados y redibuja la lista, sin volver a escanear.
+    Los archivos marcados se conservan porque la selección se guarda por número de fila, que no cambia al ordenar.
     """
-    actualizar_archivos()
+    ordenar_archivos()
+    actualizar_vista(desde_inicio=True)
+
+def filas_duplicados():
+    """
+    Números de fila de los grupos de duplicados que siguen vigentes, agrupados (un grupo detrás de otro,
+    del que más espacio desperdicia al que menos). Se omiten los archivos ya eliminados y los grupos
+    en los que queda una sola copia.
+    """
+    filas = array("q")
+    for grupo in grupos_duplicados:
+        vigentes = [f for f in grupo.claves if not archivos_encontrados.flags[f] & FLAG_QUITADO]
+        if len(vigentes) > 1:
+            filas.extend(vigentes)
+    return filas
+
+def actualizar_vista(desde_inicio=False):
+    """
+    Muestra en la lista todos los resultados o, si está activa la casilla "Solo duplicados", solo los
+    grupos de archivos duplicados; en ambos casos, solo los que cumplen la búsqueda (si hay una).
+    Con 'desde_inicio' vuelve al principio de la lista.
+    """
+    filas = filas_duplicados() if var_solo_duplicados.get() else archivos_encontrados.filas
+    if consulta_actual != CONSULTA_VACIA:
+        if indice_busqueda is not None:
+            inicio = time.perf_counter()
+            filas = indice_busqueda.filtrar(filas, consulta_actual)
+            label_busqueda.config(text=f"{len(filas)} coincidencia(s) ({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+        else:
+            # Mientras se construye el índice se sigue mostrando el último resultado (sin los archivos que ya
+            # no están); se filtrará de nuevo en cuanto el índice esté listo.
+            preparar_indice_busqueda()
+            if lista_archivos.filas is not archivos_encontrados.filas:
+                flags = archivos_encontrados.flags
+                filas = array("q", (f for f in lista_archivos.filas if not flags[f] & FLAG_QUITADO))
+
+    if desde_inicio or filas is not lista_archivos.filas:
+        lista_archivos.establecer_filas(filas, conservar_posicion=not desde_inicio)
+    else:
+        lista_archivos.refrescar()
+
+def invalidar_indice_busqueda():
+    """
+    Descarta el índice de búsqueda (los resultados cambiaron). Se vuelve a construir cuando hace falta.
+    """
+    global indice_busqueda, generacion_indice, construyendo_indice
+
+    indice_busqueda = None
+    construyendo_indice = False
+    generacion_indice += 1
+
+def preparar_indice_busqueda():
+    """
+    Construye el índice de búsqueda de los resultados actuales en un hilo en segundo plano (si no existe ya
+    ni se está construyendo). Las columnas se copian aquí, en el hilo principal; el resto se hace en el hilo.
+    """
+    global construyendo_indice
+
+    if indice_busqueda is not None or construyendo_indice or not len(archivos_encontrados):
+        return
+    construyendo_indice = True
+    indice = IndiceBusqueda(archivos_encontrados)
+    generacion = generacion_indice
+    if consulta_actual != CONSULTA_VACIA:
+        label_busqueda.config(text="Preparando la búsqueda...")
+
+    def tarea():
+        try:
+            indice.construir()
+        except ImportError:
+            ventana.after(0, lambda: label_busqueda.config(text="La búsqueda necesita NumPy"))
+            return
+        ventana.after(0, indice_busqueda_listo, indice, generacion)
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+def indice_busqueda_listo(indice, generacion):
+    """
+    Guarda el índice recién construido (hilo principal) y aplica la búsqueda que estuviera escrita.
+    """
+    global indice_busqueda, construyendo_indice
+
+    if generacion != generacion_indice:
+        return # Los resultados cambiaron mientras se construía.
+    indice_busqueda = indice
+    construyendo_indice = False
+    if consulta_actual != CONSULTA_VACIA:
+        actualizar_vista(desde_inicio=True)
+
+def al_escribir_busqueda(*_):
+    """
+    Se ejecuta con cada tecla del cuadro de búsqueda: espera a que se deje de escribir un momento
+    antes de filtrar, así no se filtra una vez por cada letra.
+    """
+    global busqueda_pendiente
+
+    if busqueda_pendiente is not None:
+        ventana.after_cancel(busqueda_pendiente)
+    busqueda_pendiente = ventana.after(RETARDO_BUSQUEDA_MS, aplicar_busqueda)
+
+def aplicar_busqueda():
+    """
+    Interpreta el texto del cuadro de búsqueda y filtra la lista.
+    """
+    global consulta_actual, busqueda_pendiente
+
+    busqueda_pendiente = None
+    consulta = interpretar(var_busqueda.get())
+    if consulta == consulta_actual:
+        return
+    consulta_actual = consulta
+    if consulta == CONSULTA_VACIA:
+        label_busqueda.config(text="")
+    actualizar_vista(desde_inicio=True)
+
+def filtro_activo():
+    """
+    Indica si la lista muestra solo una parte de los resultados (búsqueda o vista de duplicados).
+    """
+    return lista_archivos.filas is not archivos_encontrados.filas
+
+def buscar_duplicados_en_lista():
+    """
+    Busca archivos idénticos entre los resultados del escaneo, por etapas (peso, hash de los extremos y
+    hash completo), en un hilo en segundo plano con progreso y cancelación. Los hashes se guardan en una
+    caché para que las búsquedas siguientes no vuelvan a leer los archivos que no cambiaron.
+    """
+    if not len(archivos_encontrados):
+        messagebox.showinfo("Duplicados", "No hay archivos escaneados. Actualiza la lista primero.")
+        return
+
+    # La primera etapa (agrupar por peso) se hace aquí, vectorizada, porque lee las columnas de los resultados.
+    try:
+        candidatos = candidatos_de_conjunto(archivos_encontrados)
+    except ImportError:
+        messagebox.showerror("Error", "La búsqueda de duplicados necesita NumPy. Instálalo para usarla.")
+        return
+    if not candidatos:
+        messagebox.showinfo("Duplicados", "No hay archivos con el mismo peso: no hay duplicados.")
+        return
+
+    generacion = generacion_escaneo
+    canal = CanalTrabajo()
+    ventana_buscando = mostrar_ventana_proceso(al_cancelar=canal.cancelar)
+    ventana_buscando.title("Buscando duplicados...")
+    etapas = {"parcial": "Comparando inicio y final", "completo": "Comparando contenido"}
+
+    def al_progresar(valor):
+        etapa, hechos, total = valor
+        ventana_buscando.label.config(text=f"{etapas.get(etapa, etapa)}: {hechos} de {total}")
+
+    def al_terminar(grupos):
+        ventana_buscando.destroy()
+        finalizar_duplicados(grupos, generacion, canal.cancelado)
+
+    def al_fallar(mensaje):
+        ventana_buscando.destroy()
+        messagebox.showerror("Error", mensaje)
+
+    def tarea():
+        try:
+            try:
+                cache = CacheHashes(ruta_cache_por_defecto())
+            except (sqlite3.Error, OSError):
+                cache = None # Sin caché la búsqueda funciona igual, solo que vuelve a leer los archivos.
+            try:
+                grupos = buscar_duplicados(candidatos, cache, al_progresar=lambda *v: canal.progreso(v),
+                                           cancelacion=canal.cancelacion)
+            finally:
+                if cache is not None:
+                    cache.cerrar()
+            canal.terminar(grupos)
+        except Exception as e:
+            canal.error(f"No se pudo completar la búsqueda de duplicados:\n{e}")
+
+    threading.Thread(target=tarea, daemon=True).start()
+    canal.atender(ventana, {"progreso": al_progresar, "fin": al_terminar, "error": al_fallar})
+
+def finalizar_duplicados(grupos, generacion, cancelado):
+    """
+    Se ejecuta en el hilo principal al terminar la búsqueda: guarda los grupos, marca para eliminar todas
+    las copias salvo la más antigua de cada grupo y muestra solo los duplicados en la lista.
+    """
+    global grupos_duplicados
+
+    if cancelado:
+        messagebox.showinfo("Duplicados", "Búsqueda de duplicados cancelada.")
+        return
+    if generacion != generacion_escaneo:
+        return # Se volvió a escanear mientras tanto: los números de fila ya no corresponden.
+
+    # Solo se conservan los archivos que siguen en los resultados (pudieron eliminarse durante la búsqueda).
+    grupos_duplicados = []
+    for grupo in grupos:
+        vigentes = [f for f in grupo.claves if not archivos_encontrados.flags[f] & FLAG_QUITADO]
+        if len(vigentes) > 1:
+            grupos_duplicados.append(grupo._replace(claves=vigentes, desperdicio=grupo.size * (len(vigentes) - 1)))
+    if not grupos_duplicados:
+        messagebox.showinfo("Duplicados", "No se encontraron archivos duplicados.")
+        return
+
+    # Se conserva la copia más antigua de cada grupo (la original, normalmente) y se marcan las demás.
+    seleccion.desmarcar_todo()
+    for grupo in grupos_duplicados:
+        conservar = min(grupo.claves, key=lambda f: archivos_encontrados.ctime[f])
+        for fila in grupo.claves:
+            if fila != conservar:
+                seleccion.marcar(fila)
+    var_solo_duplicados.set(True)
+    actualizar_vista(desde_inicio=True)
+
+    desperdicio = sum(g.desperdicio for g in grupos_duplicados)
+    copias = sum(len(g.claves) - 1 for g in grupos_duplicados)
+    messagebox.showinfo("Duplicados",
+                        f"{len(grupos_duplicados)} grupo(s) de archivos idénticos: {copias} copia(s) que ocupan "
+                        f"{formatear_peso(desperdicio)}.\n\nSe marcaron todas las copias salvo la más antigua de cada grupo.")
 
 def marcar_todo():
     """
-    Marca todos los checkboxes de la lista de archivos.
+    Marca todos los archivos de la lista. Sin filtro no recorre los archivos: solo cambia el estado de la
+    selección. Con una búsqueda (o la vista de duplicados) marca solo los archivos que se muestran.
+    Las filas que lleguen después (modo vigilancia, deshacer) no quedan marcadas: el usuario no las ha visto.
     """
-    for var, _ in checkbox_vars.values():
-        var.set(True)
+    if filtro_activo():
+        seleccion.marcar_varios(lista_archivos.filas)
+    else:
+        seleccion.marcar_todo(hasta=len(archivos_encontrados.rel)) # Los números de fila nuevos siempre son mayores.
+    lista_archivos.refrescar()
 
 def desmarcar_todo():
     """
-    Desmarca todos los checkboxes de la lista de archivos.
+    Desmarca todos los archivos de la lista (con un filtro, solo los que se muestran).
+    """
+    if filtro_activo():
+        seleccion.marcar_varios(lista_archivos.filas, False)
+    else:
+        seleccion.desmarcar_todo()
+    lista_archivos.refrescar()
+
+def mostrar_ventana_eliminacion(total, cancelacion):
+    """
+    Crea una ventana con una barra de progreso determinada y un botón para cancelar la eliminación.
+    Devuelve la ventana y la barra para poder actualizarlas desde el hilo principal.
     """
-    for var, _ in checkbox_vars.values():
-        var.set(False)
+    ventana_eliminacion = tk.Toplevel(ventana)
+    ventana_eliminacion.title("Eliminando...")
+    ventana_eliminacion.geometry("320x130")
+    ventana_eliminacion.resizable(False, False)
+    ventana_eliminacion.grab_set()  # Bloquea la interacción con la ventana principal (que sigue respondiendo).
+    ventana_eliminacion.attributes("-topmost", True)
+    ventana_eliminacion.protocol("WM_DELETE_WINDOW", cancelacion.set)  # Cerrar la ventana equivale a cancelar.
+
+    label = tk.Label(ventana_eliminacion, text=f"Eliminando 0 de {total} archivo(s)...", font=("Arial", 10, "bold"))
+    label.pack(pady=(15, 5))
+
+    barra = ttk.Progressbar(ventana_eliminacion, mode="determinate", length=280, maximum=max(total, 1))
+    barra.pack(pady=5)
+
+    ttk.Button(ventana_eliminacion, text="Cancelar", command=cancelacion.set).pack(pady=5)
+
+    return ventana_eliminacion, label, barra
 
 def eliminar_archivos():
     """
     Elimina los archivos que han sido seleccionados por el usuario.
-    Verifica si están bloqueados antes de intentar borrarlos.
+    La eliminación se hace en un grupo de hilos en segundo plano, con progreso y opción de cancelar;
+    los archivos en uso no se intentan borrar. En modo cuarentena los archivos solo se mueven a la carpeta
+    de cuarentena (es inmediato) y se borran más tarde, de modo que la operación se puede deshacer.
     """
-    # Filtra para obtener solo los archivos cuyo checkbox está marcado.
-    seleccionados = [(ruta, datos) for ruta, (var, datos) in checkbox_vars.items() if var.get()]
+    # Filtra para obtener solo los archivos que están marcados (ruta -> número de fila).
+    inicio = time.perf_counter()
+    seleccionados = {archivos_encontrados.ruta(fila): fila
+                     for fila in seleccion.marcados(archivos_encontrados, clave=lambda fila: fila)}
     total = len(seleccionados)
+    segundos_seleccion = time.perf_counter() - inicio
 
     if total == 0:
         messagebox.showinfo("Aviso", "No seleccionaste ningún archivo para eliminar.")
@@ -286,110 +1017,494 @@ def eliminar_archivos():
     if not confirmar:
         return
 
-    eliminados = 0
-    errores = 0
+    # Las métricas empiezan tras la confirmación, para no contar el tiempo que el diálogo está abierto.
+    metricas = Metricas("eliminacion", perfil=carpeta_perfil_por_defecto())
+    metricas.anotar("seleccion", segundos_seleccion, total)
+    iniciar_eliminacion(seleccionados, metricas)
+
+def iniciar_eliminacion(seleccionados, metricas=None):
+    """
+    Elimina (o pone en cuarentena) los archivos de 'seleccionados' ({ruta: número de fila}) en un hilo
+    en segundo plano, con la ventana de progreso. La usan la eliminación manual y las políticas.
+    Cada fase se mide en 'metricas' (si no se indica, se crean unas nuevas).
+    """
+    total = len(seleccionados)
+    usar_cuarentena = var_cuarentena.get() and bool(cuarentenas)
+    if metricas is None:
+        metricas = Metricas("eliminacion", perfil=carpeta_perfil_por_defecto())
+    metricas.datos["cuarentena"] = usar_cuarentena
+    cancelacion = threading.Event()
+    ventana_eliminacion, label, barra = mostrar_ventana_eliminacion(total, cancelacion)
+    btn_eliminar.config(state="disabled")
+
+    def al_progresar(hechos, total):
+        # Se llama desde el hilo de eliminación (ya limitado a pocas veces por segundo).
+        ventana.after(0, lambda: (barra.configure(value=hechos), label.config(text=f"Eliminando {hechos} de {total} archivo(s)...")))
+
+    # En modo cuarentena cada archivo va a la cuarentena de su volumen (entre discos no se puede mover con un
+    # simple renombrado); los de un volumen sin cuarentena (grupo None) se borran directamente.
+    grupos = {}
+    for ruta in seleccionados:
+        grupos.setdefault(cuarentena_de(ruta) if usar_cuarentena else None, []).append(ruta)
+
+    def tarea():
+        lotes = []
+        eliminados, errores, cancelado = [], [], False
+        hechos = 0
+        with metricas.perfilar():
+            with metricas.fase("archivos_en_uso"):
+                detector_uso.actualizar_ahora() # Un único recorrido de los archivos abiertos para toda la selección.
+            for destino, rutas in grupos.items():
+                if cancelado:
+                    break
+                progreso = lambda n, _, base=hechos: al_progresar(base + n, total)
+                if destino is not None:
+                    try:
+                        destino.crear_carpeta()  # Primer archivo del volumen en cuarentena en esta sesión.
+                    except OSError:
+                        destino = None  # No se puede crear la carpeta de cuarentena: se borran directamente.
+                if destino is not None:
+                    with metricas.fase("mover_a_cuarentena", len(rutas)):
+                        lote, parcial = destino.poner(rutas, al_progresar=progreso, cancelacion=cancelacion,
+                                                      en_uso=detector_uso.en_uso)
+                    lotes.append((destino, lote))
+                else:
+                    with metricas.fase("borrar", len(rutas)):
+                        parcial = eliminar_en_paralelo(rutas, al_progresar=progreso, cancelacion=cancelacion,
+                                                       en_uso=detector_uso.en_uso)
+                eliminados += parcial.eliminados
+                errores += parcial.errores
+                cancelado = parcial.cancelado
+                hechos += len(rutas)
+        resultado = ResultadoEliminacion(eliminados, errores, cancelado)
+        ventana.after(0, finalizar_eliminacion, resultado, seleccionados, ventana_eliminacion, lotes, metricas)
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+def finalizar_eliminacion(resultado, seleccionados, ventana_eliminacion, lotes=(), metricas=None):
+    """
+    Se ejecuta en el hilo principal al terminar la eliminación: registra el historial, quita de la lista
+    solo los archivos eliminados (sin volver a escanear) y muestra un resumen con los motivos de error.
+    Si se usó la cuarentena ('lotes': pares (Cuarentena, LoteCuarentena), uno por volumen), programa la purga
+    y permite deshacer hasta entonces.
+    Las fases de este paso se añaden a 'metricas', que se guardan antes de mostrar el resumen.
+    """
+    global total_archivos
+
+    if metricas is None:
+        metricas = Metricas("eliminacion")
+
+    ventana_eliminacion.destroy()
+    btn_eliminar.config(state="normal")
+
+    # Se guarda una copia de cada fila eliminada: si se vuelve a escanear antes de deshacer, los números de fila cambian.
+    with metricas.fase("copiar_filas", len(resultado.eliminados)):
+        copias = [archivos_encontrados.fila(seleccionados[r]) for r in resultado.eliminados]
+
+    # Añade los archivos eliminados al historial (en segundo plano, en una transacción por lote de filas).
+    # En cuarentena la fecha de eliminación definitiva se completa cuando se purga el lote.
+    carpeta_de = {ruta: lote.carpeta for _, lote in lotes for ruta in lote.rutas}  # Lote de cada archivo movido.
+    if copias:
+        por_lote = {}
+        for ruta, copia in zip(resultado.eliminados, copias):
+            por_lote.setdefault(carpeta_de.get(ruta), []).append(copia)
+        entradas = [e for carpeta, suyas in por_lote.items() for e in entradas_desde(suyas, lote=carpeta)]
+        en_historial(lambda historial: historial.registrar(entradas))
+
+    lotes = [(destino, lote) for destino, lote in lotes if lote.rutas]
+    if lotes:
+        registro = {"lotes": lotes, "datos": {r: c for r, c in zip(resultado.eliminados, copias) if r in carpeta_de}}
+        registro["after_id"] = ventana.after(PLAZO_PURGA_MS, purgar_lote, registro)
+        lotes_en_cuarentena.append(registro)
+        btn_deshacer.config(state="normal")
+
+    # Quita de los resultados y de la lista únicamente lo que se eliminó.
+    eliminadas = [seleccionados[r] for r in resultado.eliminados]
+    with metricas.fase("quitar_filas", len(eliminadas)):
+        archivos_encontrados.quitar_filas(eliminadas)
+        seleccion.descartar(eliminadas)
+    with metricas.fase("dibujar_lista"):
+        actualizar_vista()
+    total_archivos = len(archivos_encontrados)
+    label_total.config(text=f"Archivos temporales encontrados: {total_archivos}")
+    with metricas.fase("analisis", total_archivos):
+        actualizar_analisis()
+    guardar_metricas(metricas, len(seleccionados), eliminados=len(resultado.eliminados),
+                     errores=len(resultado.errores), cancelado=resultado.cancelado)
+
+    # Resumen de la operación, con los motivos de error agrupados.
+    mensaje = f"Eliminados: {len(resultado.eliminados)}. Errores: {len(resultado.errores)}."
+    if resultado.cancelado:
+        mensaje = "Eliminación cancelada.\n" + mensaje
+    motivos = {}
+    for _, motivo in resultado.errores:
+        motivos[motivo] = motivos.get(motivo, 0) + 1
+    for motivo, cantidad in sorted(motivos.items(), key=lambda m: m[1], reverse=True):
+        mensaje += f"\n- {motivo}: {cantidad}"
+    if lotes:
+        mensaje += f"\n\nLos archivos están en cuarentena: se borrarán en {PLAZO_PURGA_MS // 60000} minuto(s) y hasta entonces puedes deshacer."
+    directos = sum(1 for r in resultado.eliminados if r not in carpeta_de)
+    if metricas.datos.get("cuarentena") and directos:
+        mensaje += f"\n{directos} archivo(s) de discos sin carpeta de cuarentena se borraron directamente."
+    messagebox.showinfo("Resultado", mensaje)
+
+def aplicar_politicas():
+    """
+    Evalúa las políticas de limpieza del archivo de configuración sobre los archivos escaneados y muestra
+    lo que se liberaría (simulación). Desde ahí se pueden eliminar los archivos por la misma vía que
+    'Eliminar seleccionados' o solo marcarlos en la lista para revisarlos.
+    """
+    ruta = ruta_politicas_por_defecto()
+    try:
+        if crear_archivo_ejemplo(ruta):
+            messagebox.showinfo("Políticas", f"Se creó un archivo de políticas de ejemplo que puedes editar:\n{ruta}")
+        politicas = cargar_politicas(ruta)
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Error", f"No se pudieron leer las políticas ({ruta}):\n{e}")
+        return
+    if not politicas:
+        messagebox.showinfo("Políticas", f"No hay políticas definidas en:\n{ruta}")
+        return
+
+    try:
+        resultado = evaluar_politicas(politicas, archivos_encontrados, filas_en_uso())
+    except ImportError:
+        messagebox.showerror("Error", "Las políticas necesitan NumPy. Instálalo para usarlas.")
+        return
+
+    resumen = "\n".join(f"- {nombre}: {archivos} archivo(s), {formatear_peso(peso)}"
+                        for nombre, archivos, peso in resultado.por_politica)
+    if not resultado.filas:
+        messagebox.showinfo("Políticas", "Ningún archivo cumple las políticas.\n\n" + resumen)
+        return
+
+    respuesta = messagebox.askyesnocancel(
+        "Políticas de limpieza",
+        f"Se liberarían {formatear_peso(resultado.bytes)} en {len(resultado.filas)} archivo(s):\n\n{resumen}\n\n"
+        "Sí: eliminarlos ahora.   No: solo marcarlos en la lista.   Cancelar: no hacer nada.")
+    if respuesta is None:
+        return
+
+    # Los archivos elegidos pasan a ser la selección, así la lista muestra exactamente lo que se elimina.
+    seleccion.desmarcar_todo()
+    for fila in resultado.filas:
+        seleccion.marcar(fila)
+    lista_archivos.refrescar()
+    if respuesta:
+        iniciar_eliminacion({archivos_encontrados.ruta(fila): fila for fila in resultado.filas})
+
+def purgar_lote(registro):
+    """
+    Borra definitivamente un lote de la cuarentena en un hilo en segundo plano (por pasos y con
+    prioridad de E/S baja). Al terminar, anota la fecha de eliminación en el historial.
+    """
+    if registro in lotes_en_cuarentena:
+        lotes_en_cuarentena.remove(registro)
+    if not lotes_en_cuarentena:
+        btn_deshacer.config(state="disabled")
+
+    def tarea():
+        for destino, lote in registro["lotes"]:
+            momento = destino.purgar(lote)
+            ventana.after(0, marcar_lote_purgado, lote.carpeta, momento)
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+def marcar_lote_purgado(carpeta, momento):
+    """
+    Completa la fecha de eliminación de las entradas del historial de un lote ya purgado.
+    """
+    en_historial(lambda historial: historial.marcar_purgado(carpeta, momento))
+
+def deshacer_eliminacion():
+    """
+    Devuelve a su sitio los archivos de la última eliminación en cuarentena (si aún no se purgó),
+    los vuelve a mostrar en la lista y los quita del historial.
+    """
+    if not lotes_en_cuarentena:
+        messagebox.showinfo("Deshacer", "No hay eliminaciones pendientes que se puedan deshacer.")
+        return
+
+    registro = lotes_en_cuarentena.pop()
+    ventana.after_cancel(registro["after_id"])
+    if not lotes_en_cuarentena:
+        btn_deshacer.config(state="disabled")
+
+    def tarea():
+        restauradas, errores = [], []
+        incompletos = [] # Lotes con archivos que no se pudieron restaurar.
+        for destino, lote in registro["lotes"]:
+            suyas, fallidas = destino.deshacer(lote)
+            restauradas += suyas
+            errores += fallidas
+            if fallidas:
+                incompletos.append((destino, lote))
+        ventana.after(0, finalizar_deshacer, registro, restauradas, errores, incompletos)
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+def finalizar_deshacer(registro, restauradas, errores, incompletos=()):
+    """
+    Vuelve a añadir a la lista los archivos restaurados y los quita del historial (hilo principal).
+    Los que no se pudieron restaurar se purgarán con el resto de su lote ('incompletos').
+    """
+    global total_archivos
+
+    por_raiz = {} # Cada archivo vuelve a la raíz de la que salió.
+    for ruta in restauradas:
+        por_raiz.setdefault(raiz_de(ruta), []).append(registro["datos"][ruta])
+    for raiz, copias in por_raiz.items():
+        archivos_encontrados.aplicar_cambios(archivos_encontrados.preparar(copias, raiz), [])
+    invalidar_indice_busqueda()
+    actualizar_vista()
+    total_archivos = len(archivos_encontrados)
+    label_total.config(text=f"Archivos temporales encontrados: {total_archivos}")
+    actualizar_analisis()
+
+    for _, lote in registro["lotes"]:
+        suyas = [ruta for ruta in restauradas if ruta in lote.rutas]
+        if suyas:
+            en_historial(lambda historial, carpeta=lote.carpeta, suyas=suyas: historial.quitar_restaurados(carpeta, suyas))
+
+    mensaje = f"Archivos restaurados: {len(restauradas)}."
+    if errores:
+        mensaje += f"\nNo se pudieron restaurar {len(errores)} archivo(s) (por ejemplo: {errores[0][1]})."
+        purgar_lote({"lotes": list(incompletos)})
+    messagebox.showinfo("Deshacer", mensaje)
+
+def purgar_cuarentena_anterior():
+    """
+    Purga en segundo plano los lotes que quedaron en las cuarentenas de una sesión anterior.
+    """
+    lotes = [(destino, lote) for destino in cuarentenas.values() for lote in destino.lotes_pendientes()]
+
+    def tarea():
+        for destino, lote in lotes:
+            momento = destino.purgar(lote)
+            en_historial(lambda historial, carpeta=lote.carpeta, momento=momento: historial.marcar_purgado(carpeta, momento))
+
+    if lotes:
+        threading.Thread(target=tarea, daemon=True).start()
 
-    for ruta, datos in seleccionados:
+
+def pedir_archivo_exportacion():
+    """
+    Pide al usuario dónde guardar la exportación. El formato se elige por la extensión (Excel, CSV o JSONL comprimido).
+    """
+    return filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=TIPOS_EXPORTACION)
+
+def exportar_en_segundo_plano(archivo, columnas, obtener_filas, mensaje_ok, operacion="exportacion"):
+    """
+    Escribe las filas en 'archivo' en un hilo aparte (en streaming, en una sola pasada) y avisa al terminar.
+    'obtener_filas' se ejecuta en ese hilo y devuelve un iterable con una secuencia de valores por fila.
+    Se mide por separado el tiempo de generar las filas (fase "generar_filas") y el total de la escritura
+    (fase "exportar", que lo incluye) con el nombre de métricas 'operacion'.
+    """
+    label_total_anterior = label_total.cget("text")
+    metricas = Metricas(operacion, perfil=carpeta_perfil_por_defecto(), formato=formato_desde_ruta(archivo))
+
+    def al_progresar(escritas):
+        ventana.after(0, lambda: label_total.config(text=f"Exportando... {escritas} fila(s)"))
+
+    def tarea():
         try:
-            if not is_file_locked(ruta): # Solo intenta eliminar si no está en uso.
-                os.remove(ruta)
-                eliminados += 1
-                # Añade el archivo eliminado al historial.
-                historial_eliminados.append({
-                    "Nombre": datos["nombre"],
-                    "Descripción": datos["descripcion"],
-                    "Peso": datos["size"], # Se podría convertir a KB/MB
-                    "RAM estimada": datos["ram"],
-                    "Fecha de creación": datos["fecha"],
-                    "Fecha Eliminación": datetime.now().strftime("%d-%m-%Y %H:%M")
-                })
-            else:
-                errores += 1 # Cuenta como error si el archivo está en uso.
-        except:
-            errores += 1 # Cuenta como error si falla la eliminación por cualquier otra razón.
-    
-    # Muestra un resumen de la operación y actualiza la lista de archivos.
-    messagebox.showinfo("Resultado", f"Eliminados: {eliminados}. Errores (en uso o protegidos): {errores}.")
-    actualizar_archivos()
-    actualizar_barra_almacenamiento() # Actualiza también la barra de uso de disco.
-    
+            with metricas.perfilar(), metricas.fase("exportar"):
+                escritas = exportar_filas(archivo, columnas, metricas.medir_iteracion("generar_filas", obtener_filas()),
+                                          al_progresar=al_progresar)
+            metricas.contar("exportar", escritas)
+        except (OSError, ValueError, ImportError, sqlite3.Error) as e:
+            ventana.after(0, lambda: messagebox.showerror("Error", f"No se pudo exportar:\n{e}"))
+        else:
+            guardar_metricas(metricas, escritas)
+            ventana.after(0, lambda: messagebox.showinfo("Exportado", f"{mensaje_ok} ({escritas} fila(s)):\n{archivo}"))
+        finally:
+            ventana.after(0, lambda: label_total.config(text=label_total_anterior))
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+def en_historial(operacion, al_terminar=None):
+    """
+    Ejecuta 'operacion(historial)' en el hilo del historial, con su propia conexión a la base de datos.
+    Si se indica 'al_terminar', se llama en el hilo principal con el resultado. Se puede llamar desde cualquier hilo.
+    """
+    def tarea():
+        try:
+            with HistorialEliminaciones(ruta_historial_por_defecto()) as historial:
+                resultado = operacion(historial)
+        except (sqlite3.Error, OSError) as e:
+            ventana.after(0, lambda: messagebox.showerror("Error", f"No se pudo acceder al historial de eliminaciones:\n{e}"))
+            return
+        if al_terminar is not None:
+            ventana.after(0, al_terminar, resultado)
+
+    hilo_historial.submit(tarea)
+
+def formatear_momento(momento):
+    """Fecha y hora (dd-mm-aaaa hh:mm) de un momento en segundos desde epoch."""
+    return datetime.fromtimestamp(momento).strftime("%d-%m-%Y %H:%M")
+
+def fila_historial(e):
+    """Valores de una EntradaHistorial en el orden de COLUMNAS_HISTORIAL."""
+    return (e.nombre, e.descripcion, e.size, "-", formatear_momento(e.ctime) if e.ctime is not None else "-",
+            formatear_momento(e.fecha) if e.lote is not None else "-",
+            formatear_momento(e.purgado) if e.purgado is not None else "Pendiente", e.ruta)
+
+def leer_rango_historial():
+    """
+    Devuelve (desde, hasta) en segundos desde epoch según las fechas de la ventana del historial
+    (dd-mm-aaaa, vacías = sin límite; 'hasta' incluye ese día completo). Lanza ValueError si no son válidas.
+    """
+    def leer(texto, dias_extra=0):
+        texto = texto.strip()
+        if not texto:
+            return None
+        return (datetime.strptime(texto, "%d-%m-%Y") + timedelta(days=dias_extra)).timestamp()
+
+    return leer(ventana_historial.desde.get()), leer(ventana_historial.hasta.get(), dias_extra=1)
+
+def elegir_rango_historial(event=None):
+    """
+    Rellena las fechas de la ventana del historial con el rango rápido elegido y vuelve a consultar.
+    """
+    dias = RANGOS_HISTORIAL.get(ventana_historial.rango.get())
+    ventana_historial.desde.set((datetime.now() - timedelta(days=dias)).strftime("%d-%m-%Y") if dias else "")
+    ventana_historial.hasta.set("")
+    actualizar_ventana_historial()
+
+def mostrar_historial():
+    """
+    Abre (o trae al frente) la ventana del historial de eliminaciones: bytes liberados por semana, por extensión
+    y los archivos más grandes eliminados en un rango de fechas, que también se puede exportar.
+    """
+    global ventana_historial
+
+    if ventana_historial is not None and ventana_historial.winfo_exists():
+        ventana_historial.lift()
+        return
+
+    ventana_historial = tk.Toplevel(ventana)
+    ventana_historial.title("Historial de eliminaciones")
+    ventana_historial.geometry("760x460")
+
+    # Rango de fechas: un rango rápido o fechas concretas (dd-mm-aaaa).
+    barra_rango = tk.Frame(ventana_historial)
+    barra_rango.pack(fill="x", padx=10, pady=(10, 5))
+    ventana_historial.rango = ttk.Combobox(barra_rango, values=list(RANGOS_HISTORIAL), state="readonly", width=18)
+    ventana_historial.rango.set("Últimos 30 días")
+    ventana_historial.rango.bind("<<ComboboxSelected>>", elegir_rango_historial)
+    ventana_historial.rango.pack(side="left")
+    ventana_historial.desde = tk.StringVar()
+    ventana_historial.hasta = tk.StringVar()
+    for texto, variable in (("Desde:", ventana_historial.desde), ("Hasta:", ventana_historial.hasta)):
+        ttk.Label(barra_rango, text=texto).pack(side="left", padx=(10, 2))
+        ttk.Entry(barra_rango, textvariable=variable, width=11).pack(side="left")
+    ttk.Button(barra_rango, text="Consultar", command=actualizar_ventana_historial).pack(side="left", padx=(10, 0))
+    ttk.Button(barra_rango, text="Exportar...", command=exportar_historial).pack(side="right")
+
+    ventana_historial.label = tk.Label(ventana_historial, font=("Arial", 10, "bold"), justify="left")
+    ventana_historial.label.pack(anchor="w", padx=10, pady=(0, 5))
+
+    pestanas = ttk.Notebook(ventana_historial)
+    pestanas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    columnas_total = [("Grupo", 300), ("Archivos", 100), ("Liberado", 120)]
+    ventana_historial.tablas = {}
+    for clave, titulo, columnas in (("por_semana", "Por semana", columnas_total),
+                                    ("por_extension", "Por extensión", columnas_total),
+                                    ("mayores", "Más grandes", [("Archivo", 420), ("Peso", 100), ("Eliminado", 120)])):
+        marco = ttk.Frame(pestanas)
+        tabla = ttk.Treeview(marco, columns=[c for c, _ in columnas], show="headings")
+        for titulo_columna, ancho in columnas:
+            tabla.heading(titulo_columna, text=titulo_columna, anchor="w")
+            tabla.column(titulo_columna, width=ancho, anchor="w")
+        barra = ttk.Scrollbar(marco, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=barra.set)
+        barra.pack(side="right", fill="y")
+        tabla.pack(fill="both", expand=True)
+        pestanas.add(marco, text=titulo)
+        ventana_historial.tablas[clave] = tabla
+
+    elegir_rango_historial()
+
+def actualizar_ventana_historial():
+    """
+    Consulta el historial en el rango de fechas de la ventana (en el hilo del historial; con los índices y
+    los totales diarios tarda milisegundos aunque haya años de datos) y muestra el resultado.
+    """
+    try:
+        desde, hasta = leer_rango_historial()
+    except ValueError:
+        messagebox.showerror("Error", "Las fechas deben tener el formato dd-mm-aaaa.", parent=ventana_historial)
+        return
+
+    def consultar(historial):
+        return (historial.resumen(desde, hasta), historial.por_periodo("semana", desde, hasta),
+                historial.por_extension(desde, hasta), historial.mayores(desde, hasta))
+
+    en_historial(consultar, llenar_ventana_historial)
+
+def llenar_ventana_historial(datos):
+    """
+    Vuelca el resultado de la consulta del historial en su ventana (hilo principal).
+    """
+    if ventana_historial is None or not ventana_historial.winfo_exists():
+        return # La ventana se cerró mientras se consultaba.
+    (archivos, liberado), semanas, extensiones, mayores = datos
+    ventana_historial.label.config(text=f"Eliminados en el periodo: {archivos} archivo(s), {formatear_peso(liberado)}.")
+
+    tablas = ventana_historial.tablas
+    for tabla in tablas.values():
+        tabla.delete(*tabla.get_children())
+    for t in semanas:
+        anio, semana = t.nombre.split("-")
+        tablas["por_semana"].insert("", "end", values=(f"Semana {semana} de {anio}", t.archivos, formatear_peso(t.bytes)))
+    for t in extensiones:
+        tablas["por_extension"].insert("", "end", values=(t.nombre or "(sin extensión)", t.archivos, formatear_peso(t.bytes)))
+    for e in mayores:
+        tablas["mayores"].insert("", "end", values=(e.ruta, formatear_peso(e.size), formatear_momento(e.fecha)))
 
 def exportar_historial():
     """
-    Exporta el historial de archivos eliminados a un archivo Excel (.xlsx).
-    Ajusta automáticamente el ancho de las columnas.
+    Exporta el historial de archivos eliminados del rango de fechas elegido a Excel (.xlsx), CSV o JSON Lines
+    comprimido. Las filas se leen de la base de datos con un cursor a medida que se escriben.
     """
-    if not historial_eliminados:
-        messagebox.showinfo("Historial vacío", "Aún no has eliminado ningún archivo.")
+    try:
+        desde, hasta = leer_rango_historial()
+    except ValueError:
+        messagebox.showerror("Error", "Las fechas deben tener el formato dd-mm-aaaa.", parent=ventana_historial)
         return
 
     # Pide al usuario que elija dónde guardar el archivo.
-    archivo = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+    archivo = pedir_archivo_exportacion()
     if archivo:
-        df = pd.DataFrame(historial_eliminados) # Convierte la lista de diccionarios a un DataFrame de pandas.
-        df.to_excel(archivo, index=False) # Exporta el DataFrame a Excel.
-
-        # --- Código para autoajustar el ancho de las columnas en el Excel ---
-        wb = load_workbook(archivo)
-        ws = wb.active
-        for col in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(col[0].column) # Obtiene la letra de la columna
-            for cell in col:
-                try:
-                    if cell.value:
-                        # Encuentra la longitud máxima del contenido en la columna.
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) # Añade un poco de espacio extra.
-            ws.column_dimensions[column_letter].width = adjusted_width
-        wb.save(archivo) # Guarda los cambios en el archivo Excel.
-
-        messagebox.showinfo("Exportado", f"Historial exportado a:\n{archivo}")
+        def filas():
+            # Generador con su propia conexión: se ejecuta en el hilo de la exportación (SQLite en modo WAL
+            # permite leer mientras el hilo del historial escribe).
+            with HistorialEliminaciones(ruta_historial_por_defecto()) as historial:
+                for entrada in historial.entradas(desde, hasta):
+                    yield fila_historial(entrada)
+
+        exportar_en_segundo_plano(archivo, COLUMNAS_HISTORIAL, filas, "Historial exportado", "exportacion_historial")
 
 def exportar_todos_a_excel():
     """
-    Exporta la lista completa de archivos temporales encontrados (no solo los eliminados) a un archivo Excel.
-    Similar a 'exportar_historial' pero usa la lista 'archivos_encontrados'.
+    Exporta la lista completa de archivos temporales encontrados (no solo los eliminados).
+    Usa el mismo proceso que 'exportar_historial' pero con los resultados del escaneo ('archivos_encontrados').
     """
     if not archivos_encontrados:
         messagebox.showinfo("Sin datos", "No hay archivos para exportar. Primero actualiza la lista.")
         return
 
-    archivo = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+    archivo = pedir_archivo_exportacion()
     if archivo:
-        # Prepara los datos para el DataFrame.
-        datos = []
-        for a in archivos_encontrados:
-            datos.append({
-                "Nombre": a["nombre"],
-                "Descripción": a["descripcion"],
-                "Estado": a["estado"],
-                "Peso (bytes)": a["size"],
-                "Fecha de creación": a["fecha"],
-                "Ruta": a["ruta"]
-            })
-        df = pd.DataFrame(datos)
-        df.to_excel(archivo, index=False)
-
-        # Autoajusta el ancho de las columnas.
-        wb = load_workbook(archivo)
-        ws = wb.active
-        for col in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(col[0].column)
-            for cell in col:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        wb.save(archivo)
-
-        messagebox.showinfo("Exportado", f"Todos los archivos exportados a:\n{archivo}")
+        a = archivos_encontrados.instantanea() # Copia ligera, por si la lista cambia mientras se exporta.
+
+        def filas():
+            detector_uso.actualizar_ahora() # El estado se calcula una vez para todos los archivos exportados.
+            for fila in a.filas: # Los textos de cada fila se generan aquí, al escribirla.
+                ruta = a.ruta(fila)
+                yield (a.nombre(fila), a.descripcion(fila), estado_archivo(ruta), a.size[fila], a.fecha(fila), ruta)
+
+        exportar_en_segundo_plano(archivo, COLUMNAS_ARCHIVOS, filas, "Todos los archivos exportados", "exportacion_archivos")
 
 def mostrar_info_temp():
     """
@@ -417,9 +1532,9 @@ def mostrar_manual():
         "2. Puedes ordenar los resultados por peso, nombre o fecha usando el menú desplegable.\n"
         "3. Marca las casillas de los archivos que deseas eliminar.\n"
         "4. Presiona 'Eliminar seleccionados' para limpiarlos.\n"
-        "5. Usa 'Exportar historial a Excel' si quieres guardar un registro de lo que se eliminó.\n"
+        "5. Usa 'Historial de eliminaciones' para ver lo que se eliminó (también en sesiones anteriores) y exportarlo.\n"
         "6. Puedes seleccionar o deseleccionar todos los archivos con un solo clic usando los botones correspondientes.\n"
-        "7. Observa el porcentaje de uso del almacenamiento en el disco que contiene la carpeta TEMP.\n"
+        "7. Observa el uso del almacenamiento y el espacio recuperable de cada disco escaneado. Con 'Carpetas a escanear...' eliges qué carpetas temporales y de caché se revisan.\n"
         "8. Usa el botón '¿Qué es la carpeta %TEMP%?' para más información sobre su propósito.\n"
         "9. Cuando termines, presiona 'Salir del programa'.\n\n"
         "¡Mantén tu sistema más limpio y ordenado con este gestor!"
@@ -431,107 +1546,181 @@ def salir():
     """
     Cierra la aplicación.
     """
+    for vigilante in vigilantes:
+        vigilante.detener() # Detiene los hilos del modo vigilancia antes de salir.
     ventana.quit()
 
 
 # --- CONFIGURACIÓN DE LA INTERFAZ GRÁFICA (GUI) ---
+# La ventana solo se construye al ejecutar este archivo como programa. Así, importarlo (o importar el
+# paquete 'voidclean', que contiene toda la lógica sin interfaz) no abre ninguna ventana.
 
-# Creación de la ventana principal.
-ventana = tk.Tk()
-ventana.title("VoidCleanTempo")
-ventana.geometry("1080x720")
-
-# --- Estilos ---
-# Creación y configuración de estilos para los widgets, como la barra de progreso.
-style = ttk.Style()
-style.theme_use("default") # Se puede cambiar por 'clam', 'alt', etc.
-style.configure("Verde.Horizontal.TProgressbar", foreground="green", background="green")
-style.configure("Naranja.Horizontal.TProgressbar", foreground="orange", background="orange")
-style.configure("Rojo.Horizontal.TProgressbar", foreground="red", background="red")
-
-# --- Header (Cabecera) ---
-# Frame superior que contiene información general y botones de acción.
-header = tk.Frame(ventana, bg="#d0e8ff", height=60)
-header.pack(fill="x", padx=10, pady=(0, 0))
-
-label_total = tk.Label(header, text="Archivos temporales encontrados: 0", bg="#d0e8ff", font=("Arial", 12, "bold"))
-label_total.pack(side="left", padx=10, pady=5)
-
-label_almacenamiento = tk.Label(header, text="Uso de almacenamiento: --%", bg="#d0e8ff", font=("Arial", 10))
-label_almacenamiento.pack(side="top", padx=10, pady=(5, 0), anchor="w")
-
-barra_almacenamiento = ttk.Progressbar(header, orient="horizontal", length=250, mode="determinate")
-barra_almacenamiento.pack(side="top", padx=10, anchor="w")
-
-# Estilo para los botones principales para un aspecto uniforme.
-estilo_botones = {"bg": "#b2d8f7", "fg": "black", "activebackground": "#91c8f6", "relief": "raised", "bd": 1, "font": ("Arial", 10, "bold")}
-
-# Botones en la cabecera, alineados a la derecha.
-tk.Button(header, text="Salir del programa", command=salir, **estilo_botones).pack(side="right", padx=5, pady=10)
-tk.Button(header, text="Exportar historial a Excel", command=exportar_historial, **estilo_botones).pack(side="right", padx=5, pady=10)
-tk.Button(header, text="Exportar todos a Excel", command=exportar_todos_a_excel, **estilo_botones).pack(side="right", padx=5, pady=10)
-
-# --- Contenedor Principal ---
-# Frame que aloja la lista de archivos y el panel de botones lateral.
-main_frame = tk.Frame(ventana)
-main_frame.pack(fill="both", expand=True)
-
-# --- Zona de la Lista de Archivos (con Scroll) ---
-# Se usa un Canvas con una Scrollbar para poder desplazar la lista de archivos si es muy larga.
-frame_scroll = tk.Frame(main_frame)
-frame_scroll.grid(row=0, column=0, sticky="nsew") # Se usa grid para el layout principal.
-
-contenedor = tk.Canvas(frame_scroll)
-scrollbar = ttk.Scrollbar(frame_scroll, orient="vertical", command=contenedor.yview)
-frame_archivos = ttk.Frame(contenedor) # Este es el frame que realmente contendrá los widgets de los archivos.
-
-# Configuración para que la scrollbar funcione correctamente con el contenido dinámico.
-frame_archivos.bind("<Configure>", lambda e: contenedor.configure(scrollregion=contenedor.bbox("all")))
-contenedor.create_window((0, 0), window=frame_archivos, anchor="nw")
-contenedor.configure(yscrollcommand=scrollbar.set)
-contenedor.pack(side="left", fill="both", expand=True)
-scrollbar.pack(side="right", fill="y")
-
-# Configuración del grid para que la zona de la lista se expanda.
-main_frame.grid_rowconfigure(0, weight=1)
-main_frame.grid_columnconfigure(0, weight=1)
-
-# --- Panel de Botones Lateral ---
-# Panel a la derecha con los controles principales.
-panel_botones = tk.Frame(main_frame, bg="#f0f0f0", width=200)
-panel_botones.grid(row=0, column=1, sticky="ns") # Ocupa todo el alto de la fila.
-
-btn_eliminar = ttk.Button(panel_botones, text="Eliminar seleccionados", command=eliminar_archivos)
-btn_eliminar.pack(pady=5, padx=5, fill="x")
-
-ttk.Button(panel_botones, text="Marcar todo", command=marcar_todo).pack(pady=5, padx=5, fill="x")
-ttk.Button(panel_botones, text="Desmarcar todo", command=desmarcar_todo).pack(pady=5, padx=5, fill="x")
-
-btn_actualizar = ttk.Button(panel_botones, text="Actualizar archivos TEMP", command=actualizar_archivos)
-btn_actualizar.pack(pady=5, padx=5, fill="x")
-
-ttk.Button(panel_botones, text="¿Qué es la carpeta %TEMP%?", command=mostrar_info_temp).pack(pady=5, padx=5, fill="x")
-ttk.Button(panel_botones, text="Manual de la Aplicación", command=mostrar_manual).pack(pady=5, padx=5, fill="x")
-
-# --- Controles de Ordenamiento ---
-ttk.Label(panel_botones, text="Ordenar por:", background="#f0f0f0", font=("Arial", 10, "bold")).pack(pady=(10, 2), padx=5, fill="x")
-
-combo_orden = ttk.Combobox(panel_botones, values=list(opciones_orden_map.keys()), state="readonly")
-combo_orden.set("Peso (mayor a menor)") # Opción por defecto.
-combo_orden.pack(pady=2, padx=5, fill="x")
-combo_orden.bind("<<ComboboxSelected>>", cambio_orden) # Asocia la función 'cambio_orden' al evento de selección.
-
-# --- Barra de Progreso (para el escaneo) ---
-progress_var = tk.IntVar()
-progress_bar = ttk.Progressbar(panel_botones, variable=progress_var, maximum=100, mode="determinate")
-# Esta barra no se muestra inicialmente, la función 'actualizar_archivos' la hace visible.
-
-
-# --- INICIO DE LA APLICACIÓN ---
-
-# Llama a las funciones una vez al inicio para cargar la información inicial.
-actualizar_barra_almacenamiento()
-actualizar_archivos()
-
-# Inicia el bucle principal de la aplicación. La ventana permanecerá abierta y receptiva a eventos.
-ventana.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    # Carpetas a escanear (si el archivo de raíces no existe o no es válido, se usan las carpetas habituales).
+    try:
+        configuracion_raices = cargar_raices(temp_path=temp_path)
+    except (ValueError, OSError):
+        configuracion_raices = ConfiguracionRaices(raices_por_defecto(temp_path), {})
+    if not configuracion_raices.raices:
+        configuracion_raices = ConfiguracionRaices([temp_path], configuracion_raices.hilos)
+
+    # Cuarentena de cada volumen (su carpeta no se crea hasta que se usa; se buscan los lotes de la sesión anterior).
+    preparar_cuarentenas(agrupar_por_volumen(configuracion_raices.raices, configuracion_raices.hilos))
+
+    # Creación de la ventana principal.
+    ventana = tk.Tk()
+    ventana.title("VoidCleanTempo")
+    ventana.geometry("1080x720")
+
+    # --- Estilos ---
+    # Creación y configuración de estilos para los widgets, como la barra de progreso.
+    style = ttk.Style()
+    style.theme_use("default") # Se puede cambiar por 'clam', 'alt', etc.
+    style.configure("Verde.Horizontal.TProgressbar", foreground="green", background="green")
+    style.configure("Naranja.Horizontal.TProgressbar", foreground="orange", background="orange")
+    style.configure("Rojo.Horizontal.TProgressbar", foreground="red", background="red")
+
+    # --- Header (Cabecera) ---
+    # Frame superior que contiene información general y botones de acción.
+    header = tk.Frame(ventana, bg="#d0e8ff", height=60)
+    header.pack(fill="x", padx=10, pady=(0, 0))
+
+    label_total = tk.Label(header, text="Archivos temporales encontrados: 0", bg="#d0e8ff", font=("Arial", 12, "bold"))
+    label_total.pack(side="left", padx=10, pady=5)
+
+    # Una etiqueta y una barra de almacenamiento por volumen escaneado (ver 'preparar_volumenes').
+    frame_volumenes = tk.Frame(header, bg="#d0e8ff")
+    frame_volumenes.pack(side="top", padx=10, pady=(5, 0), anchor="w")
+
+    # Resumen del espacio recuperable, junto a la barra de almacenamiento, con acceso al detalle.
+    frame_analisis = tk.Frame(header, bg="#d0e8ff")
+    frame_analisis.pack(side="top", padx=10, pady=(2, 5), anchor="w")
+    label_recuperable = tk.Label(frame_analisis, text="Recuperable: --", bg="#d0e8ff", font=("Arial", 10))
+    label_recuperable.pack(side="left")
+    ttk.Button(frame_analisis, text="Ver análisis", command=mostrar_analisis).pack(side="left", padx=(8, 0))
+
+    # Estilo para los botones principales para un aspecto uniforme.
+    estilo_botones = {"bg": "#b2d8f7", "fg": "black", "activebackground": "#91c8f6", "relief": "raised", "bd": 1, "font": ("Arial", 10, "bold")}
+
+    # Botones en la cabecera, alineados a la derecha.
+    tk.Button(header, text="Salir del programa", command=salir, **estilo_botones).pack(side="right", padx=5, pady=10)
+    tk.Button(header, text="Historial de eliminaciones", command=mostrar_historial, **estilo_botones).pack(side="right", padx=5, pady=10)
+    tk.Button(header, text="Exportar todos a Excel", command=exportar_todos_a_excel, **estilo_botones).pack(side="right", padx=5, pady=10)
+
+    # --- Contenedor Principal ---
+    # Frame que aloja la lista de archivos y el panel de botones lateral.
+    main_frame = tk.Frame(ventana)
+    main_frame.pack(fill="both", expand=True)
+
+    # --- Zona de la Lista de Archivos (virtualizada) ---
+    # Solo se crean las filas que caben en pantalla; al desplazarse se reutilizan con otros archivos.
+    # Un clic sobre una fila la marca o desmarca para eliminar.
+    lista_archivos = ListaVirtual(
+        main_frame,
+        columnas=[("Nombre", 320), ("Descripción", 300), ("Estado", 70), ("Peso", 80), ("Fecha de creación", 120)],
+        formatear_fila=formatear_fila_archivo,
+        seleccion=seleccion,
+        clave=lambda fila: fila, # Los elementos de la lista ya son números de fila.
+        etiqueta_fila=lambda fila: "en_uso" if detector_uso.en_uso(archivos_encontrados.ruta(fila)) else "libre",
+    )
+    lista_archivos.arbol.tag_configure("libre", foreground="green")
+    lista_archivos.arbol.tag_configure("en_uso", foreground="red")
+    lista_archivos.grid(row=1, column=0, sticky="nsew") # Se usa grid para el layout principal.
+
+    # --- Cuadro de búsqueda ---
+    # Filtra la lista mientras se escribe: texto, patrones (*.log), extensiones (.tmp), peso (>10M) y antigüedad (>7d).
+    frame_busqueda = tk.Frame(main_frame)
+    frame_busqueda.grid(row=0, column=0, sticky="ew", padx=5, pady=(5, 2))
+    ttk.Label(frame_busqueda, text="Buscar:").pack(side="left")
+    var_busqueda = tk.StringVar()
+    var_busqueda.trace_add("write", al_escribir_busqueda)
+    ttk.Entry(frame_busqueda, textvariable=var_busqueda).pack(side="left", fill="x", expand=True, padx=5)
+    label_busqueda = ttk.Label(frame_busqueda, text="", width=28)
+    label_busqueda.pack(side="left")
+    ttk.Label(frame_busqueda, text="Ej.: chrome  *.log  .tmp  >10M  <1G  >7d", foreground="gray").pack(side="left", padx=(5, 0))
+
+    # Configuración del grid para que la zona de la lista se expanda.
+    main_frame.grid_rowconfigure(1, weight=1)
+    main_frame.grid_columnconfigure(0, weight=1)
+
+    # --- Panel de Botones Lateral ---
+    # Panel a la derecha con los controles principales.
+    panel_botones = tk.Frame(main_frame, bg="#f0f0f0", width=200)
+    panel_botones.grid(row=0, column=1, rowspan=2, sticky="ns") # Ocupa todo el alto, junto a la búsqueda y la lista.
+
+    btn_eliminar = ttk.Button(panel_botones, text="Eliminar seleccionados", command=eliminar_archivos)
+    btn_eliminar.pack(pady=5, padx=5, fill="x")
+
+    # Modo cuarentena: los archivos se mueven y se borran más tarde, así que la eliminación se puede deshacer.
+    var_cuarentena = tk.BooleanVar(value=False)
+    ttk.Checkbutton(panel_botones, text="Modo cuarentena (permite deshacer)", variable=var_cuarentena,
+                    state="normal" if cuarentenas else "disabled").pack(pady=(0, 2), padx=5, anchor="w")
+    btn_deshacer = ttk.Button(panel_botones, text="Deshacer última eliminación", command=deshacer_eliminacion, state="disabled")
+    btn_deshacer.pack(pady=5, padx=5, fill="x")
+
+    ttk.Button(panel_botones, text="Aplicar políticas de limpieza", command=aplicar_politicas).pack(pady=5, padx=5, fill="x")
+
+    ttk.Button(panel_botones, text="Buscar duplicados", command=buscar_duplicados_en_lista).pack(pady=5, padx=5, fill="x")
+    var_solo_duplicados = tk.BooleanVar(value=False)
+    ttk.Checkbutton(panel_botones, text="Mostrar solo duplicados", variable=var_solo_duplicados,
+                    command=lambda: actualizar_vista(desde_inicio=True)).pack(pady=(0, 2), padx=5, anchor="w")
+
+    ttk.Button(panel_botones, text="Marcar todo", command=marcar_todo).pack(pady=5, padx=5, fill="x")
+    ttk.Button(panel_botones, text="Desmarcar todo", command=desmarcar_todo).pack(pady=5, padx=5, fill="x")
+
+    btn_actualizar = ttk.Button(panel_botones, text="Actualizar archivos TEMP", command=actualizar_archivos)
+    btn_actualizar.pack(pady=5, padx=5, fill="x")
+    ttk.Button(panel_botones, text="Carpetas a escanear...", command=configurar_raices).pack(pady=5, padx=5, fill="x")
+
+    ttk.Button(panel_botones, text="¿Qué es la carpeta %TEMP%?", command=mostrar_info_temp).pack(pady=5, padx=5, fill="x")
+    ttk.Button(panel_botones, text="Manual de la Aplicación", command=mostrar_manual).pack(pady=5, padx=5, fill="x")
+
+    # --- Controles de Ordenamiento ---
+    ttk.Label(panel_botones, text="Ordenar por:", background="#f0f0f0", font=("Arial", 10, "bold")).pack(pady=(10, 2), padx=5, fill="x")
+
+    combo_orden = ttk.Combobox(panel_botones, values=list(opciones_orden_map.keys()), state="readonly")
+    combo_orden.set("Peso (mayor a menor)") # Opción por defecto.
+    combo_orden.pack(pady=2, padx=5, fill="x")
+    combo_orden.bind("<<ComboboxSelected>>", cambio_orden) # Asocia la función 'cambio_orden' al evento de selección.
+
+    # --- Opciones de Escaneo ---
+    # Permite incluir las subcarpetas de TEMP (instaladores, cachés...) con un límite de profundidad.
+    var_recursivo = tk.BooleanVar(value=False)
+    ttk.Checkbutton(panel_botones, text="Incluir subcarpetas", variable=var_recursivo).pack(pady=(10, 2), padx=5, anchor="w")
+
+    frame_profundidad = tk.Frame(panel_botones, bg="#f0f0f0")
+    frame_profundidad.pack(pady=2, padx=5, fill="x")
+    ttk.Label(frame_profundidad, text="Profundidad máx.:", background="#f0f0f0").pack(side="left")
+    var_profundidad = tk.IntVar(value=10)
+    ttk.Spinbox(frame_profundidad, from_=1, to=64, width=5, textvariable=var_profundidad).pack(side="left", padx=5)
+
+    # Modo vigilancia: la lista sigue los cambios de TEMP en vivo.
+    var_vigilar = tk.BooleanVar(value=False)
+    ttk.Checkbutton(panel_botones, text="Vigilar cambios en vivo", variable=var_vigilar, command=alternar_vigilancia).pack(pady=(5, 2), padx=5, anchor="w")
+
+    # --- Barra de Progreso (para el escaneo) ---
+    progress_var = tk.IntVar()
+    progress_bar = ttk.Progressbar(panel_botones, variable=progress_var, maximum=100, mode="indeterminate")
+    # Esta barra no se muestra inicialmente, la función 'actualizar_archivos' la hace visible.
+
+
+    # --- INICIO DE LA APLICACIÓN ---
+
+    # Llama a las funciones una vez al inicio para cargar la información inicial.
+    preparar_volumenes()
+    muestrear_almacenamiento()
+    actualizar_archivos()
+    purgar_cuarentena_anterior()
+
+    # Medición del arranque (benchmarks/bench_arranque.py): si se indica un archivo en esta variable de entorno,
+    # se anota en él el momento en que la ventana aparece por primera vez y el programa termina.
+    marca_arranque = os.environ.get("VOIDCLEANTEMPO_MARCA_ARRANQUE")
+    if marca_arranque:
+        def anotar_arranque(event=None):
+            with open(marca_arranque, "w", encoding="utf-8") as f:
+                f.write(repr(time.time()))
+            os._exit(0) # Sale sin esperar al hilo de escaneo.
+        ventana.bind("<Map>", anotar_arranque)
+
+    # Inicia el bucle principal de la aplicación. La ventana permanecerá abierta y receptiva a eventos.
+    ventana.mainloop()
\ No newline at end of file
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Mide el arranque de VoidCleanTempo: tiempo hasta que aparece la ventana y tiempo de importación por módulo.
+
+Se mide el script (python VoidCleanTempo.py) y, si existe, el ejecutable generado con PyInstaller
+(dist/voidcleantempo o dist/voidcleantempo.exe, o el indicado con --exe). La aplicación anota el momento en
+que la ventana se muestra en el archivo indicado en VOIDCLEANTEMPO_MARCA_ARRANQUE y termina enseguida.
+
+Los tiempos de importación por módulo se obtienen con "python -X importtime", así que solo están
+disponibles para el script; del ejecutable se mide el tiempo hasta la ventana.
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones 5] [--exe RUTA] [--json resultados.json]
+                                        [--max-segundos 2.5]
+
+Con --max-segundos el script termina con código 1 si alguna mediana supera ese límite (para detectar regresiones).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(RAIZ, "VoidCleanTempo.py")
+
+
+def medir_hasta_ventana(comando, extra_env=None, timeout=60):
+    """
+    Ejecuta 'comando' y devuelve (segundos hasta que se mostró la ventana, salida de errores).
+    """
+    descriptor, marca = tempfile.mkstemp(prefix="vct_arranque_")
+    os.close(descriptor)
+    os.remove(marca)
+    env = dict(os.environ, VOIDCLEANTEMPO_MARCA_ARRANQUE=marca, **(extra_env or {}))
+    try:
+        inicio = time.time()
+        proceso = subprocess.run(comando, cwd=RAIZ, env=env, capture_output=True, text=True, timeout=timeout)
+        if not os.path.exists(marca):
+            raise RuntimeError(f"La ventana no llegó a mostrarse:\n{proceso.stderr[-2000:]}")
+        with open(marca, encoding="utf-8") as f:
+            return float(f.read()) - inicio, proceso.stderr
+    finally:
+        if os.path.exists(marca):
+            os.remove(marca)
+
+
+def analizar_importtime(stderr):
+    """
+    Convierte la salida de "-X importtime" en {módulo: (propio_us, acumulado_us)}, solo para los módulos
+    importados directamente (los anidados aparecen con más sangría y ya cuentan en el acumulado de su padre).
+    """
+    tiempos = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, modulo = linea[len("import time:"):].split("|", 2)
+        if modulo.startswith("  "):
+            continue  # Importación anidada.
+        tiempos[modulo.strip()] = (int(propio), int(acumulado))
+    return tiempos
+
+
+def medir(nombre, comando, repeticiones, extra_env=None):
+    """Repite la medición y devuelve un diccionario con la mediana, el mínimo y las importaciones más lentas."""
+    tiempos = []
+    importaciones = {}
+    for _ in range(repeticiones):
+        segundos, stderr = medir_hasta_ventana(comando, extra_env)
+        tiempos.append(segundos)
+        importaciones = analizar_importtime(stderr) or importaciones
+    # Módulos ordenados por tiempo acumulado (lo que cuesta cada "import" del programa).
+    principales = sorted(((m, t[1]) for m, t in importaciones.items()), key=lambda x: x[1], reverse=True)
+    resultado = {
+        "nombre": nombre,
+        "mediana_s": statistics.median(tiempos),
+        "minimo_s": min(tiempos),
+        "tiempos_s": tiempos,
+        "importaciones_us": dict(principales[:25]),
+    }
+    print(f"{nombre}: mediana {resultado['mediana_s']:.3f} s, mínimo {resultado['minimo_s']:.3f} s")
+    for modulo, microsegundos in principales[:10]:
+        print(f"    {microsegundos / 1000:8.1f} ms  {modulo}")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--exe", help="ruta del ejecutable congelado (por defecto dist/voidcleantempo[.exe])")
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    parser.add_argument("--max-segundos", type=float, help="límite para la mediana del tiempo hasta la ventana")
+    args = parser.parse_args()
+
+    resultados = [medir("script", [sys.executable, "-X", "importtime", SCRIPT], args.repeticiones)]
+
+    exe = args.exe
+    if exe is None:
+        for candidato in ("voidcleantempo.exe", "voidcleantempo"):
+            ruta = os.path.join(RAIZ, "dist", candidato)
+            if os.path.isfile(ruta):
+                exe = ruta
+                break
+    if exe:
+        resultados.append(medir("ejecutable", [exe], args.repeticiones))
+    else:
+        print("No se encontró el ejecutable de PyInstaller (dist/voidcleantempo); solo se midió el script.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    if args.max_segundos is not None:
+        lentos = [r["nombre"] for r in resultados if r["mediana_s"] > args.max_segundos]
+        if lentos:
+            print(f"Regresión: {', '.join(lentos)} supera(n) {args.max_segundos} s")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
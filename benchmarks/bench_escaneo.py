@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Compara el bucle original (os.listdir + isfile + getctime x2 + getsize + rename por archivo)
+con el motor de escaneo basado en os.scandir.
+
+Uso:
+    python benchmarks/bench_escaneo.py [cantidad_de_archivos] [carpeta]
+
+Si no se indica carpeta, se crea una carpeta temporal con archivos sintéticos que se borra al terminar.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+# Permite ejecutar el script desde la raíz del repositorio sin instalar nada.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidclean.escaneo import escanear_directorio
+
+
+def bucle_original(ruta_temp):
+    """
+    Reproduce el recorrido que hacía cargar_archivos_con_progreso antes del motor de escaneo.
+    """
+    archivos = []
+    for archivo in os.listdir(ruta_temp):
+        ruta = os.path.join(ruta_temp, archivo)
+        try:
+            if os.path.isfile(ruta):
+                try:
+                    os.rename(ruta, ruta)  # Lo que hacía is_file_locked.
+                    estado = "Libre"
+                except OSError:
+                    estado = "En uso"
+                archivos.append({
+                    "ruta": ruta,
+                    "nombre": archivo,
+                    "estado": estado,
+                    "fecha": datetime.fromtimestamp(os.path.getctime(ruta)).strftime("%d-%m-%Y %H:%M"),
+                    "size": os.path.getsize(ruta),
+                    "ctime": os.path.getctime(ruta),
+                })
+        except OSError:
+            pass
+    return len(archivos)
+
+
+def bucle_scandir(ruta_temp):
+    """
+    Recorre la carpeta con el motor de escaneo (la comprobación de bloqueo no forma parte del motor).
+    """
+    return sum(1 for _ in escanear_directorio(ruta_temp))
+
+
+def crear_archivos(carpeta, cantidad):
+    """
+    Crea 'cantidad' archivos pequeños con extensiones variadas en 'carpeta'.
+    """
+    extensiones = [".tmp", ".log", ".dmp", ".cache", ".json", ".txt", ".zip", ""]
+    for i in range(cantidad):
+        with open(os.path.join(carpeta, f"archivo_{i}{extensiones[i % len(extensiones)]}"), "wb") as f:
+            f.write(b"x" * (i % 4096))
+
+
+def medir(funcion, ruta, repeticiones=3):
+    """
+    Devuelve el mejor tiempo (en segundos) de varias ejecuciones y el número de archivos encontrados.
+    """
+    mejor = None
+    encontrados = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        encontrados = funcion(ruta)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, encontrados
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    carpeta = sys.argv[2] if len(sys.argv) > 2 else None
+    temporal = carpeta is None
+
+    if temporal:
+        carpeta = tempfile.mkdtemp(prefix="vct_bench_")
+        print(f"Creando {cantidad} archivos en {carpeta} ...")
+        crear_archivos(carpeta, cantidad)
+
+    try:
+        t_original, n_original = medir(bucle_original, carpeta)
+        t_scandir, n_scandir = medir(bucle_scandir, carpeta)
+        print(f"listdir + stat por archivo: {t_original:.3f} s ({n_original} archivos)")
+        print(f"motor scandir:              {t_scandir:.3f} s ({n_scandir} archivos)")
+        if t_scandir:
+            print(f"Aceleración: x{t_original / t_scandir:.1f}")
+    finally:
+        if temporal:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Banco de pruebas con carpetas TEMP sintéticas de 10.000, 100.000 y 1.000.000 de archivos.
+
+Genera en una carpeta de trabajo árboles reproducibles (misma semilla, mismos archivos) con una mezcla realista
+de extensiones, pesos y carpetas (instaladores, cachés de navegador, volcados, registros...) y mide los caminos
+sin interfaz que usa la aplicación:
+
+    escaneo      motor de escaneo por volúmenes, conversión a columnas y añadido al conjunto de resultados
+    índice       actualización del índice SQLite en frío (vacío) y en caliente (sin cambios) y su lectura
+    orden        cada una de las claves de orden de la lista
+    análisis     espacio recuperable (si NumPy está instalado)
+    exportación  CSV, JSON Lines comprimido y Excel (si openpyxl está instalado), con el estado de cada archivo
+    eliminación  mover a la cuarentena y deshacer, y borrado directo en paralelo de una muestra del 10 %
+
+Cada fase se mide con voidclean.metricas: tiempo, elementos y memoria máxima del proceso (RSS pico; como los
+tamaños se ejecutan de menor a mayor, el pico de cada uno incluye a los anteriores). Los archivos tienen su peso
+real pero son dispersos (truncate), así que casi no ocupan disco; con --sin-peso se crean vacíos (recomendable
+en Windows, donde NTFS reserva el espacio). Los árboles se reutilizan entre ejecuciones con --carpeta y --conservar,
+y los archivos borrados por la prueba se vuelven a crear al terminar.
+
+Uso:
+    python benchmarks/bench_temp_sintetico.py [--tamanos 10000,100000,1000000] [--carpeta DIR] [--conservar]
+                                              [--formatos csv,jsonl.gz,xlsx] [--semilla 1] [--sin-peso]
+                                              [--json resultados.json] [--comparar anterior.json]
+                                              [--max-regresion 1.5] [--perfil CARPETA]
+
+Con --comparar se muestra cada fase frente a un resultado anterior y, con --max-regresion, el script termina con
+código 1 si alguna fase de más de 50 ms es más lenta que ese factor (para detectar regresiones).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+
+# Permite ejecutar el script desde la raíz del repositorio sin instalar nada.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidclean.escaneo import escanear_recursivo
+from voidclean.indice import IndiceEscaneo
+from voidclean.raices import agrupar_por_volumen, escanear_volumenes
+from voidclean.resultados import ConjuntoResultados, CLAVES_ORDEN
+from voidclean.exportacion import exportar_filas
+from voidclean.eliminacion import eliminar_en_paralelo
+from voidclean.cuarentena import Cuarentena, carpeta_cuarentena_para
+from voidclean.detector_uso import DetectorUso
+from voidclean.metricas import Metricas
+
+
+TAMANOS = (10000, 100000, 1000000)
+FORMATOS = ("csv", "jsonl.gz", "xlsx")
+COLUMNAS = ["Nombre", "Descripción", "Estado", "Peso (bytes)", "Fecha de creación", "Ruta"]
+PARAMETROS = ".bench_parametros.json"  # Anota con qué parámetros se generó un árbol, para reutilizarlo.
+VERSION_ARBOL = 1  # Cambiarla si cambia la forma de generar los árboles (obliga a regenerarlos).
+MINIMO_COMPARABLE = 0.05  # Las fases más cortas (en segundos) no cuentan como regresión: el ruido pesa demasiado.
+
+# Mezcla de archivos de una carpeta TEMP: (extensión, peso relativo, peso típico en bytes).
+# El peso de cada archivo sigue una distribución log-normal alrededor del típico: muchos pequeños y pocos enormes.
+MEZCLA = [
+    (".tmp", 30, 8 * 1024),
+    (".log", 14, 48 * 1024),
+    ("", 8, 2 * 1024),
+    (".dat", 6, 16 * 1024),
+    (".cache", 6, 24 * 1024),
+    (".json", 5, 4 * 1024),
+    (".txt", 4, 3 * 1024),
+    (".etl", 4, 1024 * 1024),
+    (".dmp", 2, 64 * 1024 * 1024),
+    (".cab", 3, 8 * 1024 * 1024),
+    (".msi", 1, 40 * 1024 * 1024),
+    (".zip", 3, 2 * 1024 * 1024),
+    (".png", 6, 40 * 1024),
+    (".js", 4, 20 * 1024),
+    (".bak", 2, 512 * 1024),
+    (".old", 2, 128 * 1024),
+]
+PESO_MAXIMO = 2 * 1024 ** 3
+
+# Tipos de carpeta: (prefijo del nombre, peso relativo, archivos por carpeta (mínimo, máximo), profundidad máxima).
+CARPETAS = [
+    ("{guid}", 40, (5, 120), 2),  # Restos de instaladores.
+    ("chrome_cache_{n}", 20, (200, 2000), 3),  # Cachés de navegador, anidadas y con muchos archivos.
+    ("_MEI{n}", 15, (20, 400), 2),  # Carpetas de ejecutables empaquetados.
+    ("Diagnostics_{n}", 10, (10, 200), 1),
+    ("npm-{n}", 15, (50, 800), 4),
+]
+PROPORCION_RAIZ = 0.3  # Parte de los archivos que quedan directamente en la carpeta TEMP.
+
+
+def _nombre_carpeta(aleatorio, plantilla):
+    guid = "{%08X-%04X-%04X-%04X-%012X}" % tuple(aleatorio.getrandbits(b) for b in (32, 16, 16, 16, 48))
+    return plantilla.format(guid=guid, n=aleatorio.getrandbits(24))
+
+
+def plan_arbol(cantidad, semilla):
+    """
+    Devuelve (de forma determinista) la lista de (ruta relativa, peso) de un árbol de 'cantidad' archivos.
+    """
+    aleatorio = random.Random(semilla)
+    extensiones = [e for e, _, _ in MEZCLA]
+    pesos_ext = [p for _, p, _ in MEZCLA]
+    tipicos = {e: t for e, _, t in MEZCLA}
+    pesos_carpeta = [p for _, p, _, _ in CARPETAS]
+
+    archivos = []
+
+    def agregar(carpeta, n):
+        for ext in aleatorio.choices(extensiones, pesos_ext, k=n):
+            peso = min(PESO_MAXIMO, int(tipicos[ext] * aleatorio.lognormvariate(0, 1.2)))
+            nombre = f"{aleatorio.choice(('tmp', 'log', 'data', 'chunk', 'setup', 'f'))}{aleatorio.getrandbits(32):08x}{ext}"
+            archivos.append((os.path.join(carpeta, nombre) if carpeta else nombre, peso))
+
+    agregar("", int(cantidad * PROPORCION_RAIZ))
+    while len(archivos) < cantidad:
+        plantilla, _, (minimo, maximo), profundidad = aleatorio.choices(CARPETAS, pesos_carpeta)[0]
+        carpeta = _nombre_carpeta(aleatorio, plantilla)
+        for _ in range(aleatorio.randint(0, profundidad - 1)):
+            carpeta = os.path.join(carpeta, f"{aleatorio.getrandbits(8):02x}")
+        agregar(carpeta, min(cantidad - len(archivos), aleatorio.randint(minimo, maximo)))
+    return archivos
+
+
+def crear_archivo(ruta, peso, sin_peso):
+    """Crea un archivo de 'peso' bytes sin escribir datos (disperso), o vacío con 'sin_peso'."""
+    with open(ruta, "wb") as f:
+        if peso and not sin_peso:
+            f.truncate(peso)
+
+
+def preparar_arbol(carpeta, cantidad, semilla, sin_peso):
+    """
+    Crea el árbol de 'cantidad' archivos en 'carpeta', salvo si ya existe uno generado con los mismos parámetros.
+    Devuelve True si lo tuvo que crear.
+    """
+    parametros = {"version": VERSION_ARBOL, "cantidad": cantidad, "semilla": semilla, "sin_peso": sin_peso}
+    marca = os.path.join(carpeta, PARAMETROS)
+    try:
+        with open(marca, encoding="utf-8") as f:
+            if json.load(f) == parametros:
+                return False
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(carpeta, ignore_errors=True)
+    creadas = set()
+    for relativa, peso in plan_arbol(cantidad, semilla):
+        ruta = os.path.join(carpeta, relativa)
+        padre = os.path.dirname(ruta)
+        if padre not in creadas:
+            os.makedirs(padre, exist_ok=True)
+            creadas.add(padre)
+        crear_archivo(ruta, peso, sin_peso)
+    with open(marca, "w", encoding="utf-8") as f:
+        json.dump(parametros, f)
+    return True
+
+
+def medir_tamano(cantidad, args):
+    """Genera (o reutiliza) el árbol de 'cantidad' archivos, ejecuta todas las fases y devuelve el resumen de métricas."""
+    trabajo = os.path.join(args.carpeta, f"trabajo_{cantidad}")
+    arbol = os.path.join(args.carpeta, f"temp_{cantidad}")
+    shutil.rmtree(trabajo, ignore_errors=True)
+    os.makedirs(trabajo)
+    metricas = Metricas(f"bench_{cantidad}", perfil=args.perfil, cantidad=cantidad, semilla=args.semilla)
+
+    with metricas.fase("generar_arbol", cantidad):
+        metricas.datos["arbol_nuevo"] = preparar_arbol(arbol, cantidad, args.semilla, args.sin_peso)
+    excluir = (os.path.join(arbol, PARAMETROS),)
+
+    with metricas.perfilar():
+        # --- Escaneo: el mismo camino que la interfaz (un hilo por volumen, lotes por raíz, columnas) ---
+        conjunto = ConjuntoResultados()
+        volumenes = agrupar_por_volumen([arbol])
+        errores = []
+
+        def escanear(volumen):
+            for raiz in volumen.raices:
+                for registro in escanear_recursivo(raiz, hilos=volumen.hilos, errores=errores, excluir=excluir):
+                    yield raiz, registro
+
+        inicio = time.perf_counter()
+        with metricas.fase("escaneo_total", cantidad):
+            espera = time.perf_counter()
+            for raiz, lote in escanear_volumenes(volumenes, escanear):
+                metricas.anotar("leer_disco", time.perf_counter() - espera, len(lote))
+                with metricas.fase("preparar_columnas", len(lote)):
+                    bloque = conjunto.preparar(lote, raiz)
+                with metricas.fase("agregar_columnas", len(lote)):
+                    conjunto.agregar(bloque)
+                espera = time.perf_counter()
+        metricas.datos["escaneo_archivos_por_segundo"] = round(len(conjunto) / (time.perf_counter() - inicio))
+        if len(conjunto) != cantidad or errores:
+            raise RuntimeError(f"El escaneo encontró {len(conjunto)} de {cantidad} archivos ({len(errores)} errores).")
+
+        # --- Índice incremental en SQLite ---
+        with IndiceEscaneo(os.path.join(trabajo, "indice.sqlite3")) as indice:
+            with metricas.fase("indice_frio", cantidad):
+                indice.actualizar(arbol, excluir=excluir)
+            with metricas.fase("indice_caliente", cantidad):
+                indice.actualizar(arbol, excluir=excluir)
+            with metricas.fase("leer_indice", cantidad):
+                sum(1 for _ in indice.registros(arbol))
+
+        # --- Orden ---
+        for clave in CLAVES_ORDEN:
+            with metricas.fase(f"ordenar_{clave}", cantidad):
+                conjunto.ordenar(clave)
+
+        # --- Análisis del espacio recuperable ---
+        try:
+            from voidclean.analitica import analizar
+            with metricas.fase("analisis", cantidad):
+                analizar(conjunto)
+        except ImportError:
+            pass  # Sin NumPy.
+
+        # --- Exportación, con las mismas filas que "Exportar todos a Excel" ---
+        detector = DetectorUso()
+        with metricas.fase("archivos_en_uso"):
+            detector.actualizar_ahora()
+
+        def filas():
+            for fila in conjunto.filas:
+                ruta = conjunto.ruta(fila)
+                yield (conjunto.nombre(fila), conjunto.descripcion(fila), "En uso" if detector.en_uso(ruta) else "Libre",
+                       conjunto.size[fila], conjunto.fecha(fila), ruta)
+
+        for formato in args.formatos:
+            if formato == "xlsx":
+                try:
+                    import openpyxl  # noqa: F401 (solo se comprueba que esté instalado)
+                except ImportError:
+                    continue
+            destino = os.path.join(trabajo, f"exportacion.{formato}")
+            with metricas.fase(f"exportar_{formato}", cantidad):
+                exportar_filas(destino, COLUMNAS, metricas.medir_iteracion(f"generar_filas_{formato}", filas()), formato)
+            metricas.datos[f"bytes_{formato}"] = os.path.getsize(destino)
+            os.remove(destino)
+
+        # --- Eliminación de una muestra: cuarentena (y deshacer) y borrado directo ---
+        muestra = [fila for i, fila in enumerate(conjunto.filas) if i % 10 == 0]
+        rutas = [conjunto.ruta(fila) for fila in muestra]
+        cuarentena = Cuarentena(carpeta_cuarentena_para(arbol))
+        with metricas.fase("mover_a_cuarentena", len(rutas)):
+            lote, resultado = cuarentena.poner(rutas)
+        with metricas.fase("deshacer_cuarentena", len(resultado.eliminados)):
+            restauradas, _ = cuarentena.deshacer(lote)
+        if len(restauradas) != len(rutas):
+            raise RuntimeError(f"Se restauraron {len(restauradas)} de {len(rutas)} archivos de la cuarentena.")
+        with metricas.fase("borrar", len(rutas)):
+            resultado = eliminar_en_paralelo(rutas)
+        with metricas.fase("quitar_filas", len(muestra)):
+            conjunto.quitar_filas(muestra)
+
+    # Vuelve a crear lo borrado para poder reutilizar el árbol (no se mide).
+    for fila in muestra:
+        crear_archivo(conjunto.ruta(fila), conjunto.size[fila], args.sin_peso)
+    shutil.rmtree(cuarentena.carpeta, ignore_errors=True)
+    shutil.rmtree(trabajo, ignore_errors=True)
+
+    metricas.terminar(cantidad)
+    return metricas.resumen()
+
+
+def mostrar(resumen, anterior=None):
+    """Imprime las fases de un tamaño y, si hay un resultado anterior, cuánto cambió cada una."""
+    print(f"\n=== {resumen['elementos']} archivos: {resumen['segundos']:.2f} s en total,"
+          f" memoria pico {resumen['memoria_pico'] / 1024 ** 2:.0f} MB ===")
+    print(f"{'fase':28} {'segundos':>10} {'elementos':>10} {'elem/s':>12} {'pico MB':>9}" + ("  vs anterior" if anterior else ""))
+    for nombre, f in resumen["fases"].items():
+        ritmo = f"{f['elementos'] / f['segundos']:,.0f}" if f["elementos"] and f["segundos"] else "-"
+        linea = f"{nombre:28} {f['segundos']:10.3f} {f['elementos']:10} {ritmo:>12} {f['memoria_pico'] / 1024 ** 2:9.0f}"
+        previa = (anterior or {}).get("fases", {}).get(nombre)
+        if previa and previa["segundos"]:
+            linea += f"  x{f['segundos'] / previa['segundos']:.2f}"
+        print(linea)
+
+
+def regresiones(resultados, anteriores, factor):
+    """Devuelve las fases (tamaño, fase, factor) más lentas que 'factor' veces el resultado anterior."""
+    lentas = []
+    for cantidad, resumen in resultados.items():
+        previas = anteriores.get(cantidad, {}).get("fases", {})
+        for nombre, f in resumen["fases"].items():
+            previa = previas.get(nombre)
+            if nombre == "generar_arbol" or not previa or previa["segundos"] < MINIMO_COMPARABLE:
+                continue
+            if f["segundos"] > previa["segundos"] * factor:
+                lentas.append((cantidad, nombre, f["segundos"] / previa["segundos"]))
+    return lentas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas con carpetas TEMP sintéticas.")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS)),
+                        help="cantidades de archivos separadas por comas (por defecto, 10000,100000,1000000)")
+    parser.add_argument("--carpeta", help="carpeta de trabajo donde se generan los árboles (por defecto, una temporal)")
+    parser.add_argument("--conservar", action="store_true", help="no borrar la carpeta de trabajo al terminar")
+    parser.add_argument("--formatos", default=",".join(FORMATOS), help="formatos de exportación que se miden")
+    parser.add_argument("--semilla", type=int, default=1, help="semilla de la generación de los árboles")
+    parser.add_argument("--sin-peso", action="store_true", help="crear los archivos vacíos (sin archivos dispersos)")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="resultados anteriores (de --json) con los que comparar")
+    parser.add_argument("--max-regresion", type=float, help="terminar con código 1 si una fase es más lenta que este factor")
+    parser.add_argument("--perfil", metavar="CARPETA", help="guardar un perfil de cProfile de cada tamaño en esta carpeta")
+    args = parser.parse_args()
+    args.formatos = [f.strip() for f in args.formatos.split(",") if f.strip()]
+
+    temporal = args.carpeta is None
+    if temporal:
+        args.carpeta = tempfile.mkdtemp(prefix="vct_bench_sintetico_")
+    os.makedirs(args.carpeta, exist_ok=True)
+
+    anteriores = {}
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anteriores = json.load(f)["resultados"]
+
+    resultados = {}
+    try:
+        for cantidad in sorted(int(t) for t in args.tamanos.split(",")):
+            print(f"Midiendo {cantidad} archivos en {args.carpeta} ...", flush=True)
+            resultados[str(cantidad)] = medir_tamano(cantidad, args)
+            mostrar(resultados[str(cantidad)], anteriores.get(str(cantidad)))
+    finally:
+        if temporal and not args.conservar:
+            shutil.rmtree(args.carpeta, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "plataforma": platform.platform(), "resultados": resultados},
+                      f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.json}")
+
+    if args.max_regresion is not None and anteriores:
+        lentas = regresiones(resultados, anteriores, args.max_regresion)
+        for cantidad, nombre, veces in lentas:
+            print(f"REGRESIÓN: {nombre} con {cantidad} archivos es x{veces:.2f} más lenta")
+        if lentas:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Lista virtualizada de archivos para Tkinter.
+
+Solo existen tantas filas de ttk.Treeview como caben en pantalla. Al desplazarse, esas mismas filas
+se reutilizan mostrando otros datos, así que crear la lista cuesta lo mismo con 100 que con 1.000.000 de archivos.
+"""
+
+from tkinter import ttk
+
+
+class ListaVirtual(ttk.Frame):
+    """
+    Tabla con desplazamiento que dibuja solo las filas visibles de una lista de datos.
+
+    - columnas: lista de tuplas (título, ancho) de las columnas de datos.
+    - formatear_fila: función que recibe un elemento de la lista y devuelve la tupla de textos a mostrar.
+    - seleccion: objeto Seleccion donde se guarda qué filas están marcadas.
+    - clave: función que devuelve la clave de selección de un elemento (por defecto su "ruta").
+    - etiqueta_fila: función opcional que devuelve el tag (color) de la fila.
+    """
+
+    MARCA_SI = "☑"
+    MARCA_NO = "☐"
+
+    def __init__(self, master, columnas, formatear_fila, seleccion,
+                 clave=lambda fila: fila["ruta"], etiqueta_fila=None, alto_fila=24):
+        super().__init__(master)
+        self.formatear_fila = formatear_fila
+        self.seleccion = seleccion
+        self.clave = clave
+        self.etiqueta_fila = etiqueta_fila
+        self.alto_fila = alto_fila
+
+        self.filas = []  # Datos que se muestran (no se copian, se guarda la referencia).
+        self.inicio = 0  # Índice del primer elemento visible.
+        self._items = []  # Filas del Treeview que se reciclan al desplazarse.
+
+        # Estilo propio para fijar la altura de fila y poder calcular cuántas caben.
+        estilo = ttk.Style(self)
+        estilo.configure("Virtual.Treeview", rowheight=alto_fila)
+
+        ids = ["sel"] + [f"c{i}" for i in range(len(columnas))]
+        self.arbol = ttk.Treeview(self, columns=ids, show="headings", selectmode="none",
+                                  height=1, style="Virtual.Treeview")
+        self.arbol.heading("sel", text="")
+        self.arbol.column("sel", width=30, minwidth=30, stretch=False, anchor="center")
+        for id_columna, (titulo, ancho) in zip(ids[1:], columnas):
+            self.arbol.heading(id_columna, text=titulo, anchor="w")
+            self.arbol.column(id_columna, width=ancho, anchor="w")
+
+        self.barra = ttk.Scrollbar(self, orient="vertical", command=self._al_desplazar)
+        self.barra.pack(side="right", fill="y")
+        self.arbol.pack(side="left", fill="both", expand=True)
+
+        # Eventos: cambio de tamaño, rueda del ratón (Windows/macOS y Linux), clic para marcar y teclado.
+        self.arbol.bind("<Configure>", self._al_redimensionar)
+        self.arbol.bind("<MouseWheel>", lambda e: self.desplazar(-1 if e.delta > 0 else 1, "units"))
+        self.arbol.bind("<Button-4>", lambda e: self.desplazar(-1, "units"))
+        self.arbol.bind("<Button-5>", lambda e: self.desplazar(1, "units"))
+        self.arbol.bind("<Button-1>", self._al_hacer_clic)
+        self.arbol.bind("<Prior>", lambda e: self.desplazar(-1, "pages"))
+        self.arbol.bind("<Next>", lambda e: self.desplazar(1, "pages"))
+
+    # --- Datos ---
+
+    def establecer_filas(self, filas, conservar_posicion=False):
+        """Cambia la lista de datos que se muestra y vuelve al principio (salvo con 'conservar_posicion')."""
+        self.filas = filas
+        if not conservar_posicion:
+            self.inicio = 0
+        self.refrescar()
+
+    def refrescar(self):
+        """Vuelve a dibujar las filas visibles (por ejemplo, tras añadir datos o cambiar la selección)."""
+        total = len(self.filas)
+        visibles = len(self._items)
+        self.inicio = max(0, min(self.inicio, total - visibles))
+
+        for posicion, iid in enumerate(self._items):
+            indice = self.inicio + posicion
+            if indice < total:
+                fila = self.filas[indice]
+                marca = self.MARCA_SI if self.seleccion.esta_marcado(self.clave(fila)) else self.MARCA_NO
+                tags = (self.etiqueta_fila(fila),) if self.etiqueta_fila else ()
+                self.arbol.item(iid, values=(marca,) + tuple(self.formatear_fila(fila)), tags=tags)
+            else:
+                self.arbol.item(iid, values=(), tags=())
+
+        # La barra de desplazamiento refleja la parte visible sobre el total de datos.
+        if total > visibles and total:
+            self.barra.set(self.inicio / total, (self.inicio + visibles) / total)
+        else:
+            self.barra.set(0, 1)
+
+    def filas_visibles(self):
+        """Devuelve los elementos que se están mostrando ahora mismo."""
+        return self.filas[self.inicio:self.inicio + len(self._items)]
+
+    # --- Desplazamiento ---
+
+    def desplazar(self, cantidad, unidad="units"):
+        """Desplaza la vista 'cantidad' filas (unidad 'units') o páginas (unidad 'pages')."""
+        paso = max(1, len(self._items) - 1) if unidad == "pages" else 3
+        self.inicio += int(cantidad) * paso
+        self.refrescar()
+        return "break"
+
+    def _al_desplazar(self, accion, cantidad, unidad=None):
+        """Recibe los comandos de la barra de desplazamiento ('moveto' o 'scroll')."""
+        if accion == "moveto":
+            self.inicio = int(float(cantidad) * len(self.filas))
+            self.refrescar()
+        elif accion == "scroll":
+            self.desplazar(cantidad, unidad)
+
+    def _al_redimensionar(self, event):
+        """Ajusta el número de filas recicladas a la altura disponible."""
+        necesarias = max(1, (event.height - self.alto_fila) // self.alto_fila)
+        while len(self._items) < necesarias:
+            self._items.append(self.arbol.insert("", "end", values=()))
+        while len(self._items) > necesarias:
+            self.arbol.delete(self._items.pop())
+        self.refrescar()
+
+    # --- Selección ---
+
+    def _al_hacer_clic(self, event):
+        """Marca o desmarca la fila sobre la que se hizo clic."""
+        iid = self.arbol.identify_row(event.y)
+        if not iid or iid not in self._items:
+            return
+        indice = self.inicio + self._items.index(iid)
+        if indice < len(self.filas):
+            self.seleccion.alternar(self.clave(self.filas[indice]))
+            self.refrescar()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la búsqueda de texto: los textos que aparecen en casi todos los nombres (que se resuelven comparando
+todos los bytes) y los poco frecuentes (que parten de las posiciones de un byte) deben dar lo mismo que 'in'.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from voidclean.busqueda import IndiceBusqueda, interpretar
+from voidclean.escaneo import RegistroArchivo
+from voidclean.resultados import ConjuntoResultados
+
+
+def _conjunto(nombres):
+    conjunto = ConjuntoResultados()
+    raiz = os.path.abspath("raiz")
+    registros = [RegistroArchivo(os.path.join(raiz, n), os.path.basename(n), i, 1.0, 1.0, 0, 0)
+                 for i, n in enumerate(nombres)]
+    conjunto.agregar(conjunto.preparar(registros, raiz))
+    return conjunto
+
+
+@pytest.mark.parametrize("texto", ["t", "tmp", "ñ", "ca", "cache", "b tmp", "zz"])
+def test_texto_igual_que_in(texto):
+    nombres = ["tmp%d.log" % i for i in range(50)] + ["Caché%d.dat" % i for i in range(5)]
+    nombres += [os.path.join("cache", "b%d.tmp" % i) for i in range(5)] + ["salto\nde línea.tmp", "x"]
+    conjunto = _conjunto(nombres)
+    indice = IndiceBusqueda(conjunto).construir()
+    esperado = [f for f in conjunto.filas if all(t in conjunto.rel[f].lower() for t in texto.split())]
+    assert list(indice.filtrar(conjunto.filas, interpretar(texto))) == esperado
+
+
+def test_refinar_y_patron():
+    conjunto = _conjunto(["setup7a.log", "setup17.log", "setup7a.tmp", "otro.log"])
+    indice = IndiceBusqueda(conjunto).construir()
+    assert list(indice.filtrar(conjunto.filas, interpretar("set"))) == [0, 1, 2]
+    assert list(indice.filtrar(conjunto.filas, interpretar("setu"))) == [0, 1, 2]  # Refina la anterior.
+    assert list(indice.filtrar(conjunto.filas, interpretar("set*7?.log"))) == [0]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del canal entre el hilo de escaneo y la interfaz: los bloques de columnas que envía el escaneo
+deben llegar enteros a agregar_lote_a_lista, juntando los de un mismo fotograma.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("XDG_CACHE_HOME", tempfile.mkdtemp(prefix="vct_pruebas_"))  # No tocar los datos del usuario.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import VoidCleanTempo as app
+from voidclean.canal import CanalTrabajo
+from voidclean.metricas import Metricas
+from voidclean.raices import agrupar_por_volumen, TAMANO_LOTE_RAIZ
+from voidclean.resultados import ConjuntoResultados
+
+
+class _Widget:
+    """Sustituye a los widgets de Tk: guarda las llamadas a 'after' y acepta cualquier otra."""
+
+    def __init__(self):
+        self.pendientes = []
+
+    def after(self, ms, funcion, *args):
+        self.pendientes.append((funcion, args))
+
+    def __getattr__(self, nombre):
+        return lambda *args, **kwargs: None
+
+
+def test_escaneo_llega_por_el_canal_a_agregar_lote_a_lista(monkeypatch, tmp_path):
+    cantidad = 2 * TAMANO_LOTE_RAIZ + 7  # Varios lotes, para que el canal tenga que juntarlos.
+    for i in range(cantidad):
+        (tmp_path / f"f{i}.tmp").write_bytes(b"x" * i)
+    conjunto = ConjuntoResultados()
+    monkeypatch.setattr(app, "archivos_encontrados", conjunto)
+    monkeypatch.setattr(app, "metricas_escaneo", Metricas("prueba"))
+    monkeypatch.setattr(app, "lista_archivos", _Widget(), raising=False)  # Solo existen al abrir la ventana.
+    monkeypatch.setattr(app, "label_total", _Widget(), raising=False)
+
+    # El escaneo se ejecuta entero antes de atender el canal: todos sus lotes llegan en el mismo "fotograma".
+    canal = CanalTrabajo()
+    app.cargar_archivos_con_progreso(canal, 0, agrupar_por_volumen([str(tmp_path)]), Metricas("prueba"))
+    widget = _Widget()
+    recibidos = []
+    fin = []
+    canal.atender(widget, {"lote": lambda bloques: (recibidos.append(len(bloques)), app.agregar_lote_a_lista(bloques)),
+                           "fin": fin.append, "error": fin.append})
+
+    assert fin and "no_accesibles" in fin[0]
+    assert len(recibidos) == 1 and recibidos[0] > 1  # Bloques enteros, no sus campos por separado.
+    assert len(conjunto) == cantidad
+    assert sorted(conjunto.size[f] for f in conjunto.filas) == list(range(cantidad))
+    assert not widget.pendientes  # Tras "fin" el canal deja de revisarse.
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la cuarentena: la carpeta no se crea hasta el primer lote, y una sesión nueva encuentra los lotes.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidclean.cuarentena import Cuarentena
+
+
+def test_carpeta_solo_al_poner_el_primer_lote(tmp_path):
+    temp = tmp_path / "Temp"
+    temp.mkdir()
+    (temp / "a.tmp").write_text("x")
+    cuarentena = Cuarentena(temp_path=str(temp))
+    assert cuarentena.lotes_pendientes() == []
+    assert sorted(os.listdir(tmp_path)) == ["Temp"]  # Preparar la cuarentena no crea nada.
+
+    lote, resultado = cuarentena.poner([str(temp / "a.tmp")])
+    assert resultado.eliminados == [str(temp / "a.tmp")]
+    assert cuarentena.carpeta in cuarentena.carpetas()
+
+    siguiente = Cuarentena(temp_path=str(temp))  # Otra sesión: busca en las carpetas posibles.
+    pendientes = siguiente.lotes_pendientes()
+    assert [l.rutas for l in pendientes] == [lote.rutas]
+    assert siguiente.deshacer(pendientes[0]) == ([str(temp / "a.tmp")], [])
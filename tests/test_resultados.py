@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del orden del conjunto de resultados, con NumPy (argsort) y sin él (sorted): deben dar lo mismo.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidclean.escaneo import RegistroArchivo
+from voidclean.resultados import ConjuntoResultados
+
+
+def _bloque(conjunto, raiz, archivos):
+    registros = [RegistroArchivo(os.path.join(raiz, n), os.path.basename(n), size, ctime, ctime, 0, 0)
+                 for n, size, ctime in archivos]
+    return conjunto.preparar(registros, raiz)
+
+
+@pytest.mark.parametrize("con_numpy", [True, False])
+def test_ordenar(monkeypatch, con_numpy):
+    if con_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    conjunto = ConjuntoResultados()
+    raiz = os.path.abspath("raiz")
+    conjunto.agregar(_bloque(conjunto, raiz, [("b.tmp", 5, 3.0), (os.path.join("Z", "A.tmp"), 7, 1.0),
+                                              ("c.tmp", 5, 2.0), ("a.tmp", 1, 2.0)]))
+    conjunto.ordenar("peso_mayor")
+    assert list(conjunto.filas) == [1, 0, 2, 3]  # Los empates conservan el orden anterior.
+    conjunto.ordenar("nombre_az")
+    assert list(conjunto.filas) == [1, 3, 0, 2]  # Por nombre, sin la carpeta ni mayúsculas.
+    conjunto.ordenar("antiguos")
+    assert list(conjunto.filas) == [1, 3, 2, 0]
+
+    # Un archivo nuevo y otro modificado: el conjunto se vuelve a ordenar con la columna de nombres al día.
+    conjunto.ordenar("nombre_za")
+    conjunto.aplicar_cambios(_bloque(conjunto, raiz, [("B.log", 2, 4.0), ("a.tmp", 9, 5.0)]), [])
+    assert conjunto.nombre_min == ["b.tmp", "a.tmp", "c.tmp", "a.tmp", "b.log"]
+    assert [conjunto.nombre(f) for f in conjunto.filas] == ["c.tmp", "b.tmp", "B.log", "A.tmp", "a.tmp"]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la selección: "marcar todo" no debe alcanzar a las filas que se añaden después.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidclean.escaneo import RegistroArchivo
+from voidclean.resultados import ConjuntoResultados
+from voidclean.seleccion import Seleccion
+
+
+def _bloque(conjunto, raiz, nombres):
+    registros = [RegistroArchivo(os.path.join(raiz, n), n, 1, 1.0, 1.0, 0, 0) for n in nombres]
+    return conjunto.preparar(registros, raiz)
+
+
+def test_marcar_todo_no_marca_filas_nuevas():
+    conjunto = ConjuntoResultados()
+    raiz = os.path.abspath("raiz")
+    conjunto.agregar(_bloque(conjunto, raiz, ["a.tmp", "b.tmp", "c.tmp"]))
+    seleccion = Seleccion()
+    seleccion.marcar_todo(hasta=len(conjunto.rel))
+    seleccion.marcar(1, False)
+
+    # Llega un archivo nuevo (modo vigilancia) y se modifica otro que ya estaba marcado.
+    conjunto.aplicar_cambios(_bloque(conjunto, raiz, ["d.tmp", "a.tmp"]), [])
+    marcados = [conjunto.nombre(f) for f in conjunto.filas if seleccion.esta_marcado(f)]
+    assert marcados == ["a.tmp", "c.tmp"]
+
+    seleccion.marcar_varios([3])  # Se puede marcar a mano.
+    assert seleccion.esta_marcado(3)
+    seleccion.marcar_varios([0, 3], False)
+    assert not seleccion.esta_marcado(0) and not seleccion.esta_marcado(3) and seleccion.esta_marcado(2)
+
+
+def test_marcar_todo_sin_limite():
+    seleccion = Seleccion()
+    seleccion.marcar_todo()
+    assert seleccion.esta_marcado(10 ** 9)
+    seleccion.desmarcar_todo()
+    assert not seleccion.esta_marcado(0)
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo reutilizable de VoidCleanTempo.
+
+Contiene la lógica que no depende de la interfaz gráfica (escaneo de carpetas, etc.)
+para que la ventana principal, las exportaciones y cualquier otra herramienta usen el mismo código.
+"""
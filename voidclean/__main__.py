@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Permite ejecutar la línea de comandos con: python -m voidclean"""
+
+import sys
+
+from voidclean.cli import main
+
+sys.exit(main())
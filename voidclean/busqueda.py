@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Búsqueda instantánea sobre los resultados de un escaneo.
+
+El texto de búsqueda se interpreta como una lista de condiciones separadas por espacios:
+
+    chrome            el nombre (o la ruta relativa) contiene "chrome" (sin distinguir mayúsculas)
+    set*7?.log        patrón glob sobre el nombre del archivo
+    .log  ext:tmp,dmp extensiones ("*.log" también se trata como extensión)
+    >10M  <1G         peso mayor / menor que (acepta K, M, G, T)
+    >7d   <12h        antigüedad mayor / menor que (días "d" u horas "h", por fecha de creación)
+
+Todas las condiciones se combinan con "y". Para que cada búsqueda tarde milisegundos con cientos de miles
+de archivos, IndiceBusqueda se construye una vez por escaneo a partir de las columnas de ConjuntoResultados:
+grupos de filas por extensión, filas ordenadas por peso y por fecha (los rangos se resuelven con una
+búsqueda binaria) y una columna de nombres en minúsculas para buscar texto.
+"""
+
+import os
+import re
+import time
+import fnmatch
+from array import array
+from collections import namedtuple
+
+from voidclean.politicas import leer_tamano
+
+
+# Condiciones de una búsqueda (las que valen None o están vacías no se aplican).
+# - textos: subcadenas que deben aparecer en la ruta relativa (en minúsculas).
+# - patrones: patrones glob sobre el nombre (en minúsculas).
+# - dias_min / dias_max: antigüedad mínima / máxima en días.
+Consulta = namedtuple("Consulta", ["textos", "patrones", "extensiones", "tamano_min", "tamano_max", "dias_min", "dias_max"])
+
+CONSULTA_VACIA = Consulta((), (), None, None, None, None, None)
+
+_COMPARACION = re.compile(r"^([<>])=?(\d+(?:[.,]\d+)?)\s*([a-z]*)$")
+_EXTENSION = re.compile(r"^(?:\*?\.)([\w-]+)$")
+_UNIDADES_EDAD = {"d": 1.0, "h": 1.0 / 24}
+_COMODINES = re.compile(r"\*|\?|\[[^\]]*\]")
+_FINAL_EXTENSION = re.compile(r"(\.[\w-]+)$")
+
+
+def interpretar(texto):
+    """Convierte el texto del cuadro de búsqueda en una Consulta. Lo que no es una condición se busca como texto."""
+    textos, patrones, extensiones = [], [], set()
+    limites = {}
+    for palabra in texto.lower().split():
+        if palabra.startswith("ext:"):
+            extensiones.update(e.strip() if e.strip().startswith(".") else "." + e.strip()
+                               for e in palabra[4:].split(",") if e.strip())
+            continue
+        coincide = _EXTENSION.match(palabra)
+        if coincide:
+            extensiones.add("." + coincide.group(1))
+            continue
+        coincide = _COMPARACION.match(palabra)
+        if coincide:
+            signo, numero, unidad = coincide.groups()
+            numero = numero.replace(",", ".")
+            try:
+                if unidad in _UNIDADES_EDAD:
+                    limites["dias_min" if signo == ">" else "dias_max"] = float(numero) * _UNIDADES_EDAD[unidad]
+                else:
+                    limites["tamano_min" if signo == ">" else "tamano_max"] = leer_tamano(numero + unidad)
+                continue
+            except ValueError:
+                pass  # Unidad desconocida: se busca como texto.
+        if _COMODINES.search(palabra):
+            patrones.append(palabra)
+        else:
+            textos.append(palabra)
+    return Consulta(tuple(textos), tuple(patrones), frozenset(extensiones) or None, limites.get("tamano_min"),
+                    limites.get("tamano_max"), limites.get("dias_min"), limites.get("dias_max"))
+
+
+def _refina(anterior, nueva):
+    """Indica si 'nueva' solo añade texto a 'anterior' (sus resultados están dentro de los de 'anterior')."""
+    return (anterior._replace(textos=()) == nueva._replace(textos=())
+            and all(any(a in n for n in nueva.textos) for a in anterior.textos))
+
+
+class IndiceBusqueda:
+    """
+    Índice de búsqueda de un ConjuntoResultados:
+
+        indice = IndiceBusqueda(conjunto).construir()
+        filas = indice.filtrar(conjunto.filas, interpretar(">10M .log"))
+
+    Al crearlo se copian las columnas del conjunto (es rápido y debe hacerse desde el hilo que modifica el
+    conjunto); 'construir' hace el trabajo pesado sobre esas copias y se puede ejecutar en otro hilo.
+    Si después cambian las filas del conjunto (archivos nuevos o modificados) hay que crear otro índice.
+    """
+
+    def __init__(self, conjunto):
+        self.conjunto = conjunto  # Solo para traducir extensiones a números (las tablas solo crecen).
+        self.n = len(conjunto.rel)
+        self._columnas = (list(conjunto.rel), conjunto.size[:], conjunto.ctime[:], conjunto.ext[:])
+        self._ultima = None  # (consulta, máscara) de la última búsqueda, para refinarla al seguir escribiendo.
+
+    def construir(self):
+        """Construye el índice a partir de las columnas copiadas y devuelve el propio índice.
+        Lanza ImportError si NumPy no está instalado."""
+        import numpy as np  # Importación diferida: solo la necesita la búsqueda.
+
+        self._np = np
+        rel, size, ctime, ext = self._columnas
+        self._columnas = None
+
+        # Nombres en minúsculas: se reutilizan las cadenas que ya lo están, así la columna apenas ocupa memoria.
+        self.nombres = [r if r == m else m for r, m in zip(rel, map(str.lower, rel))]
+        # Los mismos nombres unidos por saltos de línea, como bytes UTF-8, con el byte en que empieza cada uno.
+        self._bytes = np.frombuffer("\n".join(self.nombres).encode("utf-8", "surrogatepass"), dtype=np.uint8)
+        self._con_carpetas = bool((self._bytes == ord(os.sep)).any())  # En el modo recursivo incluyen la carpeta.
+        saltos = np.flatnonzero(self._bytes == 10)
+        if len(saltos) != max(self.n - 1, 0):  # Algún nombre contiene un salto de línea: se miden uno por uno.
+            saltos = np.cumsum(np.fromiter((len(n.encode("utf-8", "surrogatepass")) for n in self.nombres),
+                                           dtype=np.int64, count=self.n)[:-1] + 1) - 1
+        self._inicios = np.concatenate(([0], saltos + 1)).astype(np.int64)
+        # Veces que aparece cada byte: la búsqueda de texto parte del byte menos frecuente.
+        self._frecuencia_bytes = np.bincount(self._bytes, minlength=256)
+
+        # Filas agrupadas por extensión: las de la extensión i son por_extension[inicio_ext[i]:inicio_ext[i + 1]].
+        ext = np.frombuffer(ext, dtype=np.uint16).astype(np.intp)
+        self.por_extension = np.argsort(ext, kind="stable")
+        self.inicio_ext = np.concatenate(([0], np.cumsum(np.bincount(ext, minlength=1))))
+
+        # Filas ordenadas por peso y por fecha de creación, con los valores ya ordenados para searchsorted.
+        size = np.frombuffer(size, dtype=np.int64)
+        self.orden_size = np.argsort(size, kind="stable")
+        self.size_ordenado = size[self.orden_size]
+        ctime = np.frombuffer(ctime, dtype=np.float64)
+        self.orden_ctime = np.argsort(ctime, kind="stable")
+        self.ctime_ordenado = ctime[self.orden_ctime]
+        return self
+
+    def _con_texto(self, texto):
+        """
+        Máscara (un valor por fila) de los nombres que contienen 'texto'. Se buscan sus bytes en todos los nombres
+        unidos a la vez con NumPy: se toman las posiciones del byte menos frecuente del texto y se descartan las
+        que no tienen el resto de bytes alrededor. Nada se recorre fila por fila en Python, así que un texto corto
+        que aparece en casi todos los nombres no tarda más que uno que no aparece en ninguno.
+        """
+        np = self._np
+        datos = self._bytes
+        buscado = np.frombuffer(texto.encode("utf-8", "surrogatepass"), dtype=np.uint8)
+        mascara = np.zeros(self.n, dtype=bool)
+        largo = len(buscado)
+        if not largo or largo > len(datos):
+            mascara[:] = not largo
+            return mascara
+        ancla = int(np.argmin(self._frecuencia_bytes[buscado]))
+        ultima = len(datos) - largo + 1  # Última posición en que puede empezar el texto, más uno.
+        # El texto no contiene saltos de línea, así que cada aparición está dentro de un solo nombre.
+        if self._frecuencia_bytes[buscado[ancla]] * 10 > self.n * (largo + 4):
+            # Hasta el byte menos frecuente aparece en casi todos los nombres: sacar sus posiciones costaría más
+            # que comparar todos los bytes y reducir la coincidencia por nombre (cada byte del texto es una
+            # comparación más, por eso el límite sube con el largo).
+            coincide = np.zeros(len(datos) + 1, dtype=bool)
+            coincide[:ultima] = datos[:ultima] == buscado[0]
+            for k in range(1, largo):
+                coincide[:ultima] &= datos[k:ultima + k] == buscado[k]
+            return np.logical_or.reduceat(coincide, self._inicios)
+        # Posiciones (del inicio del texto) donde está el byte ancla y, de ellas, las que tienen el resto alrededor.
+        posiciones = np.flatnonzero(datos[ancla:ultima + ancla] == buscado[ancla])
+        for k in range(largo):
+            if k != ancla and len(posiciones):
+                posiciones = posiciones[datos[posiciones + k] == buscado[k]]
+        mascara[np.searchsorted(self._inicios, posiciones, "right") - 1] = True
+        return mascara
+
+    def _rangos(self, consulta, ahora):
+        """Filas que cumplen cada condición de extensión, peso y antigüedad (una lista de arrays)."""
+        np = self._np
+        rangos = []
+        # Un patrón que termina en una extensión literal ("set*.log") solo puede cumplirse en esa extensión.
+        extensiones = [{coincide.group(1)} for coincide in map(_FINAL_EXTENSION.search, consulta.patrones) if coincide]
+        if consulta.extensiones is not None:
+            extensiones.append(consulta.extensiones)
+        for grupo in extensiones:
+            ids = [i for i in self.conjunto.ids_extensiones(grupo) if i < len(self.inicio_ext) - 1]
+            rangos.append(np.concatenate([self.por_extension[self.inicio_ext[i]:self.inicio_ext[i + 1]] for i in ids])
+                          if ids else np.empty(0, dtype=np.intp))
+        if consulta.tamano_min is not None or consulta.tamano_max is not None:
+            inicio = np.searchsorted(self.size_ordenado, consulta.tamano_min, "left") if consulta.tamano_min is not None else 0
+            fin = np.searchsorted(self.size_ordenado, consulta.tamano_max, "right") if consulta.tamano_max is not None else self.n
+            rangos.append(self.orden_size[inicio:fin])
+        if consulta.dias_min is not None or consulta.dias_max is not None:
+            # Más antiguo que 'dias_min' = creado antes de ahora - dias_min (y al revés con 'dias_max').
+            fin = (np.searchsorted(self.ctime_ordenado, ahora - consulta.dias_min * 86400, "right")
+                   if consulta.dias_min is not None else self.n)
+            inicio = (np.searchsorted(self.ctime_ordenado, ahora - consulta.dias_max * 86400, "left")
+                      if consulta.dias_max is not None else 0)
+            rangos.append(self.orden_ctime[inicio:max(inicio, fin)])
+        return rangos
+
+    def buscar(self, consulta, ahora=None):
+        """
+        Devuelve una máscara booleana (un valor por número de fila) con los archivos que cumplen 'consulta'.
+        Si la consulta solo añade texto a la anterior, se busca únicamente entre los resultados anteriores.
+        """
+        np = self._np
+        ahora = time.time() if ahora is None else ahora
+
+        # Condiciones con índice: se empieza por el rango más pequeño y se intersecan los demás.
+        refinando = self._ultima is not None and _refina(self._ultima[0], consulta)
+        rangos = sorted(self._rangos(consulta, ahora), key=len) if not refinando else []
+        if refinando:
+            mascara = self._ultima[1].copy()
+        elif rangos:
+            mascara = np.zeros(self.n, dtype=bool)
+            mascara[rangos[0]] = True
+            for rango in rangos[1:]:
+                otra = np.zeros(self.n, dtype=bool)
+                otra[rango] = True
+                mascara &= otra
+        else:
+            mascara = np.ones(self.n, dtype=bool)
+
+        # Condiciones de texto: cada texto es una máscara más; solo los patrones recorren nombres uno por uno.
+        for texto in consulta.textos:
+            if not refinando or texto not in self._ultima[0].textos:  # Las ya aplicadas están en la máscara.
+                mascara &= self._con_texto(texto)
+        for patron in consulta.patrones:
+            # Primero se filtra por la parte literal más larga del patrón (sin la extensión final, que ya se
+            # resolvió con el índice) y luego se comprueba el patrón completo con una expresión regular.
+            literal = max(_COMODINES.split(_FINAL_EXTENSION.sub("", patron)), key=len)
+            if literal:
+                mascara &= self._con_texto(literal)
+            # El patrón se compara con el nombre, no con la carpeta de la ruta relativa.
+            cumple = re.compile(fnmatch.translate(patron)).match
+            nombres = self.nombres
+            filas = np.flatnonzero(mascara).tolist()
+            if self._con_carpetas:
+                validas = [i for i in filas if cumple(nombres[i], nombres[i].rfind(os.sep) + 1)]
+            else:
+                validas = [i for i in filas if cumple(nombres[i])]
+            mascara = np.zeros(self.n, dtype=bool)
+            mascara[np.asarray(validas, dtype=np.intp)] = True
+
+        self._ultima = (consulta, mascara)
+        return mascara
+
+    def filtrar(self, filas, consulta, ahora=None):
+        """
+        Devuelve (como array('q')) las filas de 'filas' (en su orden) que cumplen 'consulta'.
+        'filas' es normalmente el array de filas visibles del conjunto o de la vista de duplicados.
+        """
+        np = self._np
+        mascara = self.buscar(consulta, ahora)
+        resultado = array("q")
+        if len(filas):
+            visibles = np.frombuffer(filas, dtype=np.int64)
+            resultado.frombytes(visibles[mascara[visibles]].tobytes())
+            del visibles  # Suelta la vista antes de que 'filas' pueda cambiar de tamaño.
+        return resultado
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Canal de comunicación entre un hilo de trabajo y la interfaz gráfica.
+
+El hilo de trabajo nunca toca la interfaz: envía mensajes a una cola y actualiza un valor de progreso
+(del que solo se conserva el último). En el hilo de la interfaz, un único temporizador ('after') vacía la
+cola unas 60 veces por segundo, junta los lotes de resultados que llegaron en ese intervalo y muestra
+el progreso una sola vez por fotograma. El canal lleva además un aviso de cancelación.
+"""
+
+import queue
+import threading
+
+
+# Intervalo (milisegundos) entre dos revisiones de la cola: ~60 veces por segundo.
+INTERVALO_SONDEO_MS = 16
+
+
+class CanalTrabajo:
+    """
+    Cola de mensajes (tipo, datos) de un hilo de trabajo hacia la interfaz, con progreso agrupado y cancelación.
+
+    En el hilo de trabajo:
+        canal.progreso(n); canal.enviar("lote", filas); ...; canal.terminar(datos)
+        if canal.cancelado: ...
+    En el hilo de la interfaz:
+        canal.atender(ventana, {"lote": ..., "progreso": ..., "fin": ..., "error": ...})
+    """
+
+    TIPOS_FINALES = ("fin", "error")
+
+    def __init__(self):
+        self._cola = queue.SimpleQueue()
+        self._progreso = None  # Último valor de progreso sin mostrar (los anteriores se descartan).
+        self.cancelacion = threading.Event()
+
+    # --- Hilo de trabajo ---
+
+    def progreso(self, valor):
+        """Anota el progreso actual. Es solo una asignación: se puede llamar en cada elemento."""
+        self._progreso = valor
+
+    def enviar(self, tipo, datos=None):
+        """Envía un mensaje a la interfaz."""
+        self._cola.put((tipo, datos))
+
+    def terminar(self, datos=None):
+        """Indica que el trabajo terminó (último mensaje del canal)."""
+        self.enviar("fin", datos)
+
+    def error(self, datos=None):
+        """Indica que el trabajo terminó con un error (último mensaje del canal)."""
+        self.enviar("error", datos)
+
+    @property
+    def cancelado(self):
+        """True si la interfaz pidió cancelar el trabajo."""
+        return self.cancelacion.is_set()
+
+    # --- Hilo de la interfaz ---
+
+    def cancelar(self):
+        """Pide al hilo de trabajo que se detenga lo antes posible."""
+        self.cancelacion.set()
+
+    def recoger(self):
+        """Devuelve (último progreso o None, lista de mensajes pendientes) y vacía la cola."""
+        progreso, self._progreso = self._progreso, None
+        mensajes = []
+        try:
+            while True:
+                mensajes.append(self._cola.get_nowait())
+        except queue.Empty:
+            pass
+        return progreso, mensajes
+
+    def atender(self, widget, manejadores, intervalo_ms=INTERVALO_SONDEO_MS):
+        """
+        Revisa el canal periódicamente con 'widget.after' hasta recibir "fin" o "error".
+
+        'manejadores' es un diccionario {tipo: función(datos)}. Los mensajes "lote" consecutivos se juntan
+        en una sola lista antes de pasarlos a su manejador; "progreso" recibe el último valor del intervalo.
+        """
+        progreso, mensajes = self.recoger()
+        lotes = []
+        terminado = False
+
+        for tipo, datos in mensajes:
+            if tipo == "lote":
+                lotes.extend(datos)
+                continue
+            if lotes:  # Los lotes anteriores se entregan antes que cualquier otro mensaje.
+                manejadores["lote"](lotes)
+                lotes = []
+            if tipo in manejadores:
+                manejadores[tipo](datos)
+            if tipo in self.TIPOS_FINALES:
+                terminado = True
+                break
+        if lotes:
+            manejadores["lote"](lotes)
+
+        if terminado:
+            return
+        if progreso is not None and "progreso" in manejadores:
+            manejadores["progreso"](progreso)
+        widget.after(intervalo_ms, self.atender, widget, manejadores, intervalo_ms)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Clasificación de archivos temporales por su extensión.
+"""
+
+import os
+
+
+# Diccionario que asocia extensiones de archivo con una descripción de su propósito.
+# Esto ayuda al usuario a entender qué tipo de archivo es.
+purpose_keywords = {
+    ".log": "Archivo de registro del sistema o aplicaciones",
+    ".tmp": "Archivo temporal generado por programas",
+    ".temp": "Archivo temporal generado automáticamente",
+    ".bak": "Copia de seguridad de un archivo antiguo",
+    ".dmp": "Volcado de memoria para depurar errores",
+    ".cache": "Archivo de caché usado para acelerar procesos",
+    ".old": "Versión anterior de un archivo reemplazado",
+    ".msi": "Instalador de software temporal",
+    ".config": "Archivo de configuración o parámetros",
+    ".json": "Datos temporales estructurados",
+    ".txt": "Archivo de texto auxiliar o log de errores",
+    ".zip": "Archivo comprimido generado temporalmente",
+    ".csv": "Datos temporales en tabla (Excel)",
+    ".etl": "Archivo de seguimiento de eventos del sistema",
+    ".wer": "Informe de errores de Windows",
+}
+
+# Descripción de los archivos cuya extensión no está en 'purpose_keywords'.
+DESCRIPCION_NO_CLASIFICADO = "Archivo temporal no clasificado del sistema"
+
+
+def obtener_extension(nombre):
+    """Devuelve la extensión del archivo en minúsculas (ej. ".log"), o "" si no tiene."""
+    return os.path.splitext(nombre)[1].lower()
+
+
+def get_file_description(nombre):
+    """
+    Obtiene la descripción de un archivo basada en su extensión, usando el diccionario 'purpose_keywords'.
+    """
+    return purpose_keywords.get(obtener_extension(nombre), DESCRIPCION_NO_CLASIFICADO) # Devuelve la descripción o un texto por defecto.
+
+
+def ruta_temp_por_defecto():
+    """
+    Obtiene la ruta de la carpeta de archivos temporales del sistema.
+    Usa la variable de entorno "TEMP". Si no existe, usa "/tmp" como alternativa (común en Linux).
+    """
+    return os.environ.get("TEMP", "/tmp")
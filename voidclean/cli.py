@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+Interfaz de línea de comandos de VoidCleanTempo (sin interfaz gráfica).
+
+Escanea una carpeta, filtra los archivos y escribe cada resultado en cuanto se encuentra, como JSON Lines
+o CSV, por lo que la memoria usada no depende del número de archivos. Con --eliminar los archivos que
+pasan el filtro se borran por bloques mientras avanza el escaneo. Lo que se elimina se anota en el historial
+persistente (ver voidclean.historial), el mismo que muestra la interfaz gráfica.
+
+Con --politicas se aplican las políticas de limpieza del archivo de configuración (ver voidclean.politicas):
+--simular solo informa de lo que se eliminaría y --cada N repite la limpieza cada N minutos con prioridad
+baja de CPU y de E/S (modo programado, pensado para dejarlo en segundo plano).
+
+Ejemplos:
+    python -m voidclean --recursivo --formato csv --salida temp.csv
+    python -m voidclean --ext .tmp,.dmp --dias-min 7 --eliminar
+    python -m voidclean --recursivo --politicas --simular
+    python -m voidclean --recursivo --politicas politicas.json --cada 60
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import fnmatch
+import argparse
+from array import array
+from datetime import datetime
+
+from voidclean.escaneo import escanear_directorio, escanear_recursivo, HILOS_ESCANEO
+from voidclean.clasificacion import get_file_description, obtener_extension, ruta_temp_por_defecto
+from voidclean.eliminacion import eliminar_en_paralelo
+from voidclean.cuarentena import carpetas_cuarentena_posibles, NOMBRE_CARPETA
+from voidclean.indice import directorio_datos_app
+from voidclean.politicas import leer_tamano
+
+
+# Columnas de salida (en este orden en el CSV).
+CAMPOS = ["ruta", "nombre", "descripcion", "size", "ctime", "mtime", "en_uso"]
+# Archivos que se acumulan antes de eliminarlos en paralelo (limita la memoria con --eliminar).
+TAMANO_BLOQUE_ELIMINACION = 2000
+# Registros que se convierten a columnas de una vez al escanear para las políticas.
+TAMANO_BLOQUE_POLITICAS = 5000
+
+
+def crear_filtro(extensiones=None, tamano_min=None, tamano_max=None, dias_min=None, patron=None, ahora=None):
+    """
+    Devuelve una función que indica si un RegistroArchivo cumple todos los criterios indicados:
+    extensión (conjunto en minúsculas, "" = sin extensión), peso mínimo/máximo en bytes,
+    antigüedad mínima en días (por fecha de creación) y patrón glob sobre el nombre.
+    """
+    limite_ctime = None
+    if dias_min is not None:
+        limite_ctime = (ahora or time.time()) - dias_min * 86400
+    patron = patron.lower() if patron else None
+
+    def cumple(registro):
+        if extensiones is not None and obtener_extension(registro.nombre) not in extensiones:
+            return False
+        if tamano_min is not None and registro.size < tamano_min:
+            return False
+        if tamano_max is not None and registro.size > tamano_max:
+            return False
+        if limite_ctime is not None and registro.ctime > limite_ctime:
+            return False
+        if patron is not None and not fnmatch.fnmatchcase(registro.nombre.lower(), patron):
+            return False
+        return True
+
+    return cumple
+
+
+def _fecha_iso(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+def _fila(registro, detector):
+    return {
+        "ruta": registro.ruta,
+        "nombre": registro.nombre,
+        "descripcion": get_file_description(registro.nombre),
+        "size": registro.size,
+        "ctime": _fecha_iso(registro.ctime),
+        "mtime": _fecha_iso(registro.mtime),
+        "en_uso": detector.en_uso(registro.ruta) if detector is not None else None,
+    }
+
+
+class _EscritorJsonl:
+    def __init__(self, salida):
+        self.salida = salida
+
+    def escribir(self, fila):
+        self.salida.write(json.dumps(fila, ensure_ascii=False) + "\n")
+
+
+class _EscritorCsv:
+    def __init__(self, salida):
+        self.escritor = csv.DictWriter(salida, fieldnames=CAMPOS)
+        self.escritor.writeheader()
+
+    def escribir(self, fila):
+        self.escritor.writerow(fila)
+
+
+class _ErrorSalida(Exception):
+    """Error al escribir los resultados (envuelve el OSError), para no confundirlo con uno al leer la carpeta."""
+
+
+def _fallo_salida(args, error):
+    """
+    Informa de un error al escribir los resultados y devuelve el código de salida. Si se cerró la tubería de
+    la salida estándar (por ejemplo, con '| head') se termina sin mensaje y la salida estándar se redirige
+    a os.devnull, para que Python no vuelva a fallar al vaciarla al salir.
+    """
+    if isinstance(error, BrokenPipeError):
+        try:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        except (OSError, ValueError):
+            pass
+        return 1
+    destino = "la salida estándar" if args.salida == "-" else args.salida
+    print(f"No se puede escribir en {destino}: {error}", file=sys.stderr)
+    return 2
+
+
+def crear_parser():
+    """Define los argumentos de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        prog="voidclean",
+        description="Escanea (y opcionalmente limpia) una carpeta de archivos temporales sin interfaz gráfica.")
+    parser.add_argument("ruta", nargs="?", default=ruta_temp_por_defecto(),
+                        help="carpeta a escanear (por defecto la carpeta TEMP del sistema)")
+    parser.add_argument("-r", "--recursivo", action="store_true", help="incluir subcarpetas")
+    parser.add_argument("--profundidad", type=int, default=None, help="profundidad máxima con --recursivo")
+    parser.add_argument("--hilos", type=int, default=HILOS_ESCANEO, help="hilos para el escaneo y la eliminación")
+    parser.add_argument("--formato", choices=["jsonl", "csv"], default="jsonl", help="formato de salida")
+    parser.add_argument("-o", "--salida", default="-", help="archivo de salida ('-' = salida estándar)")
+    parser.add_argument("--ext", help="extensiones separadas por comas (ej. .tmp,.log)")
+    parser.add_argument("--tamano-min", type=leer_tamano, help="peso mínimo (ej. 10M)")
+    parser.add_argument("--tamano-max", type=leer_tamano, help="peso máximo (ej. 1G)")
+    parser.add_argument("--dias-min", type=float, help="antigüedad mínima en días (por fecha de creación)")
+    parser.add_argument("--nombre", help="patrón glob sobre el nombre (ej. '*.tmp')")
+    parser.add_argument("--estado", action="store_true", help="incluir si cada archivo está en uso (psutil)")
+    parser.add_argument("--eliminar", "--delete", dest="eliminar", action="store_true",
+                        help="eliminar los archivos que cumplan los filtros (los que están en uso se omiten)")
+    parser.add_argument("--politicas", nargs="?", const="", metavar="ARCHIVO",
+                        help="aplicar las políticas de limpieza del archivo indicado (o del de la carpeta de datos de la aplicación)")
+    parser.add_argument("--simular", "--dry-run", dest="simular", action="store_true",
+                        help="con --politicas: solo informar de los archivos y bytes que se eliminarían")
+    parser.add_argument("--cada", type=float, metavar="MINUTOS",
+                        help="con --politicas: repetir cada N minutos con prioridad baja de CPU y E/S")
+    return parser
+
+
+def bajar_prioridad():
+    """
+    Baja la prioridad de CPU y de E/S del proceso (modo programado). Se llama antes de crear los hilos
+    de escaneo y eliminación, que heredan la prioridad. Si no es posible, se sigue con la prioridad normal.
+    """
+    try:
+        import psutil
+        proceso = psutil.Process()
+        if os.name == "nt":
+            proceso.nice(psutil.IDLE_PRIORITY_CLASS)
+            proceso.ionice(psutil.IOPRIO_VERYLOW)
+        else:
+            proceso.nice(19)
+            if sys.platform.startswith("linux"):
+                proceso.ionice(psutil.IOPRIO_CLASS_IDLE)
+    except Exception:
+        pass  # Sin psutil, sin permisos o sin soporte: no es un error.
+
+
+def _registrar_historial(archivos):
+    """Anota en el historial persistente los archivos eliminados (con un aviso si no se puede escribir)."""
+    from voidclean.historial import HistorialEliminaciones, entradas_desde, ruta_historial_por_defecto
+
+    try:
+        with HistorialEliminaciones(ruta_historial_por_defecto()) as historial:
+            historial.registrar(entradas_desde(archivos))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Aviso: no se pudo guardar el historial de eliminaciones: {e}", file=sys.stderr)
+
+
+def rutas_excluidas(ruta):
+    """
+    Rutas que el escaneo no debe recorrer (como en la interfaz): la carpeta de cuarentena de 'ruta', con sus
+    lotes pendientes y manifiestos, y la carpeta de datos de la aplicación (índices, historial, caché de hashes),
+    que puede estar dentro de la carpeta escaneada.
+    """
+    return {directorio_datos_app(), *carpetas_cuarentena_posibles(ruta)}
+
+
+def _escanear(args, errores):
+    """Generador de registros según las opciones de escaneo de la línea de comandos."""
+    if not args.recursivo:
+        return escanear_directorio(args.ruta, errores)  # Sin subcarpetas: la cuarentena y los datos no se recorren.
+    registros = escanear_recursivo(args.ruta, profundidad_max=args.profundidad, hilos=args.hilos, errores=errores,
+                                   excluir=rutas_excluidas(args.ruta))
+    # Las cuarentenas de otras raíces de la interfaz que estén dentro de 'ruta' tampoco se listan ni se eliminan.
+    marca = NOMBRE_CARPETA + os.sep
+    return (registro for registro in registros if marca not in registro.ruta)
+
+
+def _pasada_politicas(args, politicas):
+    """
+    Escanea, evalúa las políticas y elimina (o, con --simular, solo lista) los archivos seleccionados.
+    Devuelve el código de salida.
+    """
+    from voidclean.detector_uso import DetectorUso
+    from voidclean.resultados import ConjuntoResultados
+    from voidclean.politicas import evaluar_politicas
+
+    # Los resultados se guardan por columnas para evaluar las políticas de forma vectorizada.
+    conjunto = ConjuntoResultados()
+    mtimes = array("d")  # El conjunto no guarda el mtime: aquí va el de cada fila, para la salida de --simular.
+    errores_escaneo = []
+    lote = []
+    for registro in _escanear(args, errores_escaneo):
+        lote.append(registro)
+        mtimes.append(registro.mtime)
+        if len(lote) >= TAMANO_BLOQUE_POLITICAS:
+            conjunto.agregar(conjunto.preparar(lote, args.ruta))
+            lote = []
+    conjunto.agregar(conjunto.preparar(lote, args.ruta))
+
+    detector = DetectorUso(ttl=float("inf"))
+    detector.actualizar_ahora()
+    resultado = evaluar_politicas(politicas, conjunto, conjunto.filas_de(detector.abiertos_en(args.ruta) or ()))
+    rutas = [conjunto.ruta(f) for f in resultado.filas]
+
+    marca = datetime.now().strftime("%Y-%m-%d %H:%M")
+    print(f"[{marca}] Archivos: {len(conjunto)}. No accesibles: {len(errores_escaneo)}.", file=sys.stderr)
+    for nombre, archivos, bytes_politica in resultado.por_politica:
+        print(f"  {nombre}: {archivos} archivo(s), {bytes_politica} bytes", file=sys.stderr)
+
+    if args.simular:
+        # Lista de lo que se eliminaría, en el formato de salida elegido.
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+        try:
+            escritor = _EscritorCsv(salida) if args.formato == "csv" else _EscritorJsonl(salida)
+            for fila in resultado.filas:
+                ruta = conjunto.ruta(fila)
+                escritor.escribir({"ruta": ruta, "nombre": conjunto.nombre(fila),
+                                   "descripcion": conjunto.descripcion(fila), "size": conjunto.size[fila],
+                                   "ctime": _fecha_iso(conjunto.ctime[fila]), "mtime": _fecha_iso(mtimes[fila]),
+                                   "en_uso": detector.en_uso(ruta)})
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        print(f"Simulación: se eliminarían {len(rutas)} archivo(s) ({resultado.bytes} bytes).", file=sys.stderr)
+        return 0
+
+    copias = dict(zip(rutas, (conjunto.fila(f) for f in resultado.filas)))
+    eliminacion = eliminar_en_paralelo(rutas, hilos=args.hilos, en_uso=detector.en_uso)
+    liberados = sum(copias[r].size for r in eliminacion.eliminados)
+    if eliminacion.eliminados:
+        _registrar_historial(copias[r] for r in eliminacion.eliminados)
+    print(f"Eliminados: {len(eliminacion.eliminados)} ({liberados} bytes). Errores: {len(eliminacion.errores)}.",
+          file=sys.stderr)
+    for ruta, motivo in eliminacion.errores:
+        print(f"  {ruta}: {motivo}", file=sys.stderr)
+    return 1 if eliminacion.errores else 0
+
+
+def ejecutar_politicas(args):
+    """
+    Aplica las políticas una vez o, con --cada, de forma periódica (el archivo de políticas se vuelve a leer
+    en cada pasada, así que se puede editar sin reiniciar). Devuelve el código de salida.
+    """
+    from voidclean.politicas import cargar_politicas, ruta_politicas_por_defecto
+
+    ruta_politicas = args.politicas or ruta_politicas_por_defecto()
+    if args.cada:
+        bajar_prioridad()
+
+    while True:
+        try:
+            politicas = cargar_politicas(ruta_politicas)
+            if not politicas:
+                print(f"No hay políticas definidas en {ruta_politicas}.", file=sys.stderr)
+                codigo = 2
+            else:
+                codigo = _pasada_politicas(args, politicas)
+        except (OSError, ValueError) as e:
+            print(f"Error al aplicar las políticas: {e}", file=sys.stderr)
+            codigo = 2
+        if not args.cada:
+            return codigo
+        try:
+            time.sleep(args.cada * 60)
+        except KeyboardInterrupt:
+            return 0
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos. Devuelve el código de salida."""
+    args = crear_parser().parse_args(argv)
+    args.ruta = os.path.abspath(args.ruta)  # Las rutas excluidas (y las del historial) son absolutas.
+    if args.politicas is not None:
+        return ejecutar_politicas(args)
+
+    extensiones = None
+    if args.ext:
+        extensiones = set()
+        for ext in args.ext.split(","):
+            ext = ext.strip().lower()
+            extensiones.add(ext if ext.startswith(".") or not ext else "." + ext)  # Acepta "tmp" y ".tmp".
+    cumple = crear_filtro(extensiones, args.tamano_min, args.tamano_max, args.dias_min, args.nombre)
+
+    # El conjunto de archivos abiertos solo se calcula si hace falta (una vez para todo el escaneo).
+    detector = None
+    if args.estado or args.eliminar:
+        from voidclean.detector_uso import DetectorUso
+        detector = DetectorUso(ttl=float("inf"))
+        detector.actualizar_ahora()
+
+    errores_escaneo = []
+    registros = _escanear(args, errores_escaneo)
+
+    try:
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+        escritor = _EscritorCsv(salida) if args.formato == "csv" else _EscritorJsonl(salida)
+    except OSError as e:
+        return _fallo_salida(args, e)
+
+    encontrados = 0
+    bytes_encontrados = 0
+    eliminados = 0
+    bytes_liberados = 0
+    errores_eliminacion = []
+    pendientes = {}  # ruta -> registro, bloque en espera de eliminarse.
+
+    def eliminar_pendientes():
+        nonlocal eliminados, bytes_liberados
+        resultado = eliminar_en_paralelo(list(pendientes), hilos=args.hilos, en_uso=detector.en_uso)
+        eliminados += len(resultado.eliminados)
+        bytes_liberados += sum(pendientes[r].size for r in resultado.eliminados)
+        errores_eliminacion.extend(resultado.errores)
+        if resultado.eliminados:
+            _registrar_historial(pendientes[r] for r in resultado.eliminados)  # Una transacción por bloque.
+        pendientes.clear()
+
+    try:
+        for registro in registros:
+            if not cumple(registro):
+                continue
+            encontrados += 1
+            bytes_encontrados += registro.size
+            try:
+                escritor.escribir(_fila(registro, detector if args.estado else None))
+            except OSError as e:
+                raise _ErrorSalida() from e
+            if args.eliminar:
+                pendientes[registro.ruta] = registro
+                if len(pendientes) >= TAMANO_BLOQUE_ELIMINACION:
+                    eliminar_pendientes()
+        try:
+            salida.flush()  # Aquí (y no al cerrar) aparece un error de escritura pendiente, como un disco lleno.
+        except OSError as e:
+            raise _ErrorSalida() from e
+        if pendientes:
+            eliminar_pendientes()
+    except _ErrorSalida as e:
+        return _fallo_salida(args, e.__cause__)  # Los archivos aún sin eliminar del bloque pendiente se conservan.
+    except OSError as e:
+        print(f"No se puede acceder a {args.ruta}: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if salida is not sys.stdout:
+            try:
+                salida.close()
+            except OSError:
+                pass  # Ya se informó del error al escribir o vaciar la salida.
+
+    # Resumen por la salida de errores, para no mezclarlo con los datos.
+    print(f"Archivos: {encontrados} ({bytes_encontrados} bytes). No accesibles: {len(errores_escaneo)}.", file=sys.stderr)
+    if args.eliminar:
+        print(f"Eliminados: {eliminados} ({bytes_liberados} bytes). Errores: {len(errores_eliminacion)}.", file=sys.stderr)
+        for ruta, motivo in errores_eliminacion:
+            print(f"  {ruta}: {motivo}", file=sys.stderr)
+    return 1 if errores_eliminacion else 0
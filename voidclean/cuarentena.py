@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Eliminación en modo cuarentena: los archivos se mueven (os.rename en el mismo disco, O(1) por archivo)
+a una carpeta oculta y se borran más tarde en segundo plano, por lotes y con prioridad de E/S baja.
+Mientras no se purguen, la operación se puede deshacer.
+
+Cada operación crea un "lote" (una subcarpeta) con un manifiesto JSON que relaciona cada archivo con su
+ruta original, así que los lotes pendientes se pueden deshacer o purgar incluso después de cerrar el programa.
+"""
+
+import os
+import sys
+import json
+import errno
+import time
+import shutil
+import threading
+from collections import namedtuple
+
+from voidclean.eliminacion import ResultadoEliminacion, motivo_error, INTERVALO_PROGRESO
+
+
+# Lote en cuarentena: su carpeta, el momento en que se creó y {ruta original: ruta en cuarentena}.
+LoteCuarentena = namedtuple("LoteCuarentena", ["carpeta", "momento", "rutas"])
+
+NOMBRE_CARPETA = ".voidcleantempo_cuarentena"
+MANIFIESTO = "manifiesto.json"
+# Archivos que se borran en cada paso de la purga antes de hacer una pausa.
+TAMANO_LOTE_PURGA = 500
+# Pausa (segundos) entre pasos de la purga, para no saturar el disco.
+PAUSA_PURGA = 0.05
+
+
+def carpetas_cuarentena_posibles(temp_path):
+    """
+    Devuelve (junto, dentro): las dos carpetas que puede usar carpeta_cuarentena_para para 'temp_path',
+    sin crearlas. Sirve para excluirlas de un escaneo aunque no se sepa cuál se eligió.
+    """
+    temp_path = os.path.abspath(temp_path)
+    padre, nombre = os.path.split(temp_path.rstrip(os.sep) or temp_path)
+    return os.path.join(padre, f".{nombre}{NOMBRE_CARPETA}"), os.path.join(temp_path, NOMBRE_CARPETA)
+
+
+def carpeta_cuarentena_para(temp_path):
+    """
+    Elige la carpeta de cuarentena para 'temp_path': junto a ella si se puede escribir allí y está en el
+    mismo disco (para que mover sea un simple renombrado); si no, dentro de la propia carpeta TEMP.
+    """
+    temp_path = os.path.abspath(temp_path)
+    junto, dentro = carpetas_cuarentena_posibles(temp_path)
+    try:
+        os.makedirs(junto, exist_ok=True)
+        if os.stat(junto).st_dev == os.stat(temp_path).st_dev:
+            return junto
+        os.rmdir(junto)  # Está en otro disco: no sirve para mover con un simple renombrado.
+    except OSError:
+        pass
+    os.makedirs(dentro, exist_ok=True)
+    return dentro
+
+
+def _bajar_prioridad_es():
+    """
+    Baja la prioridad de E/S del hilo actual (Linux: clase "idle" con psutil). En otros sistemas
+    no se cambia la prioridad y solo se cuenta con las pausas entre pasos de la purga.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            import psutil
+            psutil.Process(threading.get_native_id()).ionice(psutil.IOPRIO_CLASS_IDLE)
+        except Exception:
+            pass  # Sin psutil, sin permisos o sin soporte de ionice: se sigue con la prioridad normal.
+
+
+class Cuarentena:
+    """
+    Carpeta de cuarentena con sus lotes. Ejemplo:
+
+        cuarentena = Cuarentena(temp_path=temp_path)
+        lote, resultado = cuarentena.poner(rutas)
+        cuarentena.deshacer(lote)   # o, más tarde: cuarentena.purgar(lote)
+
+    Con 'carpeta' se usa (y se crea) esa carpeta. Con 'temp_path' no se crea nada hasta el primer lote: entonces
+    se elige la carpeta con carpeta_cuarentena_para, así un volumen en el que no se usa la cuarentena no se toca.
+    """
+
+    def __init__(self, carpeta=None, temp_path=None):
+        self.carpeta = carpeta
+        self.temp_path = temp_path
+        if carpeta is not None:
+            os.makedirs(carpeta, exist_ok=True)
+
+    def carpetas(self):
+        """
+        Carpetas en las que hay (o puede haber) lotes de esta cuarentena, existan o no. Con 'temp_path' son las
+        dos posibles, porque los lotes de una sesión anterior pueden estar en cualquiera de ellas.
+        """
+        return (self.carpeta,) if self.temp_path is None else carpetas_cuarentena_posibles(self.temp_path)
+
+    def crear_carpeta(self):
+        """Elige y crea la carpeta de cuarentena si aún no se hizo (poner la crea sola). Lanza OSError si no se puede."""
+        if self.carpeta is None:
+            self.carpeta = carpeta_cuarentena_para(self.temp_path)
+        return self.carpeta
+
+    def _nueva_carpeta_lote(self):
+        momento = time.time()
+        self.crear_carpeta()
+        base = os.path.join(self.carpeta, f"lote_{int(momento * 1000)}")
+        carpeta, n = base, 1
+        while os.path.exists(carpeta):
+            carpeta, n = f"{base}_{n}", n + 1
+        os.makedirs(carpeta)
+        return carpeta, momento
+
+    def poner(self, rutas, al_progresar=None, cancelacion=None, en_uso=None):
+        """
+        Mueve 'rutas' a un lote nuevo de la cuarentena. Devuelve (LoteCuarentena, ResultadoEliminacion);
+        en el resultado, 'eliminados' son las rutas originales que se movieron. Los parámetros
+        'al_progresar', 'cancelacion' y 'en_uso' funcionan igual que en eliminar_en_paralelo.
+        """
+        rutas = list(rutas)
+        total = len(rutas)
+        carpeta, momento = self._nueva_carpeta_lote()
+        # El manifiesto se escribe antes de mover nada, con el destino previsto de cada archivo: si el programa
+        # se cierra a mitad del lote, los archivos ya movidos se pueden recuperar (ver lotes_pendientes).
+        previstas = {ruta: os.path.join(carpeta, str(i)) for i, ruta in enumerate(rutas)}
+        self._guardar_manifiesto(LoteCuarentena(carpeta, momento, previstas), completo=False)
+        movidas = {}
+        errores = []
+        ultimo_aviso = 0.0
+
+        for i, ruta in enumerate(rutas):
+            if cancelacion is not None and cancelacion.is_set():
+                break
+            if en_uso is not None and en_uso(ruta):
+                errores.append((ruta, "En uso"))
+                continue
+            destino = os.path.join(carpeta, str(i))
+            try:
+                os.rename(ruta, destino)  # Mismo disco: no se copian datos.
+                movidas[ruta] = destino
+            except OSError as e:
+                errores.append((ruta, "Está en otro disco" if e.errno == errno.EXDEV else motivo_error(e)))
+
+            ahora = time.monotonic()
+            if al_progresar is not None and ahora - ultimo_aviso >= INTERVALO_PROGRESO:
+                ultimo_aviso = ahora
+                al_progresar(i + 1, total)
+
+        lote = LoteCuarentena(carpeta, momento, movidas)
+        self._guardar_manifiesto(lote)
+        if al_progresar is not None:
+            al_progresar(total, total)
+        cancelado = cancelacion is not None and cancelacion.is_set()
+        return lote, ResultadoEliminacion(list(movidas), errores, cancelado)
+
+    def _guardar_manifiesto(self, lote, completo=True):
+        # 'completo' es False mientras se mueven los archivos: entonces 'rutas' son los destinos previstos.
+        with open(os.path.join(lote.carpeta, MANIFIESTO), "w", encoding="utf-8") as f:
+            json.dump({"momento": lote.momento, "rutas": lote.rutas, "completo": completo}, f)
+
+    def deshacer(self, lote):
+        """
+        Devuelve los archivos del lote a su ruta original. Devuelve (restauradas, errores), donde errores son
+        tuplas (ruta, motivo); un archivo no se restaura si ya existe otro con la misma ruta.
+        """
+        restauradas = []
+        errores = []
+        for original, destino in lote.rutas.items():
+            if os.path.exists(original):
+                errores.append((original, "Ya existe un archivo con ese nombre"))
+                continue
+            try:
+                os.rename(destino, original)
+                restauradas.append(original)
+            except OSError as e:
+                errores.append((original, motivo_error(e)))
+        if not errores and lote.rutas:  # Un lote sin manifiesto ('rutas' vacío) solo se puede purgar.
+            shutil.rmtree(lote.carpeta, ignore_errors=True)
+        return restauradas, errores
+
+    def purgar(self, lote, tamano_lote=TAMANO_LOTE_PURGA, pausa=PAUSA_PURGA):
+        """
+        Borra definitivamente los archivos del lote, por pasos de 'tamano_lote' con una pausa entre ellos
+        y con prioridad de E/S baja. Pensado para ejecutarse en un hilo en segundo plano.
+        Devuelve el momento (timestamp) en que terminó la purga.
+        """
+        _bajar_prioridad_es()
+        destinos = list(lote.rutas.values())
+        for i in range(0, len(destinos), tamano_lote):
+            for destino in destinos[i:i + tamano_lote]:
+                try:
+                    os.remove(destino)
+                except OSError:
+                    pass  # Ya no existe o no se puede borrar; rmtree lo intentará de nuevo.
+            time.sleep(pausa)
+        shutil.rmtree(lote.carpeta, ignore_errors=True)
+        return time.time()
+
+    def lotes_pendientes(self):
+        """
+        Devuelve los lotes que siguen en la cuarentena (por ejemplo, de una sesión anterior).
+        Si el programa se cerró mientras se llenaba un lote, solo se incluyen los archivos que llegaron a moverse.
+        Un lote sin manifiesto válido se devuelve con 'rutas' vacío: no se puede deshacer, pero sí purgar.
+        """
+        lotes = []
+        for carpeta in self._carpetas_lote():
+            if not os.path.isdir(carpeta):
+                continue
+            try:
+                with open(os.path.join(carpeta, MANIFIESTO), encoding="utf-8") as f:
+                    datos = json.load(f)
+                momento, rutas = datos["momento"], datos["rutas"]
+            except (OSError, ValueError, KeyError, TypeError):
+                try:
+                    lotes.append(LoteCuarentena(carpeta, os.path.getmtime(carpeta), {}))
+                except OSError:
+                    pass  # Se borró mientras tanto.
+                continue
+            if not datos.get("completo", True):
+                rutas = {original: destino for original, destino in rutas.items() if os.path.lexists(destino)}
+            lotes.append(LoteCuarentena(carpeta, momento, rutas))
+        return lotes
+
+    def _carpetas_lote(self):
+        # Ruta de cada entrada de las carpetas de la cuarentena que existen, sin crear ninguna.
+        for base in self.carpetas():
+            try:
+                nombres = sorted(os.listdir(base))
+            except OSError:
+                continue
+            for nombre in nombres:
+                yield os.path.join(base, nombre)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Detección de archivos en uso a partir de la lista de archivos abiertos de todos los procesos (psutil).
+
+En lugar de intentar renombrar cada archivo (una llamada al sistema por archivo, que además en Linux no
+detecta los archivos abiertos), se construye una sola vez el conjunto de rutas abiertas y se consulta
+con una búsqueda en un set. El conjunto se guarda en caché unos segundos y se recalcula en segundo plano.
+"""
+
+import os
+import time
+import threading
+
+import psutil  # Para listar los archivos abiertos por cada proceso.
+
+
+# Segundos durante los que se considera válido el conjunto de archivos abiertos.
+TTL_ARCHIVOS_ABIERTOS = 5.0
+
+
+def _normalizar(ruta):
+    """Normaliza una ruta para compararla (absoluta y, en Windows, sin distinguir mayúsculas)."""
+    return os.path.normcase(os.path.abspath(ruta))
+
+
+def listar_archivos_abiertos():
+    """
+    Devuelve el conjunto de rutas (normalizadas) que algún proceso tiene abiertas.
+    Los procesos a los que no se tiene acceso se omiten.
+    """
+    abiertos = set()
+    for proceso in psutil.process_iter():
+        try:
+            for archivo in proceso.open_files():
+                abiertos.add(_normalizar(archivo.path))
+        except (psutil.Error, OSError):
+            continue  # Proceso terminado o sin permisos.
+    return abiertos
+
+
+class DetectorUso:
+    """
+    Caché del conjunto de archivos abiertos con un tiempo de vida (TTL).
+
+    - en_uso(ruta) devuelve True/False, o None si todavía no se calculó nunca el conjunto.
+    - Si el conjunto está caducado, se recalcula en un hilo en segundo plano y, mientras tanto,
+      se siguen usando los datos anteriores. Al terminar se llama a 'al_actualizar' (si se indicó).
+    """
+
+    def __init__(self, ttl=TTL_ARCHIVOS_ABIERTOS, al_actualizar=None):
+        self.ttl = ttl
+        self.al_actualizar = al_actualizar
+        self._abiertos = None
+        self._momento = 0.0
+        self._calculando = False
+        self._bloqueo = threading.Lock()
+
+    def caducado(self):
+        """Indica si el conjunto no existe todavía o ya superó su tiempo de vida."""
+        return self._abiertos is None or time.monotonic() - self._momento > self.ttl
+
+    def solicitar(self):
+        """Inicia el recálculo en segundo plano si el conjunto está caducado y no se está calculando ya."""
+        with self._bloqueo:
+            if self._calculando or not self.caducado():
+                return
+            self._calculando = True
+        threading.Thread(target=self._calcular, name="DetectorUso", daemon=True).start()
+
+    def _calcular(self):
+        abiertos = listar_archivos_abiertos()
+        with self._bloqueo:
+            self._abiertos = abiertos
+            self._momento = time.monotonic()
+            self._calculando = False
+        if self.al_actualizar is not None:
+            self.al_actualizar()
+
+    def actualizar_ahora(self):
+        """Recalcula el conjunto en el hilo actual si está caducado (para usos sin interfaz)."""
+        if self.caducado():
+            self._abiertos = listar_archivos_abiertos()
+            self._momento = time.monotonic()
+
+    def abiertos_en(self, carpeta):
+        """
+        Devuelve las rutas abiertas (normalizadas) que están dentro de 'carpeta', o None si aún no hay datos.
+        Sirve para marcar de una vez los archivos en uso de un escaneo sin consultar archivo por archivo.
+        """
+        if self.caducado():
+            self.solicitar()
+        abiertos = self._abiertos
+        if abiertos is None:
+            return None
+        prefijo = os.path.join(_normalizar(carpeta), "")
+        return [ruta for ruta in abiertos if ruta.startswith(prefijo)]
+
+    def en_uso(self, ruta):
+        """Indica si 'ruta' está abierta por algún proceso (None si aún no hay datos)."""
+        if self.caducado():
+            self.solicitar()
+        abiertos = self._abiertos
+        if abiertos is None:
+            return None
+        return _normalizar(ruta) in abiertos
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de archivos duplicados por etapas.
+
+1. Se agrupan los archivos por peso: un archivo con un peso único no puede tener copias.
+2. De los que comparten peso se calcula un hash del primer y del último bloque (pocas lecturas por archivo).
+3. Solo los que siguen coincidiendo se leen completos (con mmap los grandes y lecturas de 1 MB el resto).
+
+Las lecturas se hacen en un grupo de hilos (hashlib libera el GIL con bloques grandes) y los hashes se guardan
+en una caché SQLite con clave (dispositivo, inodo, peso, mtime), así que al repetir la búsqueda solo se leen
+los archivos nuevos o modificados. No usa la interfaz gráfica.
+"""
+
+import os
+import mmap
+import time
+import sqlite3
+import hashlib
+from collections import namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from voidclean.indice import directorio_datos_app
+from voidclean.eliminacion import INTERVALO_PROGRESO
+from voidclean.analitica import columnas_vigentes
+
+
+# Bytes que se leen al principio y al final de cada archivo en la etapa de hash parcial.
+TAMANO_BLOQUE_PARCIAL = 64 * 1024
+# Tamaño de cada lectura del hash completo; los archivos mayores se leen con mmap.
+TAMANO_LECTURA = 1024 * 1024
+# Los archivos vacíos (o más pequeños que esto) no se consideran duplicados.
+TAMANO_MINIMO = 1
+# Hilos por defecto: leer es sobre todo espera de disco.
+HILOS_HASH = min(8, (os.cpu_count() or 1) * 2)
+# Días sin ver un archivo tras los que su hash se borra de la caché.
+DIAS_CADUCIDAD_CACHE = 30
+
+# Grupo de archivos idénticos: peso de cada copia, hash del contenido y claves de los archivos
+# (en el mismo orden en que se recibieron). 'desperdicio' es el espacio que ocupan las copias sobrantes.
+GrupoDuplicados = namedtuple("GrupoDuplicados", ["size", "hash", "claves", "desperdicio"])
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER,
+    parcial BLOB, completo BLOB, visto REAL,
+    PRIMARY KEY (dev, inode, size, mtime_ns)
+);
+"""
+
+
+def ruta_cache_por_defecto():
+    """Ruta de la caché de hashes dentro de la carpeta de datos de la aplicación."""
+    return os.path.join(directorio_datos_app(), "hashes.sqlite3")
+
+
+class CacheHashes:
+    """
+    Caché de hashes parciales y completos en SQLite, con clave (dispositivo, inodo, peso, mtime en ns).
+    Si el archivo cambia, cambia su mtime y la entrada anterior simplemente deja de usarse.
+    Solo se usa desde un hilo (el que coordina la búsqueda).
+    """
+
+    def __init__(self, ruta_bd):
+        self.conexion = sqlite3.connect(ruta_bd)
+        self.conexion.executescript(_ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Borra las entradas que no se han visto en mucho tiempo y cierra la conexión."""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM hashes WHERE visto < ?", (time.time() - DIAS_CADUCIDAD_CACHE * 86400,))
+        self.conexion.close()
+
+    def buscar(self, claves):
+        """Devuelve {clave: (parcial, completo)} de las claves que están en la caché (y las marca como vistas)."""
+        encontradas = {}
+        ahora = time.time()
+        with self.conexion:
+            for clave in claves:
+                fila = self.conexion.execute(
+                    "SELECT parcial, completo FROM hashes WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                    clave).fetchone()
+                if fila is not None:
+                    encontradas[clave] = fila
+                    self.conexion.execute(
+                        "UPDATE hashes SET visto = ? WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                        (ahora,) + clave)
+        return encontradas
+
+    def guardar(self, entradas):
+        """Guarda {clave: (parcial, completo)} (completo puede ser None) en una sola transacción."""
+        ahora = time.time()
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO hashes (dev, inode, size, mtime_ns, parcial, completo, visto) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [clave + (parcial, completo, ahora) for clave, (parcial, completo) in entradas.items()])
+
+
+def _nuevo_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_parcial(ruta, size, bloque=TAMANO_BLOQUE_PARCIAL):
+    """Hash del primer y del último bloque del archivo (si cabe en dos bloques, de todo el archivo)."""
+    h = _nuevo_hash()
+    with open(ruta, "rb") as f:
+        h.update(f.read(bloque))
+        if size > bloque:
+            f.seek(max(bloque, size - bloque))
+            h.update(f.read(bloque))
+    return h.digest()
+
+
+def hash_completo(ruta, size, tamano_lectura=TAMANO_LECTURA):
+    """Hash de todo el contenido: con mmap si el archivo es grande y con lecturas de 'tamano_lectura' si no."""
+    h = _nuevo_hash()
+    with open(ruta, "rb") as f:
+        if size > tamano_lectura:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                    for inicio in range(0, len(mapa), tamano_lectura):
+                        h.update(mapa[inicio:inicio + tamano_lectura])
+                return h.digest()
+            except (ValueError, OSError):
+                h = _nuevo_hash()  # mmap no disponible (por ejemplo, sistemas de archivos especiales).
+                f.seek(0)
+        buffer = bytearray(tamano_lectura)
+        vista = memoryview(buffer)
+        while True:
+            leidos = f.readinto(buffer)
+            if not leidos:
+                break
+            h.update(vista[:leidos])
+    return h.digest()
+
+
+def _clave_cache(ruta, size):
+    """(dev, inode, size, mtime_ns) del archivo, o None si ya no existe o cambió de peso."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    if st.st_size != size:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _agrupar(elementos, clave):
+    """Agrupa 'elementos' por 'clave' y devuelve solo los grupos con dos o más elementos."""
+    grupos = defaultdict(list)
+    for elemento in elementos:
+        grupos[clave(elemento)].append(elemento)
+    return [g for g in grupos.values() if len(g) > 1]
+
+
+def candidatos_de_conjunto(conjunto, tamano_minimo=TAMANO_MINIMO):
+    """
+    Devuelve los candidatos (fila, ruta, peso) de un ConjuntoResultados para 'buscar_duplicados': solo los
+    archivos cuyo peso se repite, calculado de forma vectorizada sobre la columna de pesos. Las rutas se
+    construyen solo para esos archivos. Debe llamarse desde el hilo que modifica el conjunto.
+    Lanza ImportError si NumPy no está instalado.
+    """
+    import numpy as np  # Importación diferida, como en el análisis.
+
+    if not len(conjunto):
+        return []
+    numeros, size, _, _ = columnas_vigentes(np, conjunto)
+    _, inversa, cuentas = np.unique(size, return_inverse=True, return_counts=True)
+    mascara = (cuentas[inversa] > 1) & (size >= tamano_minimo)
+    return [(int(f), conjunto.ruta(int(f)), int(p)) for f, p in zip(numeros[mascara], size[mascara])]
+
+
+def buscar_duplicados(candidatos, cache=None, hilos=HILOS_HASH, al_progresar=None, cancelacion=None,
+                      intervalo_progreso=INTERVALO_PROGRESO):
+    """
+    Busca archivos idénticos entre 'candidatos' (iterable de tuplas (clave, ruta, peso); la clave identifica
+    cada archivo para quien llama, por ejemplo su número de fila) y devuelve una lista de GrupoDuplicados
+    ordenada de mayor a menor espacio desperdiciado.
+
+    - cache: CacheHashes opcional para no volver a leer archivos que no cambiaron.
+    - al_progresar(etapa, hechos, total): se llama como mucho cada 'intervalo_progreso' segundos.
+    - cancelacion: threading.Event; si se activa, la búsqueda se detiene y se devuelve una lista vacía.
+    Los archivos que no se pueden leer se omiten.
+    """
+    # Etapa 1: por peso.
+    candidatos = [c for c in candidatos if c[2] >= TAMANO_MINIMO]
+    mismos_pesos = [c for grupo in _agrupar(candidatos, lambda c: c[2]) for c in grupo]
+    if not mismos_pesos:
+        return []
+
+    ultimo_aviso = 0.0
+
+    def avisar(etapa, hechos, total, forzar=False):
+        nonlocal ultimo_aviso
+        ahora = time.monotonic()
+        if al_progresar is not None and (forzar or ahora - ultimo_aviso >= intervalo_progreso):
+            ultimo_aviso = ahora
+            al_progresar(etapa, hechos, total)
+
+    def cancelado():
+        return cancelacion is not None and cancelacion.is_set()
+
+    with ThreadPoolExecutor(max_workers=hilos) as grupo_hilos:
+        # Claves de caché (un stat por archivo, en paralelo) y consulta de la caché de una vez.
+        claves = list(grupo_hilos.map(lambda c: _clave_cache(c[1], c[2]), mismos_pesos))
+        conocidos = cache.buscar([k for k in claves if k is not None]) if cache is not None else {}
+        nuevos = {}  # clave de caché -> [parcial, completo] calculados en esta búsqueda.
+
+        def hashes(clave):
+            return nuevos.get(clave) or list(conocidos.get(clave, (None, None)))
+
+        def calcular(etapa, elementos, funcion, posicion):
+            """Calcula en paralelo el hash 'posicion' (0 parcial, 1 completo) de los elementos que no lo tienen."""
+            pendientes = [(c, k) for c, k in elementos if hashes(k)[posicion] is None]
+            hechos = 0
+            avisar(etapa, 0, len(pendientes), forzar=True)
+            futuros = [(k, grupo_hilos.submit(funcion, c[1], c[2])) for c, k in pendientes]
+            for k, futuro in futuros:
+                if cancelado():
+                    for _, f in futuros:
+                        f.cancel()
+                    return False
+                try:
+                    valor = futuro.result()
+                except OSError:
+                    valor = None  # No se pudo leer: el archivo queda fuera de los grupos.
+                if valor is not None:
+                    entrada = nuevos.setdefault(k, hashes(k))
+                    entrada[posicion] = valor
+                hechos += 1
+                avisar(etapa, hechos, len(pendientes))
+            return True
+
+        # Etapa 2: hash del primer y último bloque de los archivos que comparten peso.
+        # Los enlaces duros (mismo dispositivo e inodo) son el mismo archivo: solo se cuenta el primero.
+        elementos = []
+        inodos = set()
+        for c, k in zip(mismos_pesos, claves):
+            if k is not None and k[:2] not in inodos:
+                inodos.add(k[:2])
+                elementos.append((c, k))
+        if not calcular("parcial", elementos, hash_parcial, 0):
+            return []
+        elementos = [(c, k) for c, k in elementos if hashes(k)[0] is not None]
+        grupos = _agrupar(elementos, lambda e: (e[0][2], hashes(e[1])[0]))
+
+        # Etapa 3: hash completo solo de los que siguen coincidiendo. Si el archivo cabe en los dos bloques
+        # del hash parcial, ese hash ya cubre todo el contenido.
+        por_leer = []
+        for grupo in grupos:
+            for c, k in grupo:
+                if c[2] <= 2 * TAMANO_BLOQUE_PARCIAL:
+                    hashes_k = nuevos.setdefault(k, hashes(k))
+                    hashes_k[1] = hashes_k[1] or hashes_k[0]
+                else:
+                    por_leer.append((c, k))
+        if not calcular("completo", por_leer, hash_completo, 1):
+            return []
+
+    if cache is not None and nuevos:
+        cache.guardar({k: tuple(v) for k, v in nuevos.items()})
+
+    elementos = [e for grupo in grupos for e in grupo if hashes(e[1])[1] is not None]
+    resultado = []
+    for grupo in _agrupar(elementos, lambda e: (e[0][2], hashes(e[1])[1])):
+        size = grupo[0][0][2]
+        resultado.append(GrupoDuplicados(size, hashes(grupo[0][1])[1], [c[0] for c, _ in grupo],
+                                         size * (len(grupo) - 1)))
+    resultado.sort(key=lambda g: g.desperdicio, reverse=True)
+    return resultado
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de eliminación de archivos en paralelo.
+
+Los archivos se reparten en bloques entre un grupo de hilos (os.remove libera el GIL), se informa el progreso
+como mucho unas pocas veces por segundo, se puede cancelar en cualquier momento y se guarda el motivo de
+cada error. No usa la interfaz gráfica: quien lo llama decide cómo mostrar el progreso y el resultado.
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+# Resultado de una eliminación: rutas eliminadas, tuplas (ruta, motivo) con error y si se canceló.
+ResultadoEliminacion = namedtuple("ResultadoEliminacion", ["eliminados", "errores", "cancelado"])
+
+# Hilos por defecto: borrar es sobre todo espera de disco, así que se usan más hilos que núcleos.
+HILOS_ELIMINACION = min(16, (os.cpu_count() or 1) * 2)
+# Archivos que procesa cada tarea del grupo de hilos.
+TAMANO_BLOQUE = 256
+# Segundos mínimos entre dos avisos de progreso.
+INTERVALO_PROGRESO = 0.1
+
+
+def motivo_error(error):
+    """Convierte una excepción de eliminación en un motivo legible."""
+    if isinstance(error, FileNotFoundError):
+        return "Ya no existe"
+    if isinstance(error, PermissionError):
+        return "Permiso denegado o archivo en uso"
+    if isinstance(error, IsADirectoryError):
+        return "Es una carpeta"
+    return error.strerror or str(error)
+
+
+def _eliminar_bloque(rutas, cancelacion, en_uso):
+    """Tarea de cada hilo: elimina un bloque de archivos y devuelve (eliminados, errores)."""
+    eliminados = []
+    errores = []
+    for ruta in rutas:
+        if cancelacion is not None and cancelacion.is_set():
+            break
+        if en_uso is not None and en_uso(ruta):
+            errores.append((ruta, "En uso"))
+            continue
+        try:
+            os.remove(ruta)
+            eliminados.append(ruta)
+        except OSError as e:
+            errores.append((ruta, motivo_error(e)))
+    return eliminados, errores
+
+
+def eliminar_en_paralelo(rutas, hilos=HILOS_ELIMINACION, al_progresar=None, cancelacion=None, en_uso=None,
+                         intervalo_progreso=INTERVALO_PROGRESO, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Elimina los archivos de 'rutas' en un grupo de hilos y devuelve un ResultadoEliminacion.
+
+    - al_progresar(hechos, total): se llama como mucho una vez cada 'intervalo_progreso' segundos
+      (y siempre al final) desde el hilo que ejecuta esta función.
+    - cancelacion: threading.Event opcional; al activarlo se dejan de eliminar archivos lo antes posible.
+    - en_uso(ruta): función opcional; los archivos para los que devuelva True no se eliminan.
+    """
+    rutas = list(rutas)
+    total = len(rutas)
+    eliminados = []
+    errores = []
+    hechos = 0
+    ultimo_aviso = 0.0
+
+    with ThreadPoolExecutor(max_workers=hilos) as grupo:
+        futuros = {grupo.submit(_eliminar_bloque, rutas[i:i + tamano_bloque], cancelacion, en_uso):
+                   min(tamano_bloque, total - i) for i in range(0, total, tamano_bloque)}
+        for futuro in as_completed(futuros):
+            bloque_eliminados, bloque_errores = futuro.result()
+            eliminados.extend(bloque_eliminados)
+            errores.extend(bloque_errores)
+            hechos += futuros[futuro]
+
+            ahora = time.monotonic()
+            if al_progresar is not None and ahora - ultimo_aviso >= intervalo_progreso:
+                ultimo_aviso = ahora
+                al_progresar(hechos, total)
+
+    if al_progresar is not None:
+        al_progresar(total, total)
+    cancelado = cancelacion is not None and cancelacion.is_set()
+    return ResultadoEliminacion(eliminados, errores, cancelado)
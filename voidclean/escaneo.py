@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de escaneo de carpetas basado en os.scandir.
+
+Cada entrada se consulta una sola vez: el tipo (archivo/carpeta) se obtiene de la información
+que el sistema ya devuelve al listar el directorio y el tamaño/fechas salen de un único stat.
+Los resultados se entregan como un generador para no tener que guardar toda la lista en memoria.
+"""
+
+import os  # Para recorrer directorios con scandir.
+from collections import namedtuple  # Para registros ligeros e inmutables.
+
+
+class EscaneoCancelado(Exception):
+    """Se lanza cuando se cancela un escaneo que no puede quedar a medias (por ejemplo, la actualización del índice)."""
+
+
+# Registro con la información de un archivo encontrado.
+# Se usa una namedtuple porque ocupa mucha menos memoria que un diccionario y se crea más rápido.
+RegistroArchivo = namedtuple("RegistroArchivo", ["ruta", "nombre", "size", "ctime", "mtime", "inode", "dev"])
+
+
+def registro_desde_entrada(entrada):
+    """
+    Convierte un os.DirEntry en un RegistroArchivo usando un único stat.
+    En Windows el stat viene cacheado por scandir, así que no hay llamada extra al sistema.
+    """
+    st = entrada.stat()  # Un solo stat por archivo (sigue enlaces, igual que os.path.isfile).
+    return RegistroArchivo(
+        ruta=entrada.path,
+        nombre=entrada.name,
+        size=st.st_size,
+        ctime=st.st_ctime,
+        mtime=st.st_mtime,
+        inode=st.st_ino,
+        dev=st.st_dev,
+    )
+
+
+def escanear_directorio(ruta, errores=None):
+    """
+    Recorre el primer nivel de 'ruta' y va devolviendo un RegistroArchivo por cada archivo.
+    Las carpetas se ignoran. Si se pasa la lista 'errores', se añaden en ella las tuplas
+    (ruta, excepción) de las entradas que no se pudieron leer, en lugar de interrumpir el recorrido.
+    Si no se puede abrir el directorio en sí, se propaga la excepción (OSError).
+    """
+    with os.scandir(ruta) as iterador:
+        for entrada in iterador:
+            try:
+                if entrada.is_file():  # Usa el tipo cacheado por scandir; no hace stat en la mayoría de sistemas.
+                    yield registro_desde_entrada(entrada)
+            except OSError as e:
+                if errores is not None:
+                    errores.append((entrada.path, e))
+
+
+# Información acumulada de una carpeta durante el escaneo recursivo (solo su contenido directo).
+SubtotalCarpeta = namedtuple("SubtotalCarpeta", ["archivos", "bytes", "profundidad"])
+
+# Número de hilos por defecto para el escaneo recursivo.
+# Los stat liberan el GIL, así que conviene usar más hilos que núcleos, pero con un límite.
+HILOS_ESCANEO = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _escanear_una_carpeta(ruta, seguir_enlaces, excluir=frozenset()):
+    """
+    Tarea que ejecuta cada hilo: lista una carpeta y separa archivos y subcarpetas.
+    Las entradas cuya ruta esté en 'excluir' se ignoran.
+    Devuelve (archivos, subcarpetas, errores), donde subcarpetas son tuplas (ruta, (dev, inode)).
+    """
+    archivos = []
+    subcarpetas = []
+    errores = []
+    try:
+        with os.scandir(ruta) as iterador:
+            for entrada in iterador:
+                if entrada.path in excluir:
+                    continue
+                try:
+                    if entrada.is_dir(follow_symlinks=seguir_enlaces):
+                        st = entrada.stat(follow_symlinks=seguir_enlaces)
+                        subcarpetas.append((entrada.path, (st.st_dev, st.st_ino)))
+                    elif entrada.is_file():
+                        archivos.append(registro_desde_entrada(entrada))
+                except OSError as e:
+                    errores.append((entrada.path, e))
+    except OSError as e:
+        errores.append((ruta, e))
+    return archivos, subcarpetas, errores
+
+
+def escanear_recursivo(raiz, profundidad_max=None, hilos=HILOS_ESCANEO, errores=None,
+                       subtotales=None, seguir_enlaces=False, excluir=()):
+    """
+    Recorre 'raiz' y sus subcarpetas en paralelo y va devolviendo un RegistroArchivo por cada archivo.
+
+    - profundidad_max: 0 escanea solo 'raiz', 1 incluye sus subcarpetas directas, etc. None = sin límite.
+    - hilos: tamaño del grupo de hilos; también limita cuántas carpetas se leen a la vez.
+    - errores: lista opcional donde se añaden las tuplas (ruta, excepción) que no se pudieron leer.
+    - subtotales: diccionario opcional que se rellena con {carpeta: SubtotalCarpeta}.
+    - seguir_enlaces: si es True se entra en carpetas enlazadas; las visitadas se recuerdan por
+      (dispositivo, inode) para no entrar dos veces en la misma ni quedar atrapado en un bucle.
+    - excluir: rutas (archivos o carpetas) que no se recorren, por ejemplo la carpeta de cuarentena.
+
+    Si no se puede leer la propia 'raiz' se lanza OSError, igual que escanear_directorio.
+    """
+    # Importación local: solo el modo recursivo necesita el grupo de hilos.
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    excluir = frozenset(excluir)
+    st_raiz = os.stat(raiz)  # Lanza OSError si la raíz no existe o no es accesible.
+    visitadas = {(st_raiz.st_dev, st_raiz.st_ino)}
+    pendientes = [(raiz, 0)]  # Carpetas por leer, con su profundidad.
+    en_curso = {}  # future -> (ruta, profundidad)
+
+    with ThreadPoolExecutor(max_workers=hilos) as grupo:
+        try:
+            while pendientes or en_curso:
+                # Mantiene como máximo 'hilos' carpetas en curso para no acumular resultados en memoria.
+                while pendientes and len(en_curso) < hilos:
+                    ruta, profundidad = pendientes.pop()
+                    en_curso[grupo.submit(_escanear_una_carpeta, ruta, seguir_enlaces, excluir)] = (ruta, profundidad)
+
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    ruta, profundidad = en_curso.pop(futuro)
+                    archivos, subcarpetas, fallos = futuro.result()
+
+                    if fallos and errores is not None:
+                        errores.extend(fallos)
+                    if subtotales is not None:
+                        subtotales[ruta] = SubtotalCarpeta(len(archivos), sum(r.size for r in archivos), profundidad)
+
+                    if profundidad_max is None or profundidad < profundidad_max:
+                        for ruta_sub, clave in subcarpetas:
+                            if clave not in visitadas:  # Protección contra bucles de enlaces.
+                                visitadas.add(clave)
+                                pendientes.append((ruta_sub, profundidad + 1))
+
+                    yield from archivos
+        finally:
+            # Si el consumidor deja de iterar, se cancelan las carpetas que aún no empezaron.
+            for futuro in en_curso:
+                futuro.cancel()
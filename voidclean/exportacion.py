@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de filas en streaming a Excel (.xlsx), CSV o JSON Lines comprimido (.jsonl.gz).
+
+Las filas se escriben a medida que llegan (una sola pasada y memoria acotada): para Excel se usa un libro
+de openpyxl en modo "solo escritura", sin DataFrame intermedio ni reapertura del archivo para ajustar
+columnas. El ancho de cada columna se calcula con las primeras filas, que se guardan en memoria solo
+hasta decidirlo (Excel necesita los anchos antes de la primera fila).
+"""
+
+import csv
+import gzip
+import json
+import time
+from itertools import islice
+
+
+# Filas que se usan para calcular el ancho de las columnas de Excel.
+FILAS_MUESTRA_ANCHO = 1000
+# Ancho máximo de una columna de Excel (en caracteres).
+ANCHO_MAXIMO = 80
+# Segundos mínimos entre dos avisos de progreso.
+INTERVALO_PROGRESO = 0.2
+
+# Formatos admitidos: extensión del archivo -> nombre del formato.
+FORMATOS = {".xlsx": "xlsx", ".csv": "csv", ".jsonl.gz": "jsonl.gz", ".jsonl": "jsonl"}
+
+
+def formato_desde_ruta(ruta):
+    """Deduce el formato de exportación a partir de la extensión del archivo (por defecto, xlsx)."""
+    ruta = ruta.lower()
+    for extension, formato in FORMATOS.items():
+        if ruta.endswith(extension):
+            return formato
+    return "xlsx"
+
+
+def _exportar_xlsx(ruta, columnas, filas, contar):
+    from openpyxl import Workbook  # Importación diferida: solo la necesita la exportación a Excel.
+    from openpyxl.utils import get_column_letter
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+
+    # Ancho de cada columna: el máximo entre el título y las primeras filas, más un margen.
+    muestra = list(islice(filas, FILAS_MUESTRA_ANCHO))
+    anchos = [len(str(c)) for c in columnas]
+    for fila in muestra:
+        for i, valor in enumerate(fila):
+            if valor is not None:
+                anchos[i] = max(anchos[i], len(str(valor)))
+    for i, ancho in enumerate(anchos, start=1):
+        hoja.column_dimensions[get_column_letter(i)].width = min(ancho + 2, ANCHO_MAXIMO)
+
+    hoja.append(list(columnas))
+    for fila in muestra:
+        hoja.append(list(fila))
+        contar()
+    for fila in filas:
+        hoja.append(list(fila))
+        contar()
+    libro.save(ruta)
+
+
+def _exportar_csv(ruta, columnas, filas, contar):
+    # utf-8-sig para que Excel reconozca los acentos al abrir el CSV.
+    with open(ruta, "w", encoding="utf-8-sig", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow(fila)
+            contar()
+
+
+def _exportar_jsonl(ruta, columnas, filas, contar, comprimir):
+    # Nivel de compresión 6: casi el mismo tamaño que el máximo (9) y bastante más rápido.
+    f = gzip.open(ruta, "wt", encoding="utf-8", compresslevel=6) if comprimir else open(ruta, "w", encoding="utf-8")
+    with f:
+        for fila in filas:
+            f.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=str) + "\n")
+            contar()
+
+
+def exportar_filas(ruta, columnas, filas, formato=None, al_progresar=None):
+    """
+    Escribe 'filas' (un iterable de secuencias con un valor por columna) en 'ruta' y devuelve
+    el número de filas escritas. 'formato' es "xlsx", "csv", "jsonl" o "jsonl.gz"; si no se indica,
+    se deduce de la extensión. 'al_progresar(filas_escritas)' se llama como mucho cada INTERVALO_PROGRESO s.
+    """
+    formato = formato or formato_desde_ruta(ruta)
+    filas = iter(filas)
+    escritas = 0
+    ultimo_aviso = 0.0
+
+    def contar():
+        nonlocal escritas, ultimo_aviso
+        escritas += 1
+        if al_progresar is not None:
+            ahora = time.monotonic()
+            if ahora - ultimo_aviso >= INTERVALO_PROGRESO:
+                ultimo_aviso = ahora
+                al_progresar(escritas)
+
+    if formato == "xlsx":
+        _exportar_xlsx(ruta, columnas, filas, contar)
+    elif formato == "csv":
+        _exportar_csv(ruta, columnas, filas, contar)
+    elif formato in ("jsonl", "jsonl.gz"):
+        _exportar_jsonl(ruta, columnas, filas, contar, comprimir=formato == "jsonl.gz")
+    else:
+        raise ValueError(f"Formato de exportación no admitido: {formato}")
+    return escritas
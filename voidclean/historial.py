@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Historial persistente de archivos eliminados en SQLite.
+
+Cada eliminación (desde la interfaz o desde la línea de comandos) añade una fila por archivo, por lotes y en
+una transacción por lote. Hay índices por fecha de eliminación, extensión y peso, así que consultas como
+"archivos más grandes eliminados este mes" solo leen las filas del rango. Para los totales ("bytes liberados
+por semana", por extensión) se mantiene además una tabla con los totales de cada día y extensión, que se
+actualiza en la misma transacción: agruparla cuesta lo mismo con mil que con millones de entradas.
+Las exportaciones leen las filas con un cursor (en streaming), con filtro de fechas.
+
+Las filas solo se modifican en dos casos, ambos de la cuarentena: al purgar un lote se anota la fecha en que
+se borró de verdad, y al deshacer se quitan las filas de los archivos restaurados (ya no están eliminados).
+"""
+
+import os
+import time
+import sqlite3
+from collections import namedtuple
+
+from voidclean.indice import directorio_datos_app
+from voidclean.clasificacion import obtener_extension, get_file_description
+
+
+# Filas que se escriben en cada transacción.
+TAMANO_LOTE_HISTORIAL = 5000
+
+# Periodos de agrupación de 'por_periodo': formato de strftime de SQLite de cada uno.
+PERIODOS = {"dia": "%Y-%m-%d", "semana": "%Y-%W", "mes": "%Y-%m", "anio": "%Y"}
+
+# Archivo eliminado.
+# - fecha: momento de la eliminación (o de su paso a la cuarentena), en segundos desde epoch.
+# - lote: carpeta del lote de cuarentena, o None si se borró directamente.
+# - purgado: momento en que se borró definitivamente (None mientras siga en la cuarentena).
+EntradaHistorial = namedtuple("EntradaHistorial", ["ruta", "nombre", "extension", "descripcion", "size", "ctime",
+                                                   "fecha", "lote", "purgado"])
+
+# Totales de un grupo de entradas (un periodo o una extensión).
+TotalHistorial = namedtuple("TotalHistorial", ["nombre", "archivos", "bytes"])
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eliminados (
+    id INTEGER PRIMARY KEY,
+    ruta TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    ctime REAL,
+    fecha REAL NOT NULL,
+    lote TEXT,
+    purgado REAL
+);
+CREATE INDEX IF NOT EXISTS idx_eliminados_fecha ON eliminados (fecha, size);
+CREATE INDEX IF NOT EXISTS idx_eliminados_extension ON eliminados (extension, fecha);
+CREATE INDEX IF NOT EXISTS idx_eliminados_size ON eliminados (size);
+CREATE INDEX IF NOT EXISTS idx_eliminados_lote ON eliminados (lote) WHERE lote IS NOT NULL;
+CREATE TABLE IF NOT EXISTS totales_diarios (
+    dia TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    archivos INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (dia, extension)
+) WITHOUT ROWID;
+"""
+
+_COLUMNAS = ", ".join(EntradaHistorial._fields)
+
+
+def _dia(momento):
+    """Día (en hora local, "AAAA-MM-DD") de un momento en segundos desde epoch."""
+    return time.strftime("%Y-%m-%d", time.localtime(momento))
+
+
+def ruta_historial_por_defecto():
+    """Ruta del archivo SQLite del historial dentro de la carpeta de datos de la aplicación."""
+    return os.path.join(directorio_datos_app(), "historial.sqlite3")
+
+
+def entradas_desde(archivos, fecha=None, lote=None):
+    """
+    Crea las EntradaHistorial de 'archivos' (objetos con ruta, nombre, size y ctime, como Fila o
+    RegistroArchivo) eliminados en 'fecha' (por defecto, ahora). Sin 'lote', se dan por purgados en esa fecha.
+    """
+    fecha = time.time() if fecha is None else fecha
+    purgado = None if lote is not None else fecha
+    return [EntradaHistorial(a.ruta, a.nombre, obtener_extension(a.nombre), get_file_description(a.nombre),
+                             a.size, a.ctime, fecha, lote, purgado) for a in archivos]
+
+
+def _rango(desde, hasta):
+    """Condición SQL y parámetros para filtrar por fecha (ambos límites son opcionales; 'hasta' no se incluye)."""
+    condiciones, parametros = [], []
+    if desde is not None:
+        condiciones.append("fecha >= ?")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append("fecha < ?")
+        parametros.append(hasta)
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+def _rango_dias(desde, hasta):
+    """Como '_rango', pero sobre la tabla de totales diarios: se cuentan los días completos del rango."""
+    condiciones, parametros = [], []
+    if desde is not None:
+        condiciones.append("dia >= ?")
+        parametros.append(_dia(desde))
+    if hasta is not None:
+        condiciones.append("dia <= ?")
+        parametros.append(_dia(hasta - 1))
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+class HistorialEliminaciones:
+    """
+    Historial de archivos eliminados en SQLite. Se usa como gestor de contexto, con una conexión por hilo:
+
+        with HistorialEliminaciones(ruta_historial_por_defecto()) as historial:
+            historial.registrar(entradas_desde(archivos))
+            semanas = historial.por_periodo("semana", desde=hace_un_anio)
+    """
+
+    def __init__(self, ruta_bd):
+        self.conexion = sqlite3.connect(ruta_bd, timeout=30)
+        # WAL: la interfaz puede consultar el historial mientras otro hilo (o la línea de comandos) escribe.
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")  # Con WAL no arriesga la integridad y escribe mucho más rápido.
+        self.conexion.executescript(_ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self.conexion.close()
+
+    # --- Escritura ---
+
+    def _sumar_totales(self, entradas, signo=1):
+        """Suma (o resta, con signo -1) las entradas a los totales diarios, agrupadas antes en Python."""
+        totales = {}
+        for e in entradas:
+            clave = (_dia(e.fecha), e.extension)
+            archivos, total = totales.get(clave, (0, 0))
+            totales[clave] = (archivos + signo, total + signo * e.size)
+        self.conexion.executemany(
+            "INSERT INTO totales_diarios (dia, extension, archivos, bytes) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (dia, extension) DO UPDATE SET archivos = archivos + excluded.archivos, bytes = bytes + excluded.bytes",
+            [clave + valores for clave, valores in totales.items()])
+
+    def registrar(self, entradas, tamano_lote=TAMANO_LOTE_HISTORIAL):
+        """Añade las EntradaHistorial de 'entradas', en una transacción por cada 'tamano_lote' filas."""
+        entradas = list(entradas)
+        consulta = f"INSERT INTO eliminados ({_COLUMNAS}) VALUES ({', '.join('?' * len(EntradaHistorial._fields))})"
+        for i in range(0, len(entradas), tamano_lote):
+            with self.conexion:
+                self.conexion.executemany(consulta, entradas[i:i + tamano_lote])
+                self._sumar_totales(entradas[i:i + tamano_lote])
+
+    def marcar_purgado(self, lote, momento):
+        """Anota la fecha en que se borraron definitivamente los archivos de un lote de la cuarentena."""
+        with self.conexion:
+            self.conexion.execute("UPDATE eliminados SET purgado = ? WHERE lote = ? AND purgado IS NULL", (momento, lote))
+
+    def quitar_restaurados(self, lote, rutas):
+        """Quita las entradas de los archivos de un lote que se restauraron al deshacer."""
+        rutas = set(rutas)
+        with self.conexion:
+            cursor = self.conexion.execute(f"SELECT id, {_COLUMNAS} FROM eliminados WHERE lote = ?", (lote,))
+            quitadas = [(fila[0], EntradaHistorial(*fila[1:])) for fila in cursor if fila[1] in rutas]
+            self.conexion.executemany("DELETE FROM eliminados WHERE id = ?", ((i,) for i, _ in quitadas))
+            self._sumar_totales((e for _, e in quitadas), signo=-1)
+
+    # --- Consultas ---
+
+    def vacio(self):
+        """Indica si el historial no tiene ninguna entrada."""
+        return self.conexion.execute("SELECT 1 FROM eliminados LIMIT 1").fetchone() is None
+
+    def resumen(self, desde=None, hasta=None):
+        """Devuelve (archivos, bytes) eliminados entre 'desde' y 'hasta' (segundos desde epoch)."""
+        where, parametros = _rango(desde, hasta)
+        archivos, total = self.conexion.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM eliminados{where}", parametros).fetchone()
+        return archivos, total
+
+    def por_periodo(self, periodo="semana", desde=None, hasta=None):
+        """
+        Devuelve una lista de TotalHistorial por periodo ("dia", "semana", "mes" o "anio", en hora local),
+        del más reciente al más antiguo. Se calcula con los totales diarios (días completos del rango).
+        """
+        where, parametros = _rango_dias(desde, hasta)
+        cursor = self.conexion.execute(
+            f"SELECT strftime(?, dia) AS p, SUM(archivos), SUM(bytes) FROM totales_diarios{where} "
+            "GROUP BY p HAVING SUM(archivos) > 0 ORDER BY p DESC", [PERIODOS[periodo]] + parametros)
+        return [TotalHistorial(*fila) for fila in cursor]
+
+    def por_extension(self, desde=None, hasta=None):
+        """Devuelve una lista de TotalHistorial por extensión, de mayor a menor peso (días completos del rango)."""
+        where, parametros = _rango_dias(desde, hasta)
+        cursor = self.conexion.execute(
+            f"SELECT extension, SUM(archivos), SUM(bytes) AS total FROM totales_diarios{where} "
+            "GROUP BY extension HAVING SUM(archivos) > 0 ORDER BY total DESC", parametros)
+        return [TotalHistorial(*fila) for fila in cursor]
+
+    def mayores(self, desde=None, hasta=None, limite=20):
+        """Devuelve las EntradaHistorial de los 'limite' archivos más grandes eliminados en el rango de fechas."""
+        where, parametros = _rango(desde, hasta)
+        # Con un rango de fechas se recorre ese rango del índice (fecha, peso) y se ordena solo lo que queda;
+        # "+size" evita que SQLite elija recorrer el índice de peso entero buscando filas del rango.
+        orden = "+size" if where else "size"
+        cursor = self.conexion.execute(
+            f"SELECT {_COLUMNAS} FROM eliminados{where} ORDER BY {orden} DESC LIMIT ?", parametros + [limite])
+        return [EntradaHistorial(*fila) for fila in cursor]
+
+    def entradas(self, desde=None, hasta=None, extensiones=None):
+        """
+        Devuelve (como generador) las EntradaHistorial del rango de fechas, de la más antigua a la más reciente,
+        opcionalmente solo de las 'extensiones' indicadas. Se leen con un cursor, sin cargar el historial en memoria.
+        """
+        where, parametros = _rango(desde, hasta)
+        if extensiones:
+            extensiones = sorted(extensiones)
+            where += (" AND " if where else " WHERE ") + f"extension IN ({', '.join('?' * len(extensiones))})"
+            parametros += extensiones
+        cursor = self.conexion.execute(f"SELECT {_COLUMNAS} FROM eliminados{where} ORDER BY fecha, id", parametros)
+        for fila in cursor:
+            yield EntradaHistorial(*fila)
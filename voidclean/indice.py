@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de escaneos en SQLite con actualizaciones incrementales.
+
+Se guarda, por cada carpeta, su fecha de modificación (mtime) y, por cada archivo, su inode, peso y fechas.
+Al volver a escanear, las carpetas cuyo mtime no cambió se toman del índice sin listarlas: en ellas no se
+creó, borró ni renombró ningún archivo. Solo las carpetas modificadas se vuelven a leer, y se informa
+qué archivos se agregaron, eliminaron o cambiaron.
+
+Nota: modificar el contenido de un archivo existente no cambia el mtime de su carpeta, así que 'actualizar'
+no ve un cambio de peso "en el sitio" hasta que la carpeta vuelve a modificarse. Por eso el modo vigilancia usa
+'actualizar_carpetas', que relee enteras (con un stat por archivo) solo las carpetas de las que avisó.
+"""
+
+import os
+import hashlib
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from voidclean.escaneo import RegistroArchivo, SubtotalCarpeta, HILOS_ESCANEO, EscaneoCancelado, _escanear_una_carpeta
+
+
+# Resultado de una actualización: registros nuevos, rutas desaparecidas y registros que cambiaron.
+Cambios = namedtuple("Cambios", ["agregados", "eliminados", "modificados"])
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS carpetas (
+    ruta TEXT PRIMARY KEY,
+    raiz TEXT NOT NULL,
+    mtime_ns INTEGER,
+    profundidad INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subcarpetas (
+    padre TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    dev INTEGER,
+    inode INTEGER,
+    PRIMARY KEY (padre, ruta)
+);
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta TEXT PRIMARY KEY,
+    raiz TEXT NOT NULL,
+    carpeta TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    ctime REAL NOT NULL,
+    mtime REAL NOT NULL,
+    inode INTEGER,
+    dev INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_carpetas_raiz ON carpetas (raiz);
+CREATE INDEX IF NOT EXISTS idx_archivos_carpeta ON archivos (carpeta);
+CREATE INDEX IF NOT EXISTS idx_archivos_raiz ON archivos (raiz);
+"""
+
+
+def directorio_datos_app():
+    """
+    Devuelve (y crea si hace falta) la carpeta de datos de la aplicación del usuario:
+    %LOCALAPPDATA%\\VoidCleanTempo en Windows y ~/.cache/voidcleantempo (o $XDG_CACHE_HOME) en el resto.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        carpeta = os.path.join(base, "VoidCleanTempo")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        carpeta = os.path.join(base, "voidcleantempo")
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def ruta_indice_por_defecto(punto_montaje=None):
+    """
+    Ruta del archivo SQLite del índice dentro de la carpeta de datos de la aplicación. Con 'punto_montaje' se usa
+    un archivo por volumen, así los volúmenes que se escanean a la vez no esperan unos a otros para escribir.
+    """
+    if punto_montaje is None:
+        return os.path.join(directorio_datos_app(), "indice.sqlite3")
+    clave = hashlib.sha1(os.path.normcase(punto_montaje).encode("utf-8", "surrogatepass")).hexdigest()[:12]
+    return os.path.join(directorio_datos_app(), f"indice-{clave}.sqlite3")
+
+
+def _profundidad_en(raiz, ruta):
+    """Profundidad de la carpeta 'ruta' dentro de 'raiz' (0 = la propia raíz), o None si no está dentro."""
+    try:
+        relativa = os.path.relpath(ruta, raiz)
+    except ValueError:
+        return None  # En Windows, otra unidad.
+    if relativa == os.curdir:
+        return 0
+    if relativa == os.pardir or relativa.startswith(os.pardir + os.sep):
+        return None
+    return relativa.count(os.sep) + 1
+
+
+def _rango_arbol(ruta):
+    """
+    Límites (desde, hasta) de las rutas que están dentro de 'ruta': en el orden de SQLite (por bytes) son las que
+    empiezan por "ruta/" y quedan antes de "ruta0" (el carácter siguiente al separador), así que se usa el índice.
+    """
+    return ruta + os.sep, ruta + chr(ord(os.sep) + 1)
+
+
+def _stat_carpeta(ruta):
+    """stat de una carpeta; devuelve la excepción en lugar de lanzarla para poder usarse con map()."""
+    try:
+        return os.stat(ruta)
+    except OSError as e:
+        return e
+
+
+class IndiceEscaneo:
+    """
+    Índice de archivos en SQLite. Se usa como gestor de contexto:
+
+        with IndiceEscaneo(ruta_indice_por_defecto()) as indice:
+            cambios = indice.actualizar(temp_path)
+            for registro in indice.registros(temp_path):
+                ...
+    """
+
+    def __init__(self, ruta_bd):
+        self.conexion = sqlite3.connect(ruta_bd)
+        self.conexion.executescript(_ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self.conexion.close()
+
+    # --- Lectura ---
+
+    def registros(self, raiz):
+        """Devuelve (como generador) los RegistroArchivo guardados para 'raiz'."""
+        cursor = self.conexion.execute(
+            "SELECT ruta, nombre, size, ctime, mtime, inode, dev FROM archivos WHERE raiz = ?", (raiz,))
+        for fila in cursor:
+            yield RegistroArchivo(*fila)
+
+    def subtotales(self, raiz):
+        """Devuelve {carpeta: SubtotalCarpeta} con el número de archivos y bytes de cada carpeta de 'raiz'."""
+        cursor = self.conexion.execute(
+            "SELECT c.ruta, COUNT(a.ruta), COALESCE(SUM(a.size), 0), c.profundidad "
+            "FROM carpetas c LEFT JOIN archivos a ON a.carpeta = c.ruta "
+            "WHERE c.raiz = ? GROUP BY c.ruta", (raiz,))
+        return {ruta: SubtotalCarpeta(n, total, prof) for ruta, n, total, prof in cursor}
+
+    # --- Actualización incremental ---
+
+    def actualizar(self, raiz, profundidad_max=None, hilos=HILOS_ESCANEO, errores=None, seguir_enlaces=False,
+                   excluir=(), cancelacion=None):
+        """
+        Sincroniza el índice con el disco y devuelve los Cambios encontrados.
+
+        Recorre el árbol por niveles: las carpetas de cada nivel se consultan (stat) en paralelo y solo
+        las que cambiaron de mtime (o no estaban en el índice) se vuelven a listar, también en paralelo.
+        Las carpetas que ya no existen o quedan fuera de 'profundidad_max' se quitan del índice.
+        Las rutas de 'excluir' (por ejemplo, la carpeta de cuarentena) no se recorren.
+        Si se activa 'cancelacion' (threading.Event) se lanza EscaneoCancelado y el índice queda como estaba.
+        Si no se puede leer la propia 'raiz' se lanza OSError.
+        """
+        excluir = frozenset(excluir)
+        os.stat(raiz)  # Lanza OSError si la raíz no existe o no es accesible.
+        bd = self.conexion
+        anteriores = dict(bd.execute("SELECT ruta, mtime_ns FROM carpetas WHERE raiz = ?", (raiz,)))
+        agregados, eliminados, modificados = [], [], []
+        vistas = set()  # Carpetas visitadas en esta pasada.
+        claves_vistas = set()  # (dispositivo, inode) de las carpetas visitadas, contra bucles de enlaces.
+        nivel = [(raiz, 0)]
+
+        with bd, ThreadPoolExecutor(max_workers=hilos) as grupo:  # Una sola transacción para toda la pasada.
+            while nivel:
+                if cancelacion is not None and cancelacion.is_set():
+                    raise EscaneoCancelado()  # Sale de la transacción sin guardar nada.
+                siguiente = []
+                por_listar = []
+
+                for (ruta, profundidad), st in zip(nivel, grupo.map(_stat_carpeta, [r for r, _ in nivel])):
+                    if isinstance(st, OSError):
+                        if ruta == raiz:
+                            raise st
+                        if errores is not None:
+                            errores.append((ruta, st))
+                        continue  # Al no marcarse como vista, se quita del índice al final.
+                    clave = (st.st_dev, st.st_ino)
+                    if clave in claves_vistas:
+                        continue
+                    claves_vistas.add(clave)
+                    vistas.add(ruta)
+
+                    if anteriores.get(ruta) == st.st_mtime_ns:
+                        # Carpeta sin cambios: sus subcarpetas se leen del índice, sin listar el disco.
+                        hijos = bd.execute("SELECT ruta FROM subcarpetas WHERE padre = ?", (ruta,))
+                        if profundidad_max is None or profundidad < profundidad_max:
+                            siguiente.extend((hijo, profundidad + 1) for (hijo,) in hijos if hijo not in excluir)
+                    else:
+                        por_listar.append((ruta, profundidad, st.st_mtime_ns))
+
+                # Las carpetas modificadas se listan en paralelo y se comparan con lo guardado.
+                listados = grupo.map(lambda t: _escanear_una_carpeta(t[0], seguir_enlaces, excluir), por_listar)
+                for (ruta, profundidad, mtime_ns), (archivos, subcarpetas, fallos) in zip(por_listar, listados):
+                    if fallos and errores is not None:
+                        errores.extend(fallos)
+                    # Si la carpeta no se pudo listar por completo, se guarda sin mtime para releerla la próxima vez.
+                    listada_entera = not any(r == ruta for r, _ in fallos)
+                    self._sincronizar_carpeta(raiz, ruta, profundidad, mtime_ns if listada_entera else None,
+                                              archivos, subcarpetas, agregados, eliminados, modificados)
+                    if profundidad_max is None or profundidad < profundidad_max:
+                        siguiente.extend((hijo, profundidad + 1) for hijo, _ in subcarpetas)
+
+                nivel = siguiente
+
+            # Quita del índice las carpetas que ya no existen o quedaron fuera del límite de profundidad.
+            for ruta in set(anteriores) - vistas:
+                eliminados.extend(r for (r,) in bd.execute("SELECT ruta FROM archivos WHERE carpeta = ?", (ruta,)))
+                bd.execute("DELETE FROM archivos WHERE carpeta = ?", (ruta,))
+                bd.execute("DELETE FROM subcarpetas WHERE padre = ?", (ruta,))
+                bd.execute("DELETE FROM carpetas WHERE ruta = ?", (ruta,))
+
+        return Cambios(agregados, eliminados, modificados)
+
+    def actualizar_carpetas(self, raiz, carpetas, profundidad_max=None, hilos=HILOS_ESCANEO, errores=None, excluir=()):
+        """
+        Vuelve a leer solo las 'carpetas' de 'raiz' (por ejemplo, las que avisó el modo vigilancia) y devuelve
+        los Cambios encontrados.
+
+        A diferencia de 'actualizar', no se fía del mtime de las carpetas: cada una se lista entera con un stat
+        por archivo, así que también se detectan los archivos reescritos en el sitio (otro peso o fecha sin que
+        cambie su carpeta). Las subcarpetas nuevas se recorren enteras (hasta 'profundidad_max') y las que ya no
+        existen se quitan del índice con todo su contenido. Las carpetas que no están dentro de 'raiz', que
+        están en 'excluir' o que superan 'profundidad_max' se ignoran. Si no se puede leer la propia 'raiz'
+        se lanza OSError.
+        """
+        excluir = frozenset(excluir)
+        bd = self.conexion
+        agregados, eliminados, modificados = [], [], []
+        vistas = set()
+
+        nivel = []
+        for carpeta in carpetas:
+            profundidad = _profundidad_en(raiz, carpeta)
+            if profundidad is None or (profundidad_max is not None and profundidad > profundidad_max):
+                continue
+            if any(carpeta == e or carpeta.startswith(os.path.join(e, "")) for e in excluir):
+                continue
+            nivel.append((carpeta, profundidad))
+
+        with bd, ThreadPoolExecutor(max_workers=hilos) as grupo:  # Una sola transacción para todo el aviso.
+            while nivel:
+                nivel = [(ruta, profundidad) for ruta, profundidad in dict(nivel).items() if ruta not in vistas]
+                vistas.update(ruta for ruta, _ in nivel)
+                siguiente = []
+                por_listar = []
+
+                for (ruta, profundidad), st in zip(nivel, grupo.map(_stat_carpeta, [r for r, _ in nivel])):
+                    if isinstance(st, OSError):
+                        if ruta == raiz:
+                            raise st
+                        self._quitar_arbol(ruta, eliminados)  # Se borró (o se movió) después del aviso.
+                        continue
+                    por_listar.append((ruta, profundidad, st.st_mtime_ns))
+
+                listados = grupo.map(lambda t: _escanear_una_carpeta(t[0], False, excluir), por_listar)
+                for (ruta, profundidad, mtime_ns), (archivos, subcarpetas, fallos) in zip(por_listar, listados):
+                    if fallos and errores is not None:
+                        errores.extend(fallos)
+                    previas = {r for (r,) in bd.execute("SELECT ruta FROM subcarpetas WHERE padre = ?", (ruta,))}
+                    listada_entera = not any(r == ruta for r, _ in fallos)
+                    self._sincronizar_carpeta(raiz, ruta, profundidad, mtime_ns if listada_entera else None,
+                                              archivos, subcarpetas, agregados, eliminados, modificados)
+                    actuales = {hijo for hijo, _ in subcarpetas}
+                    for hijo in previas - actuales:
+                        self._quitar_arbol(hijo, eliminados)
+                    # Solo se entra en las subcarpetas que el índice no conocía; las demás se releen si avisan.
+                    if profundidad_max is None or profundidad < profundidad_max:
+                        siguiente.extend((hijo, profundidad + 1) for hijo in actuales
+                                         if bd.execute("SELECT 1 FROM carpetas WHERE ruta = ?", (hijo,)).fetchone() is None)
+
+                nivel = siguiente
+
+        return Cambios(agregados, eliminados, modificados)
+
+    def _quitar_arbol(self, ruta, eliminados):
+        """Quita del índice la carpeta 'ruta' con todas sus subcarpetas y archivos (añadidos a 'eliminados')."""
+        bd = self.conexion
+        rango = (ruta,) + _rango_arbol(ruta)
+        eliminados.extend(r for (r,) in bd.execute(
+            "SELECT ruta FROM archivos WHERE carpeta = ? OR (carpeta >= ? AND carpeta < ?)", rango))
+        bd.execute("DELETE FROM archivos WHERE carpeta = ? OR (carpeta >= ? AND carpeta < ?)", rango)
+        bd.execute("DELETE FROM subcarpetas WHERE padre = ? OR (padre >= ? AND padre < ?)", rango)
+        bd.execute("DELETE FROM subcarpetas WHERE ruta = ?", (ruta,))
+        bd.execute("DELETE FROM carpetas WHERE ruta = ? OR (ruta >= ? AND ruta < ?)", rango)
+
+    def _sincronizar_carpeta(self, raiz, ruta, profundidad, mtime_ns, archivos, subcarpetas,
+                             agregados, eliminados, modificados):
+        """
+        Compara el listado actual de una carpeta con el índice y guarda las diferencias.
+        """
+        bd = self.conexion
+        guardados = {fila[0]: fila[1:] for fila in bd.execute(
+            "SELECT ruta, size, mtime, inode FROM archivos WHERE carpeta = ?", (ruta,))}
+
+        nuevos = []
+        for registro in archivos:
+            previo = guardados.pop(registro.ruta, None)
+            if previo is None:
+                agregados.append(registro)
+            elif previo != (registro.size, registro.mtime, registro.inode):
+                modificados.append(registro)
+            else:
+                continue
+            nuevos.append((registro.ruta, raiz, ruta, registro.nombre, registro.size,
+                           registro.ctime, registro.mtime, registro.inode, registro.dev))
+
+        # Lo que queda en 'guardados' ya no está en la carpeta.
+        if guardados:
+            eliminados.extend(guardados)
+            bd.executemany("DELETE FROM archivos WHERE ruta = ?", ((r,) for r in guardados))
+        bd.executemany("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", nuevos)
+
+        bd.execute("DELETE FROM subcarpetas WHERE padre = ?", (ruta,))
+        bd.executemany("INSERT INTO subcarpetas VALUES (?, ?, ?, ?)",
+                       ((ruta, hijo, dev, inode) for hijo, (dev, inode) in subcarpetas))
+        bd.execute("INSERT OR REPLACE INTO carpetas VALUES (?, ?, ?, ?)", (ruta, raiz, mtime_ns, profundidad))
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Medición por fases de las operaciones largas (escaneo, eliminación, exportaciones).
+
+Cada operación crea un objeto Metricas y envuelve sus fases (leer el disco, convertir a columnas, ordenar,
+dibujar la lista, escribir el archivo...) en 'fase'. Se anota el tiempo de reloj, cuántas veces se ejecutó
+la fase, cuántos elementos procesó y la memoria máxima del proceso (RSS pico) al terminarla. Al final la
+operación se añade como una línea JSON al archivo de métricas, así se puede ver qué fase se volvió lenta.
+
+Opcionalmente se guarda además un perfil de cProfile de cada operación (del hilo que la ejecuta), para
+abrirlo con pstats o snakeviz. Desde la interfaz se activa con variables de entorno:
+
+    VOIDCLEANTEMPO_METRICAS=/ruta/metricas.jsonl   archivo de métricas (por defecto, en la carpeta de datos)
+    VOIDCLEANTEMPO_PERFIL=/ruta/carpeta            guarda un .prof por operación en esa carpeta
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import psutil  # Memoria máxima del proceso en Windows.
+
+from voidclean.indice import directorio_datos_app
+
+
+# Tamaño a partir del cual el archivo de métricas se renombra a "<archivo>.1" y se empieza otro.
+TAMANO_MAXIMO_METRICAS = 5 * 1024 * 1024
+
+
+def ruta_metricas_por_defecto():
+    """Archivo de métricas: el de VOIDCLEANTEMPO_METRICAS o "metricas.jsonl" en la carpeta de datos de la aplicación."""
+    return os.environ.get("VOIDCLEANTEMPO_METRICAS") or os.path.join(directorio_datos_app(), "metricas.jsonl")
+
+
+def carpeta_perfil_por_defecto():
+    """Carpeta donde guardar los perfiles de cProfile (VOIDCLEANTEMPO_PERFIL), o None si no se piden."""
+    return os.environ.get("VOIDCLEANTEMPO_PERFIL") or None
+
+
+def memoria_pico():
+    """Memoria máxima (en bytes) que ha ocupado el proceso desde que empezó: RSS pico (en Windows, peak working set)."""
+    if os.name == "nt":
+        return getattr(psutil.Process().memory_info(), "peak_wset", 0)
+    import resource  # Solo existe en sistemas tipo Unix.
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024  # En Linux ru_maxrss está en KB.
+
+
+class Metricas:
+    """
+    Tiempos, elementos y memoria de cada fase de una operación:
+
+        metricas = Metricas("escaneo", raices=3)
+        with metricas.perfilar():              # Solo perfila si se indicó una carpeta de perfiles.
+            with metricas.fase("ordenar", len(conjunto)):
+                conjunto.ordenar("peso_mayor")
+        metricas.terminar(elementos=len(conjunto))
+        metricas.guardar(ruta_metricas_por_defecto())
+
+    Una fase se puede repetir (por ejemplo, una vez por lote): se suman el tiempo, las veces y los elementos.
+    Se puede usar desde varios hilos a la vez. En cada fase se guarda 'memoria_pico' (la memoria máxima del
+    proceso al terminarla) y 'aumento_pico' (cuánto subió ese máximo durante la fase).
+    """
+
+    def __init__(self, operacion, perfil=None, **datos):
+        self.operacion = operacion
+        self.datos = datos  # Información adicional de la operación (número de raíces, formato...).
+        self.carpeta_perfil = perfil
+        self.perfiles = []  # Archivos .prof guardados.
+        self.fases = {}
+        self.elementos = 0
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self._segundos = None
+        self._bloqueo = threading.Lock()
+
+    def _fase(self, nombre):
+        return self.fases.setdefault(nombre, {"segundos": 0.0, "veces": 0, "elementos": 0,
+                                              "memoria_pico": 0, "aumento_pico": 0})
+
+    @contextmanager
+    def fase(self, nombre, elementos=0):
+        """Mide el bloque 'with' como una ejecución de la fase 'nombre' que procesa 'elementos'."""
+        pico = memoria_pico()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.anotar(nombre, time.perf_counter() - inicio, elementos, pico)
+
+    def anotar(self, nombre, segundos, elementos=0, pico_inicial=None):
+        """Suma una ejecución ya medida a la fase 'nombre' (para tiempos que no caben en un bloque 'with')."""
+        pico = memoria_pico()
+        with self._bloqueo:
+            f = self._fase(nombre)
+            f["segundos"] += segundos
+            f["veces"] += 1
+            f["elementos"] += elementos
+            f["memoria_pico"] = max(f["memoria_pico"], pico)
+            if pico_inicial is not None:
+                f["aumento_pico"] += max(0, pico - pico_inicial)
+
+    def contar(self, nombre, elementos):
+        """Suma 'elementos' a la fase 'nombre' sin contar otra ejecución (cuando el total se sabe al final)."""
+        with self._bloqueo:
+            self._fase(nombre)["elementos"] += elementos
+
+    def medir_iteracion(self, nombre, iterable):
+        """
+        Recorre 'iterable' (como generador) y anota en la fase 'nombre' solo el tiempo que se pasa dentro de él,
+        por ejemplo, generando las filas de una exportación mientras otro código las escribe.
+        """
+        reloj = time.perf_counter
+        pico = memoria_pico()
+        total = 0.0
+        cantidad = 0
+        iterador = iter(iterable)
+        try:
+            while True:
+                inicio = reloj()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    total += reloj() - inicio
+                    return
+                total += reloj() - inicio
+                cantidad += 1
+                yield elemento
+        finally:
+            self.anotar(nombre, total, cantidad, pico)
+
+    @contextmanager
+    def perfilar(self):
+        """
+        Perfila con cProfile el bloque 'with' (solo el hilo actual) y guarda el resultado en la carpeta de perfiles
+        como "<operación>-<fecha>-<hilo>.prof". Sin carpeta de perfiles no hace nada.
+        """
+        if not self.carpeta_perfil:
+            yield
+            return
+        import cProfile  # Importación diferida: solo se necesita al perfilar.
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:  # Ya hay otro perfilador activo (Python 3.12+ admite uno a la vez).
+            yield
+            return
+        try:
+            yield
+        finally:
+            perfil.disable()
+            os.makedirs(self.carpeta_perfil, exist_ok=True)
+            nombre = f"{self.operacion}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.inicio))}-{threading.get_ident()}.prof"
+            ruta = os.path.join(self.carpeta_perfil, nombre)
+            perfil.dump_stats(ruta)
+            with self._bloqueo:
+                self.perfiles.append(ruta)
+
+    def terminar(self, elementos=None):
+        """Fija la duración total de la operación (y, si se indica, el número de elementos que procesó)."""
+        self._segundos = time.perf_counter() - self._t0
+        if elementos is not None:
+            self.elementos = elementos
+
+    def resumen(self):
+        """Devuelve las métricas como un diccionario listo para JSON."""
+        segundos = self._segundos if self._segundos is not None else time.perf_counter() - self._t0
+        with self._bloqueo:
+            fases = {nombre: dict(f, segundos=round(f["segundos"], 6)) for nombre, f in self.fases.items()}
+            perfiles = list(self.perfiles)
+        return {
+            "operacion": self.operacion,
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+            "segundos": round(segundos, 6),
+            "elementos": self.elementos,
+            "memoria_pico": memoria_pico(),
+            "fases": fases,
+            "datos": self.datos,
+            "perfiles": perfiles,
+        }
+
+    def guardar(self, ruta):
+        """
+        Añade el resumen como una línea al archivo JSON Lines 'ruta' y lo devuelve. Si el archivo pasa de
+        TAMANO_MAXIMO_METRICAS, antes se renombra a "<ruta>.1" (se conserva solo el anterior).
+        Lanza OSError si no se puede escribir.
+        """
+        resumen = self.resumen()
+        try:
+            if os.path.getsize(ruta) > TAMANO_MAXIMO_METRICAS:
+                os.replace(ruta, ruta + ".1")
+        except FileNotFoundError:
+            pass
+        with open(ruta, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen, ensure_ascii=False) + "\n")
+        return resumen
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Políticas de limpieza automática guardadas en un archivo de configuración (JSON).
+
+Cada política describe un grupo de archivos que se pueden eliminar, por ejemplo:
+
+    {"politicas": [
+        {"nombre": "Temporales y volcados antiguos", "extensiones": [".tmp", ".dmp"], "dias_min": 7},
+        {"nombre": "Archivos enormes", "tamano_min": "1G"},
+        {"nombre": "Registros antiguos", "extensiones": [".log"], "conservar_recientes": 5}
+    ]}
+
+Las condiciones de una política se combinan con "y"; un archivo se elimina si cumple alguna política.
+Las políticas se evalúan con filtros vectorizados de NumPy sobre las columnas de ConjuntoResultados,
+sin recorrer los archivos uno por uno en Python. Los archivos en uso nunca se seleccionan.
+"""
+
+import os
+import re
+import json
+import time
+import fnmatch
+from collections import namedtuple
+
+from voidclean.indice import directorio_datos_app
+from voidclean.analitica import columnas_vigentes
+
+
+# Campos de una política. Los que valen None no se aplican.
+# - extensiones: lista de extensiones ("" = sin extensión).
+# - dias_min: antigüedad mínima en días (por fecha de creación).
+# - tamano_min / tamano_max: peso en bytes (en el archivo se aceptan textos como "10M" o "1G").
+# - patron: patrón glob sobre el nombre del archivo.
+# - conservar_recientes: de los archivos que cumplen lo anterior, conserva los N más recientes de cada
+#   prefijo (nombre sin números ni extensión, en la misma carpeta), por ejemplo los N últimos "app-*.log".
+Politica = namedtuple("Politica", ["nombre", "extensiones", "dias_min", "tamano_min", "tamano_max", "patron",
+                                   "conservar_recientes"])
+
+# Resultado de evaluar las políticas: números de fila a eliminar, su peso total y, por cada política,
+# (nombre, archivos, bytes). Un archivo que cumple varias políticas cuenta en todas ellas, pero una sola vez en el total.
+ResultadoPoliticas = namedtuple("ResultadoPoliticas", ["filas", "bytes", "por_politica"])
+
+# Políticas que se escriben como ejemplo la primera vez (el archivo se puede editar después).
+POLITICAS_EJEMPLO = {
+    "politicas": [
+        {"nombre": "Temporales y volcados de más de 7 días", "extensiones": [".tmp", ".temp", ".dmp"], "dias_min": 7},
+        {"nombre": "Archivos de más de 1 GB", "tamano_min": "1G"},
+        {"nombre": "Registros: conservar los 5 más recientes de cada programa", "extensiones": [".log"],
+         "conservar_recientes": 5},
+    ]
+}
+
+# Final del nombre que se ignora para agrupar por prefijo: números, fechas, separadores.
+_FINAL_VARIABLE = re.compile(r"[\d\s._-]+$")
+
+
+def ruta_politicas_por_defecto():
+    """Ruta del archivo de políticas dentro de la carpeta de datos de la aplicación."""
+    return os.path.join(directorio_datos_app(), "politicas.json")
+
+
+def leer_tamano(texto):
+    """Convierte textos como '500', '10K', '2M' o '1G' (o un número) en bytes."""
+    if isinstance(texto, (int, float)):
+        return int(texto)
+    texto = texto.strip().upper().rstrip("B")  # Acepta también "10MB" o "1 GB".
+    multiplicadores = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    if texto and texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(texto)
+
+
+def _normalizar_extension(ext):
+    ext = ext.strip().lower()
+    return ext if ext.startswith(".") or not ext else "." + ext  # Acepta "tmp" y ".tmp".
+
+
+def politica_desde_dict(datos, posicion=0):
+    """Crea una Politica a partir de un diccionario del archivo de configuración (lanza ValueError si no es válido)."""
+    if not isinstance(datos, dict):
+        raise ValueError(f"La política {posicion + 1} no es un objeto JSON.")
+    desconocidos = set(datos) - set(Politica._fields)
+    if desconocidos:
+        raise ValueError(f"La política {posicion + 1} tiene campos desconocidos: {', '.join(sorted(desconocidos))}.")
+    try:
+        extensiones = datos.get("extensiones")
+        if isinstance(extensiones, str):
+            extensiones = extensiones.split(",")
+        politica = Politica(
+            nombre=str(datos.get("nombre") or f"Política {posicion + 1}"),
+            extensiones=frozenset(_normalizar_extension(e) for e in extensiones) if extensiones is not None else None,
+            dias_min=float(datos["dias_min"]) if datos.get("dias_min") is not None else None,
+            tamano_min=leer_tamano(datos["tamano_min"]) if datos.get("tamano_min") is not None else None,
+            tamano_max=leer_tamano(datos["tamano_max"]) if datos.get("tamano_max") is not None else None,
+            patron=str(datos["patron"]).lower() if datos.get("patron") else None,
+            conservar_recientes=int(datos["conservar_recientes"]) if datos.get("conservar_recientes") is not None else None,
+        )
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"La política {posicion + 1} tiene un valor no válido: {e}") from None
+    if all(getattr(politica, campo) is None for campo in Politica._fields[1:]):
+        raise ValueError(f"La política '{politica.nombre}' no tiene ninguna condición (seleccionaría todos los archivos).")
+    return politica
+
+
+def cargar_politicas(ruta):
+    """
+    Lee las políticas de un archivo JSON. Devuelve una lista vacía si el archivo no existe.
+    Lanza ValueError si el contenido no es válido y OSError si no se puede leer.
+    """
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except FileNotFoundError:
+        return []
+    if isinstance(datos, dict):
+        datos = datos.get("politicas", [])
+    if not isinstance(datos, list):
+        raise ValueError("El archivo de políticas debe contener una lista 'politicas'.")
+    return [politica_desde_dict(d, i) for i, d in enumerate(datos)]
+
+
+def crear_archivo_ejemplo(ruta):
+    """Escribe el archivo de políticas de ejemplo si todavía no existe. Devuelve True si lo creó."""
+    if os.path.exists(ruta):
+        return False
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(POLITICAS_EJEMPLO, f, indent=2, ensure_ascii=False)
+    return True
+
+
+def _prefijo(relativa):
+    """Clave de agrupación de 'conservar_recientes': carpeta + nombre sin extensión ni final numérico."""
+    carpeta, nombre = os.path.split(relativa.lower())
+    raiz = os.path.splitext(nombre)[0]
+    return os.path.join(carpeta, _FINAL_VARIABLE.sub("", raiz) or raiz)
+
+
+def _mascara_politica(np, politica, conjunto, numeros, size, ctime, ext, libres, ahora):
+    """Máscara booleana (sobre las filas vigentes) de los archivos que cumplen 'politica'."""
+    mascara = libres.copy()
+    if politica.extensiones is not None:
+        mascara &= np.isin(ext, conjunto.ids_extensiones(politica.extensiones))
+    if politica.dias_min is not None:
+        mascara &= ctime <= ahora - politica.dias_min * 86400
+    if politica.tamano_min is not None:
+        mascara &= size >= politica.tamano_min
+    if politica.tamano_max is not None:
+        mascara &= size <= politica.tamano_max
+
+    # Las condiciones que necesitan el nombre solo se evalúan sobre los candidatos que quedan.
+    if politica.patron is not None:
+        candidatos = np.flatnonzero(mascara)
+        cumple = [fnmatch.fnmatchcase(conjunto.nombre(int(numeros[i])).lower(), politica.patron) for i in candidatos]
+        mascara[candidatos[np.logical_not(cumple)]] = False
+    if politica.conservar_recientes is not None:
+        candidatos = np.flatnonzero(mascara)
+        if len(candidatos):
+            prefijos = [_prefijo(conjunto.rel[int(numeros[i])]) for i in candidatos]
+            _, grupo = np.unique(np.array(prefijos), return_inverse=True)
+            # Ordena por prefijo y, dentro de cada prefijo, del más reciente al más antiguo.
+            orden = np.lexsort((-ctime[candidatos], grupo))
+            grupo_ordenado = grupo[orden]
+            posicion = np.arange(len(orden))
+            inicio_grupo = np.maximum.accumulate(np.where(np.r_[True, grupo_ordenado[1:] != grupo_ordenado[:-1]], posicion, 0))
+            conservar = orden[posicion - inicio_grupo < politica.conservar_recientes]
+            mascara[candidatos[conservar]] = False
+    return mascara
+
+
+def evaluar_politicas(politicas, conjunto, filas_en_uso=(), ahora=None):
+    """
+    Evalúa las políticas sobre las filas vigentes de 'conjunto' (un ConjuntoResultados) y devuelve un
+    ResultadoPoliticas con las filas a eliminar. Las filas de 'filas_en_uso' (archivos abiertos) se excluyen.
+    Debe llamarse desde el hilo que modifica el conjunto. Lanza ImportError si NumPy no está instalado.
+    """
+    import numpy as np  # Importación diferida: solo la necesitan las políticas y el análisis.
+
+    ahora = time.time() if ahora is None else ahora
+    if not len(conjunto) or not politicas:
+        return ResultadoPoliticas([], 0, [(p.nombre, 0, 0) for p in politicas])
+
+    numeros, size, ctime, ext = columnas_vigentes(np, conjunto)
+    libres = np.ones(len(numeros), dtype=bool)
+    if filas_en_uso:
+        libres &= ~np.isin(numeros, np.fromiter(filas_en_uso, dtype=np.int64))
+
+    total = np.zeros(len(numeros), dtype=bool)
+    por_politica = []
+    for politica in politicas:
+        mascara = _mascara_politica(np, politica, conjunto, numeros, size, ctime, ext, libres, ahora)
+        por_politica.append((politica.nombre, int(mascara.sum()), int(size[mascara].sum())))
+        total |= mascara
+
+    return ResultadoPoliticas(numeros[total].tolist(), int(size[total].sum()), por_politica)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Carpetas raíz del escaneo, agrupadas por volumen.
+
+Además de TEMP se pueden limpiar otras carpetas temporales y de caché (/tmp, /var/tmp, ~/.cache,
+%LOCALAPPDATA%\\Temp...). La lista se guarda en un archivo JSON en la carpeta de datos de la aplicación.
+
+Las raíces se agrupan por dispositivo (st_dev) y cada volumen se escanea en su propio hilo, a la vez que los
+demás, con su propio límite de hilos: un disco mecánico recibe pocas lecturas simultáneas (con más, el cabezal
+solo salta de un sitio a otro) mientras que un SSD o una carpeta en memoria se leen con todos los hilos.
+Dentro de un volumen las raíces se recorren una detrás de otra.
+
+El uso de cada volumen (psutil.disk_usage) se guarda en caché unos segundos y se recalcula en segundo plano,
+así las barras de almacenamiento no consultan el disco tras cada acción.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import closing
+
+import psutil  # Para el uso (total, usado, libre) de cada volumen.
+
+from voidclean.escaneo import HILOS_ESCANEO
+from voidclean.indice import directorio_datos_app
+
+
+# Hilos por volumen según el tipo de disco. En un disco mecánico las lecturas en paralelo se estorban.
+HILOS_DISCO_MECANICO = 2
+HILOS_DISCO_SOLIDO = HILOS_ESCANEO
+
+# Segundos durante los que se considera válido el uso de un volumen.
+TTL_USO_DISCO = 10.0
+
+# Registros que cada hilo de volumen junta antes de pasarlos al hilo que los consume.
+TAMANO_LOTE_RAIZ = 500
+
+# Volumen con las raíces que contiene.
+# - dispositivo: st_dev de las raíces; punto_montaje: carpeta donde está montado (para psutil.disk_usage).
+# - hilos: límite de hilos con los que se lee el volumen.
+Volumen = namedtuple("Volumen", ["dispositivo", "punto_montaje", "raices", "hilos"])
+
+# Raíces configuradas y límites de hilos elegidos a mano ({punto de montaje: hilos}).
+ConfiguracionRaices = namedtuple("ConfiguracionRaices", ["raices", "hilos"])
+
+
+def ruta_raices_por_defecto():
+    """Ruta del archivo JSON con las raíces del escaneo, dentro de la carpeta de datos de la aplicación."""
+    return os.path.join(directorio_datos_app(), "raices.json")
+
+
+def raices_por_defecto(temp_path=None):
+    """
+    Carpetas temporales y de caché habituales del sistema que existen en este equipo,
+    empezando por 'temp_path' (la carpeta TEMP de siempre).
+    """
+    candidatas = [temp_path] if temp_path else []
+    candidatas.append(tempfile.gettempdir())
+    if os.name == "nt":
+        for variable, sufijo in (("LOCALAPPDATA", "Temp"), ("SystemRoot", "Temp"),
+                                 ("LOCALAPPDATA", os.path.join("Microsoft", "Windows", "INetCache"))):
+            if os.environ.get(variable):
+                candidatas.append(os.path.join(os.environ[variable], sufijo))
+    else:
+        candidatas += ["/tmp", "/var/tmp",
+                       os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")]
+        if sys.platform == "darwin":
+            candidatas.append(os.path.join(os.path.expanduser("~"), "Library", "Caches"))
+    return normalizar_raices(candidatas)
+
+
+def normalizar_raices(rutas):
+    """
+    Deja las rutas absolutas, quita las que no son carpetas y las repetidas (también a través de enlaces)
+    y las que están dentro de otra raíz de la lista: se recorren al escanear la de fuera.
+    """
+    vistas = {}
+    for ruta in rutas:
+        ruta = os.path.abspath(os.path.expanduser(ruta))
+        if os.path.isdir(ruta):
+            vistas.setdefault(os.path.normcase(os.path.realpath(ruta)), ruta)
+    reales = list(vistas)
+    return [ruta for real, ruta in vistas.items()
+            if not any(otra != real and real.startswith(os.path.join(otra, "")) for otra in reales)]
+
+
+def cargar_raices(ruta=None, temp_path=None):
+    """
+    Lee las raíces del archivo JSON ({"raices": [...], "hilos": {punto de montaje: hilos}}) y devuelve una
+    ConfiguracionRaices. Si el archivo no existe, se usan las raíces por defecto.
+    Lanza ValueError si el contenido no es válido y OSError si no se puede leer.
+    """
+    ruta = ruta or ruta_raices_por_defecto()
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except FileNotFoundError:
+        return ConfiguracionRaices(raices_por_defecto(temp_path), {})
+    if isinstance(datos, list):
+        datos = {"raices": datos}
+    if not isinstance(datos, dict) or not isinstance(datos.get("raices"), list):
+        raise ValueError("El archivo de raíces debe contener una lista 'raices'.")
+    hilos = datos.get("hilos") or {}
+    if not isinstance(hilos, dict) or not all(isinstance(n, int) and n > 0 for n in hilos.values()):
+        raise ValueError("'hilos' debe relacionar cada punto de montaje con un número de hilos mayor que 0.")
+    return ConfiguracionRaices(normalizar_raices(str(r) for r in datos["raices"]), hilos)
+
+
+def guardar_raices(configuracion, ruta=None):
+    """Escribe la ConfiguracionRaices en el archivo JSON."""
+    with open(ruta or ruta_raices_por_defecto(), "w", encoding="utf-8") as f:
+        json.dump({"raices": configuracion.raices, "hilos": configuracion.hilos}, f, indent=2, ensure_ascii=False)
+
+
+def punto_de_montaje(ruta):
+    """Carpeta donde está montado el volumen que contiene 'ruta' (en Windows, la raíz de la unidad)."""
+    ruta = os.path.realpath(os.path.abspath(ruta))
+    while not os.path.ismount(ruta):
+        padre = os.path.dirname(ruta)
+        if padre == ruta:
+            break
+        ruta = padre
+    return ruta
+
+
+def es_disco_mecanico(dispositivo):
+    """
+    Indica si el dispositivo (st_dev) es un disco mecánico, según /sys/dev/block en Linux.
+    Devuelve None si no se sabe (otros sistemas, volúmenes en memoria o de red).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    bloque = f"/sys/dev/block/{os.major(dispositivo)}:{os.minor(dispositivo)}"
+    # Una partición no tiene 'queue' propia: se mira la del disco que la contiene.
+    for cola in (os.path.join(bloque, "queue", "rotational"), os.path.join(bloque, "..", "queue", "rotational")):
+        try:
+            with open(cola, "r") as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def agrupar_por_volumen(raices, hilos=None, errores=None):
+    """
+    Agrupa las raíces por dispositivo (st_dev) y devuelve una lista de Volumen, en el orden en que aparece
+    la primera raíz de cada uno. 'hilos' ({punto de montaje: hilos}) fija el límite de un volumen; si no,
+    se elige según el tipo de disco. Las raíces que no se pueden leer se añaden a 'errores' como (ruta, excepción).
+    """
+    hilos = hilos or {}
+    grupos = {}
+    for raiz in raices:
+        try:
+            dispositivo = os.stat(raiz).st_dev
+        except OSError as e:
+            if errores is not None:
+                errores.append((raiz, e))
+            continue
+        grupos.setdefault(dispositivo, []).append(raiz)
+
+    volumenes = []
+    for dispositivo, suyas in grupos.items():
+        punto = punto_de_montaje(suyas[0])
+        limite = hilos.get(punto)
+        if limite is None:
+            limite = HILOS_DISCO_MECANICO if es_disco_mecanico(dispositivo) else HILOS_DISCO_SOLIDO
+        volumenes.append(Volumen(dispositivo, punto, suyas, limite))
+    return volumenes
+
+
+def escanear_volumenes(volumenes, escanear, cancelacion=None, tamano_lote=TAMANO_LOTE_RAIZ):
+    """
+    Escanea los volúmenes a la vez, un hilo por volumen, y devuelve (como generador) tuplas
+    (raiz, lista de registros) a medida que llegan.
+
+    'escanear(volumen)' se ejecuta en el hilo del volumen y devuelve (raiz, registro) de cada archivo; debe
+    respetar 'volumen.hilos'. Si un hilo falla, se avisa a los demás para que paren y la excepción se relanza aquí.
+    Al cerrar el generador (o al activar 'cancelacion') los hilos dejan de escanear.
+    """
+    cola = queue.Queue(maxsize=4 * max(1, len(volumenes)))  # Con límite: si la interfaz no da abasto, los hilos esperan.
+    parar = threading.Event()
+    FIN = object()
+
+    def poner(elemento):
+        while not parar.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def trabajar(volumen):
+        lotes = {}
+        try:
+            with closing(escanear(volumen)) as registros:  # Al salir antes de tiempo se suelta enseguida el índice.
+                for raiz, registro in registros:
+                    lote = lotes.setdefault(raiz, [])
+                    lote.append(registro)
+                    if len(lote) >= tamano_lote:
+                        del lotes[raiz]
+                        if not poner((raiz, lote)):
+                            return
+                    if parar.is_set() or (cancelacion is not None and cancelacion.is_set()):
+                        return
+            for raiz, lote in lotes.items():
+                if not poner((raiz, lote)):
+                    return
+        except BaseException as e:
+            poner(e)
+        finally:
+            poner(FIN)
+
+    hilos = [threading.Thread(target=trabajar, args=(v,), name=f"Volumen {v.punto_montaje}", daemon=True)
+             for v in volumenes]
+    for hilo in hilos:
+        hilo.start()
+
+    pendientes = len(hilos)
+    try:
+        while pendientes:
+            elemento = cola.get()
+            if elemento is FIN:
+                pendientes -= 1
+            elif isinstance(elemento, BaseException):
+                raise elemento  # El 'finally' avisa a los demás hilos para que paren.
+            else:
+                yield elemento
+    finally:
+        parar.set()  # También si el consumidor cerró el generador: los hilos dejan de poner lotes en la cola.
+
+
+class UsoVolumenes:
+    """
+    Caché del uso (psutil.disk_usage) de varios volúmenes con un tiempo de vida (TTL).
+
+    - uso(punto_montaje) devuelve el último uso medido, o None si todavía no se midió nunca.
+    - Si los datos están caducados, se vuelven a medir todos los volúmenes en un hilo en segundo plano y,
+      mientras tanto, se siguen usando los anteriores. Al terminar se llama a 'al_actualizar' (si se indicó).
+    """
+
+    def __init__(self, ttl=TTL_USO_DISCO, al_actualizar=None):
+        self.ttl = ttl
+        self.al_actualizar = al_actualizar
+        self.puntos = set()  # Volúmenes que se miden.
+        self._usos = {}
+        self._medidos = set()  # Volúmenes incluidos en la última medición (aunque fallaran).
+        self._momento = None
+        self._calculando = False
+        self._bloqueo = threading.Lock()
+
+    def caducado(self):
+        """Indica si falta algún volumen o los datos ya superaron su tiempo de vida."""
+        return (self._momento is None or time.monotonic() - self._momento > self.ttl
+                or not self.puntos.issubset(self._medidos))
+
+    def solicitar(self):
+        """Inicia la medición en segundo plano si los datos están caducados y no se está midiendo ya."""
+        with self._bloqueo:
+            if self._calculando or not self.caducado():
+                return
+            self._calculando = True
+        threading.Thread(target=self._medir, name="UsoVolumenes", daemon=True).start()
+
+    def _medir(self):
+        usos = {}
+        puntos = set(self.puntos)
+        for punto in puntos:
+            try:
+                usos[punto] = psutil.disk_usage(punto)
+            except OSError:
+                continue  # Volumen desmontado mientras tanto.
+        with self._bloqueo:
+            self._usos = usos
+            self._medidos = puntos
+            self._momento = time.monotonic()
+            self._calculando = False
+        if self.al_actualizar is not None:
+            self.al_actualizar()
+
+    def uso(self, punto_montaje):
+        """Uso del volumen (total, used, free, percent de psutil), o None si aún no hay datos."""
+        self.puntos.add(punto_montaje)
+        if self.caducado():
+            self.solicitar()
+        return self._usos.get(punto_montaje)
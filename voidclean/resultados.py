@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Conjunto de resultados de un escaneo guardado en memoria, por columnas.
+
+En lugar de un diccionario por archivo, cada dato se guarda en una columna compacta: el peso, la fecha de
+creación y los indicadores en arrays de números, la extensión como un número que apunta a una tabla de
+extensiones (cada extensión distinta se guarda una sola vez) y la ruta relativa a la carpeta escaneada.
+Cada archivo es un número de fila; los textos que se muestran (fecha formateada, descripción...) se calculan
+solo al dibujar o exportar esa fila. Ordenar o filtrar trabaja sobre las columnas, sin crear objetos por archivo.
+"""
+
+import os
+import threading
+from array import array  # Columnas de números sin un objeto de Python por valor.
+from collections import namedtuple
+from datetime import datetime
+
+from voidclean.clasificacion import purpose_keywords, DESCRIPCION_NO_CLASIFICADO, obtener_extension
+
+
+# Opciones de orden: valor interno -> (columna por la que se ordena, orden descendente).
+CLAVES_ORDEN = {
+    "peso_mayor": ("size", True),
+    "peso_menor": ("size", False),
+    "recientes": ("ctime", True),
+    "antiguos": ("ctime", False),
+    "nombre_az": ("nombre", False),
+    "nombre_za": ("nombre", True),
+}
+
+# Indicadores de cada fila (columna 'flags').
+FLAG_QUITADO = 1  # La fila ya no forma parte del conjunto (archivo eliminado); su número no se reutiliza.
+
+FORMATO_FECHA = "%d-%m-%Y %H:%M"
+
+# Lote de archivos ya convertido a columnas. Se prepara en el hilo de escaneo para que el hilo
+# de la interfaz solo tenga que añadir columnas enteras.
+Bloque = namedtuple("Bloque", ["raiz", "rel", "size", "ctime", "ext", "nombre_min"])
+
+# Copia de los datos de una fila, para guardarla fuera del conjunto (historial, cuarentena).
+Fila = namedtuple("Fila", ["ruta", "nombre", "size", "ctime"])
+
+
+class ConjuntoResultados:
+    """
+    Archivos escaneados guardados por columnas, que se pueden reordenar y filtrar sin volver a escanear.
+
+    'filas' es un array con los números de fila visibles en el orden actual. Se modifica siempre en el sitio,
+    así que quien guarde una referencia a él (por ejemplo, la lista virtual de la interfaz) ve los cambios
+    sin tener que pedirlo de nuevo. Los números de fila no cambian al ordenar ni al quitar archivos.
+    """
+
+    def __init__(self):
+        self.filas = array("q")
+        self.orden = None  # Último orden aplicado (clave de CLAVES_ORDEN) o None si no está ordenada.
+
+        # Tablas de textos repetidos: cada valor distinto se guarda una vez y las filas guardan su número.
+        # No se vacían al limpiar, así que un lote preparado en otro hilo siempre sigue siendo válido.
+        self.raices = []
+        self.extensiones = []
+        self.descripciones = []  # Descripción de cada extensión (mismo número que en 'extensiones').
+        self._ids_raiz = {}
+        self._ids_extension = {}
+        self._bloqueo_tablas = threading.Lock()
+
+        self._crear_columnas()
+
+    def _crear_columnas(self):
+        # Se crean columnas nuevas (en lugar de vaciar las actuales) para que una instantánea
+        # que se esté exportando en otro hilo conserve sus datos.
+        self.raiz = array("H")
+        self.rel = []  # Ruta relativa a la carpeta escaneada (en el primer nivel, solo el nombre).
+        self.size = array("q")
+        self.ctime = array("d")
+        self.ext = array("H")
+        self.flags = array("B")
+        self.nombre_min = []  # Nombre (sin la carpeta) en minúsculas, para ordenar por nombre.
+        self._rango_nombre = None  # Posición de cada fila en orden alfabético (NumPy), calculada al ordenar.
+
+    def __len__(self):
+        return len(self.filas)
+
+    def __iter__(self):
+        return iter(self.filas)
+
+    def limpiar(self):
+        """Vacía el conjunto (antes de un nuevo escaneo)."""
+        del self.filas[:]
+        self._crear_columnas()
+        self.orden = None
+
+    def instantanea(self):
+        """
+        Devuelve una copia de solo lectura para recorrerla en otro hilo (por ejemplo, al exportar).
+        Comparte las columnas, que solo crecen, y copia únicamente el array de filas.
+        """
+        copia = object.__new__(ConjuntoResultados)
+        copia.__dict__.update(self.__dict__)
+        copia.filas = array("q", self.filas)
+        return copia
+
+    # --- Tablas de valores repetidos ---
+
+    def _id_en_tabla(self, valor, ids, tabla):
+        numero = ids.get(valor)
+        if numero is None:
+            with self._bloqueo_tablas:  # Los lotes se preparan en hilos distintos al de la interfaz.
+                numero = ids.get(valor)
+                if numero is None:
+                    numero = len(tabla)
+                    tabla.append(valor)
+                    if tabla is self.extensiones:
+                        self.descripciones.append(purpose_keywords.get(valor, DESCRIPCION_NO_CLASIFICADO))
+                    ids[valor] = numero
+        return numero
+
+    def id_raiz(self, raiz):
+        """Número de la carpeta raíz 'raiz' en la tabla de raíces."""
+        return self._id_en_tabla(raiz, self._ids_raiz, self.raices)
+
+    def id_extension(self, extension):
+        """Número de la extensión (en minúsculas, con el punto) en la tabla de extensiones."""
+        return self._id_en_tabla(extension, self._ids_extension, self.extensiones)
+
+    def ids_extensiones(self, extensiones):
+        """Números de las extensiones indicadas que ya están en la tabla (las demás no tienen ningún archivo)."""
+        return [self._ids_extension[e] for e in extensiones if e in self._ids_extension]
+
+    # --- Añadir archivos ---
+
+    def preparar(self, registros, raiz):
+        """
+        Convierte registros (cualquier objeto con 'ruta', 'size' y 'ctime', como RegistroArchivo)
+        en un Bloque de columnas, con las rutas relativas a 'raiz'. Se puede llamar desde cualquier hilo.
+        """
+        id_raiz = self.id_raiz(raiz)
+        prefijo = os.path.join(raiz, "")
+        corte = len(prefijo)
+        rel, size, ctime, ext = [], array("q"), array("d"), array("H")
+        for registro in registros:
+            ruta = registro.ruta
+            relativa = ruta[corte:] if ruta.startswith(prefijo) else ruta  # Fuera de la raíz se guarda completa.
+            rel.append(relativa)
+            size.append(registro.size)
+            ctime.append(registro.ctime)
+            ext.append(self.id_extension(obtener_extension(relativa)))
+        # Se reutilizan las cadenas que ya están en minúsculas, así la columna apenas ocupa memoria.
+        nombres = list(map(os.path.basename, rel))
+        nombre_min = [n if n == m else m for n, m in zip(nombres, map(str.lower, nombres))]
+        return Bloque(id_raiz, rel, size, ctime, ext, nombre_min)
+
+    def agregar(self, bloque):
+        """Añade un Bloque de archivos al final del conjunto."""
+        inicio = len(self.rel)
+        cantidad = len(bloque.rel)
+        self.raiz.extend(array("H", [bloque.raiz]) * cantidad)
+        self.rel.extend(bloque.rel)
+        self.size.extend(bloque.size)
+        self.ctime.extend(bloque.ctime)
+        self.ext.extend(bloque.ext)
+        self.nombre_min.extend(bloque.nombre_min)
+        self.flags.extend(bytes(cantidad))
+        self.filas.extend(range(inicio, inicio + cantidad))
+        self.orden = None  # Los archivos nuevos llegan sin ordenar.
+
+    # --- Datos de una fila (se calculan al dibujarla o exportarla) ---
+
+    def ruta(self, fila):
+        return os.path.join(self.raices[self.raiz[fila]], self.rel[fila])
+
+    def ruta_relativa(self, fila):
+        return self.rel[fila]
+
+    def nombre(self, fila):
+        return os.path.basename(self.rel[fila])
+
+    def extension(self, fila):
+        return self.extensiones[self.ext[fila]]
+
+    def descripcion(self, fila):
+        return self.descripciones[self.ext[fila]]
+
+    def fecha(self, fila):
+        """Fecha de creación formateada para mostrarla."""
+        return datetime.fromtimestamp(self.ctime[fila]).strftime(FORMATO_FECHA)
+
+    def fila(self, fila):
+        """Copia de los datos de la fila como una tupla Fila independiente del conjunto."""
+        return Fila(self.ruta(fila), self.nombre(fila), self.size[fila], self.ctime[fila])
+
+    # --- Orden y filtros ---
+
+    def ordenar(self, orden):
+        """
+        Ordena las filas según 'orden' (una clave de CLAVES_ORDEN); las opciones desconocidas se ignoran.
+        Si solo cambia el sentido (ascendente/descendente) sobre la misma columna, basta con invertir el array.
+        Con NumPy se ordena con argsort sobre la columna; sin él, con sorted. En ambos casos el orden es estable.
+        """
+        if orden not in CLAVES_ORDEN or orden == self.orden:
+            return
+        columna, descendente = CLAVES_ORDEN[orden]
+        if self.orden is not None and CLAVES_ORDEN[self.orden] == (columna, not descendente):
+            self.filas.reverse()
+        else:
+            try:
+                self._ordenar_numpy(columna, descendente)
+            except ImportError:
+                columna = "nombre_min" if columna == "nombre" else columna
+                clave = getattr(self, columna).__getitem__  # Lectura directa de la columna (en C).
+                self.filas[:] = array("q", sorted(self.filas, key=clave, reverse=descendente))
+        self.orden = orden
+
+    def _ordenar_numpy(self, columna, descendente):
+        """Ordena 'filas' con argsort sobre 'columna' ("size", "ctime" o "nombre"). Lanza ImportError sin NumPy."""
+        import numpy as np  # Importación diferida, como en la búsqueda.
+
+        if not self.filas:
+            return
+        visibles = np.frombuffer(self.filas, dtype=np.int64)
+        if columna == "nombre":
+            # Los textos se ordenan una sola vez hasta que cambian las filas del conjunto: cada fila guarda la
+            # posición alfabética de su nombre (la misma para nombres iguales, así el orden sigue siendo estable).
+            if self._rango_nombre is None or len(self._rango_nombre) != len(self.nombre_min):
+                _, self._rango_nombre = np.unique(np.array(self.nombre_min, dtype=str), return_inverse=True)
+            valores = self._rango_nombre[visibles]
+        else:
+            valores = np.frombuffer(getattr(self, columna), dtype=np.int64 if columna == "size" else np.float64)[visibles]
+        # Al negar los valores el orden descendente sigue siendo estable, como sorted(..., reverse=True).
+        ordenadas = visibles[np.argsort(-valores if descendente else valores, kind="stable")].tobytes()
+        del visibles  # Suelta la vista antes de cambiar 'filas'.
+        self.filas[:] = array("q", ordenadas)
+
+    def filtrar(self, extensiones=None, tamano_min=None, tamano_max=None, ctime_max=None):
+        """
+        Devuelve los números de fila (en el orden actual) que cumplen todas las condiciones indicadas:
+        extensión en 'extensiones', peso entre 'tamano_min' y 'tamano_max' (bytes) y fecha de creación
+        anterior a 'ctime_max' (timestamp). Las condiciones en None no se aplican.
+        """
+        filas = self.filas
+        if extensiones is not None:
+            ids = set(self.ids_extensiones(extensiones))
+            ext = self.ext
+            filas = [f for f in filas if ext[f] in ids]
+        if tamano_min is not None:
+            size = self.size
+            filas = [f for f in filas if size[f] >= tamano_min]
+        if tamano_max is not None:
+            size = self.size
+            filas = [f for f in filas if size[f] <= tamano_max]
+        if ctime_max is not None:
+            ctime = self.ctime
+            filas = [f for f in filas if ctime[f] <= ctime_max]
+        return array("q", filas)
+
+    # --- Cambios ---
+
+    def _buscar(self, rutas):
+        """Devuelve {ruta: fila} de las filas vigentes cuya ruta está en 'rutas' (una sola pasada)."""
+        rutas = set(rutas)
+        encontradas = {}
+        for fila in self.filas:
+            ruta = self.ruta(fila)
+            if ruta in rutas:
+                encontradas[ruta] = fila
+        return encontradas
+
+    def filas_de(self, rutas):
+        """
+        Devuelve los números de fila vigentes de las rutas indicadas (las que no están en el conjunto se ignoran).
+        Pensado para pocas rutas (por ejemplo, los archivos abiertos): cada una se busca con list.index,
+        que recorre la columna de rutas en C. Con muchas rutas, o si el sistema no distingue mayúsculas
+        (Windows, donde se comparan las rutas normalizadas), se hace una sola pasada en Python.
+        """
+        rutas = {os.path.normcase(r) for r in rutas}
+        if len(rutas) > 64 or os.path.normcase("A") != "A":
+            return [f for f in self.filas if os.path.normcase(self.ruta(f)) in rutas]
+        filas = []
+        for ruta in rutas:
+            for id_raiz, raiz in enumerate(self.raices):
+                prefijo = os.path.join(raiz, "")
+                if not ruta.startswith(prefijo):
+                    continue
+                relativa, inicio = ruta[len(prefijo):], 0
+                while True:  # Puede haber filas quitadas con la misma ruta: se busca la vigente.
+                    try:
+                        fila = self.rel.index(relativa, inicio)
+                    except ValueError:
+                        break
+                    if self.raiz[fila] == id_raiz and not self.flags[fila] & FLAG_QUITADO:
+                        filas.append(fila)
+                        break
+                    inicio = fila + 1
+        return filas
+
+    def quitar_filas(self, filas):
+        """Quita del conjunto las filas indicadas, conservando el orden actual."""
+        filas = set(filas)
+        for fila in filas:
+            self.flags[fila] |= FLAG_QUITADO
+        self.filas[:] = array("q", [f for f in self.filas if f not in filas])
+
+    def quitar(self, rutas):
+        """Quita del conjunto los archivos cuyas rutas estén en 'rutas' y devuelve sus números de fila."""
+        filas = list(self._buscar(rutas).values())
+        self.quitar_filas(filas)
+        return filas
+
+    def aplicar_cambios(self, bloque, rutas_quitadas):
+        """
+        Aplica una diferencia por lotes: quita 'rutas_quitadas', actualiza en su sitio las filas del Bloque
+        que ya existían (por ruta, así conservan su número y su selección) y añade el resto.
+        Se mantiene el orden que tenía el conjunto. Devuelve los números de las filas quitadas.
+        """
+        orden = self.orden
+        raiz = self.raices[bloque.raiz]
+        nuevas = [os.path.join(raiz, r) for r in bloque.rel]
+        existentes = self._buscar(set(rutas_quitadas).union(nuevas))
+
+        quitadas = [existentes[r] for r in rutas_quitadas if r in existentes]
+        self.quitar_filas(quitadas)
+
+        resto = Bloque(bloque.raiz, [], array("q"), array("d"), array("H"), [])
+        for i, ruta in enumerate(nuevas):
+            fila = existentes.get(ruta)
+            if fila is not None and not self.flags[fila] & FLAG_QUITADO:
+                self.size[fila] = bloque.size[i]
+                self.ctime[fila] = bloque.ctime[i]
+            else:
+                resto.rel.append(bloque.rel[i])
+                resto.size.append(bloque.size[i])
+                resto.ctime.append(bloque.ctime[i])
+                resto.ext.append(bloque.ext[i])
+                resto.nombre_min.append(bloque.nombre_min[i])
+        self.agregar(resto)
+
+        self.orden = None
+        if orden is not None:
+            self.ordenar(orden)
+        return quitadas
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Estado de selección de la lista de archivos, guardado en una estructura de datos simple.
+
+En lugar de una variable de Tk por archivo, se guarda un indicador "todos marcados" y el conjunto
+de claves que son la excepción. Así marcar o desmarcar todo cuesta lo mismo con 10 o con 1.000.000 de archivos.
+
+"Todos" son los archivos que había al marcar: con números de fila como clave, 'marcar_todo(hasta=n)' deja
+fuera las filas que se añadan después (modo vigilancia, deshacer), que el usuario aún no ha visto.
+"""
+
+
+class Seleccion:
+    """
+    Conjunto de archivos marcados para eliminar, identificados por una clave (normalmente la ruta).
+    """
+
+    def __init__(self):
+        self._todos = False  # True si por defecto todos los archivos están marcados.
+        self._hasta = None  # Con '_todos', solo las claves menores que esta (None = sin límite).
+        self._excepciones = set()  # Claves cuyo estado es el contrario al que les da '_todos'.
+
+    def marcar_todo(self, hasta=None):
+        """
+        Marca todos los archivos (O(1)). Con claves numéricas, 'hasta' limita la marca a las menores que él
+        (normalmente, el número de filas en ese momento): las filas añadidas después quedan sin marcar.
+        """
+        self._todos = True
+        self._hasta = hasta
+        self._excepciones = set()
+
+    def desmarcar_todo(self):
+        """Desmarca todos los archivos (O(1))."""
+        self._todos = False
+        self._hasta = None
+        self._excepciones = set()
+
+    def _por_defecto(self, clave):
+        """Estado de la clave si no es una excepción."""
+        return self._todos and (self._hasta is None or clave < self._hasta)
+
+    def esta_marcado(self, clave):
+        """Indica si el archivo con esa clave está marcado."""
+        return (clave in self._excepciones) != self._por_defecto(clave)
+
+    def marcar(self, clave, valor=True):
+        """Marca (o desmarca, si 'valor' es False) un archivo."""
+        if valor == self._por_defecto(clave):
+            self._excepciones.discard(clave)
+        else:
+            self._excepciones.add(clave)
+
+    def marcar_varios(self, claves, valor=True):
+        """Marca (o desmarca) de una vez los archivos de 'claves', por ejemplo los que muestra un filtro."""
+        if self._todos and self._hasta is not None:
+            for clave in claves:  # El estado por defecto depende de cada clave.
+                self.marcar(clave, valor)
+        elif valor == self._todos:
+            self._excepciones.difference_update(claves)
+        else:
+            self._excepciones.update(claves)
+
+    def alternar(self, clave):
+        """Cambia el estado de un archivo y devuelve el nuevo estado."""
+        nuevo = not self.esta_marcado(clave)
+        self.marcar(clave, nuevo)
+        return nuevo
+
+    def descartar(self, claves):
+        """Olvida las claves indicadas (por ejemplo, archivos que ya se eliminaron)."""
+        self._excepciones.difference_update(claves)
+
+    def marcados(self, filas, clave=lambda fila: fila["ruta"]):
+        """Devuelve las filas de 'filas' que están marcadas, en el mismo orden."""
+        if not self._todos and not self._excepciones:
+            return []
+        return [fila for fila in filas if self.esta_marcado(clave(fila))]
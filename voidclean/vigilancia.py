@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Vigilancia en vivo de una carpeta (y sus subcarpetas) para detectar archivos nuevos, borrados o movidos.
+
+En Linux se usa inotify (a través de ctypes, sin dependencias externas). En el resto de sistemas, o si inotify
+no está disponible, se comparan periódicamente los mtime de las carpetas. En ambos casos los eventos se
+agrupan: se espera a que haya un momento de calma (o a que pase un tiempo máximo) y se avisa una sola vez
+con el conjunto de carpetas afectadas, para que una ráfaga de miles de archivos no provoque miles de avisos.
+"""
+
+import os
+import sys
+import time
+import struct
+import select
+import threading
+
+
+# Tiempo de calma (segundos) que se espera tras el último evento antes de avisar.
+ESPERA_CALMA = 0.5
+# Tiempo máximo (segundos) que se acumulan eventos antes de avisar, aunque sigan llegando.
+ESPERA_MAXIMA = 3.0
+# Intervalo (segundos) entre comprobaciones del modo por sondeo.
+INTERVALO_SONDEO = 2.0
+
+
+def _mtime_ns(ruta):
+    """mtime (en nanosegundos) de una carpeta, o None si ya no existe o no se puede consultar."""
+    try:
+        return os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _carpetas_hasta(raiz, profundidad_max):
+    """
+    Devuelve la lista de carpetas de 'raiz' hasta 'profundidad_max' (None = sin límite), sin seguir enlaces.
+    """
+    carpetas = []
+    pendientes = [(raiz, 0)]
+    while pendientes:
+        ruta, profundidad = pendientes.pop()
+        carpetas.append(ruta)
+        if profundidad_max is not None and profundidad >= profundidad_max:
+            continue
+        try:
+            with os.scandir(ruta) as iterador:
+                for entrada in iterador:
+                    if entrada.is_dir(follow_symlinks=False):
+                        pendientes.append((entrada.path, profundidad + 1))
+        except OSError:
+            pass
+    return carpetas
+
+
+class Vigilante:
+    """
+    Clase base. Ejecuta la vigilancia en un hilo en segundo plano y llama a 'al_cambiar(carpetas)'
+    (desde ese hilo) con el conjunto de carpetas donde hubo cambios, ya agrupados.
+    """
+
+    def __init__(self, raiz, al_cambiar, profundidad_max=None, espera_calma=ESPERA_CALMA, espera_maxima=ESPERA_MAXIMA):
+        self.raiz = raiz
+        self.al_cambiar = al_cambiar
+        self.profundidad_max = profundidad_max
+        self.espera_calma = espera_calma
+        self.espera_maxima = espera_maxima
+        self._detener = threading.Event()
+        self._hilo = None
+        self._pendientes = set()
+        self._primer_evento = None
+        self._ultimo_evento = None
+
+    def iniciar(self):
+        """Arranca el hilo de vigilancia."""
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name=type(self).__name__, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Pide al hilo que termine y espera a que lo haga."""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+            self._hilo = None
+
+    # --- Agrupación de eventos ---
+
+    def _registrar(self, carpeta):
+        """Anota un cambio en 'carpeta' para el próximo aviso agrupado."""
+        ahora = time.monotonic()
+        if not self._pendientes:
+            self._primer_evento = ahora
+        self._ultimo_evento = ahora
+        self._pendientes.add(carpeta)
+
+    def _tiempo_hasta_aviso(self):
+        """Segundos que faltan para avisar de los cambios pendientes (None si no hay ninguno)."""
+        if not self._pendientes:
+            return None
+        ahora = time.monotonic()
+        return max(0.0, min(self._ultimo_evento + self.espera_calma, self._primer_evento + self.espera_maxima) - ahora)
+
+    def _avisar_si_toca(self):
+        """Llama a 'al_cambiar' si ya pasó el tiempo de calma o el máximo de espera."""
+        if self._pendientes and self._tiempo_hasta_aviso() == 0:
+            carpetas, self._pendientes = self._pendientes, set()
+            self.al_cambiar(carpetas)
+
+    def _ejecutar(self):
+        raise NotImplementedError
+
+
+class VigilanteSondeo(Vigilante):
+    """
+    Vigilancia por sondeo: cada 'intervalo' segundos compara el mtime de cada carpeta con el anterior.
+    Funciona en cualquier sistema operativo.
+    """
+
+    def __init__(self, *args, intervalo=INTERVALO_SONDEO, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.intervalo = intervalo
+
+    def _tomar_mtimes(self):
+        mtimes = {}
+        for carpeta in _carpetas_hasta(self.raiz, self.profundidad_max):
+            try:
+                mtimes[carpeta] = os.stat(carpeta).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def _ejecutar(self):
+        anteriores = self._tomar_mtimes()
+        while not self._detener.wait(self.intervalo):
+            actuales = self._tomar_mtimes()
+            # Carpetas nuevas, desaparecidas o con mtime distinto.
+            for carpeta in set(anteriores) | set(actuales):
+                if anteriores.get(carpeta) != actuales.get(carpeta):
+                    self._registrar(carpeta)
+            anteriores = actuales
+            # En modo sondeo cada comprobación ya agrupa los cambios del intervalo.
+            if self._pendientes:
+                carpetas, self._pendientes = self._pendientes, set()
+                self.al_cambiar(carpetas)
+
+
+class VigilanteInotify(Vigilante):
+    """
+    Vigilancia con inotify (solo Linux). Se añade un "watch" por carpeta y, si aparece una subcarpeta
+    nueva dentro del límite de profundidad, también se vigila. Las carpetas que no admiten un watch (límite
+    de watches alcanzado o sin permiso de lectura) se vigilan por sondeo de su mtime, como en VigilanteSondeo.
+    Si no se puede vigilar ni la propia raíz se lanza OSError.
+    """
+
+    # Constantes de <sys/inotify.h>.
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASCARA = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+    _CABECERA = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ctypes = ctypes
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        self._carpetas = {}  # wd -> (ruta, profundidad)
+        self._sin_watch = {}  # ruta -> (mtime_ns, profundidad) de las carpetas que se vigilan por sondeo.
+        self._proximo_sondeo = time.monotonic() + INTERVALO_SONDEO
+        self._agregar_arbol(self.raiz, 0)
+        if self.raiz in self._sin_watch:
+            error = self._ultimo_error
+            os.close(self._fd)
+            raise OSError(error, f"No se puede vigilar {self.raiz} con inotify: {os.strerror(error)}")
+
+    def _agregar_watch(self, ruta, profundidad):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(ruta), self.MASCARA)
+        if wd >= 0:
+            self._carpetas[wd] = (ruta, profundidad)
+            self._sin_watch.pop(ruta, None)
+        else:
+            # Límite de watches alcanzado (ENOSPC) o sin permiso (EACCES): la carpeta se vigila por sondeo.
+            self._ultimo_error = self._ctypes.get_errno()
+            self._sin_watch[ruta] = (_mtime_ns(ruta), profundidad)
+
+    def _sondear(self):
+        """Compara el mtime de las carpetas sin watch y, si cambió, lo anota y vuelve a intentar vigilarlas."""
+        for ruta, (anterior, profundidad) in list(self._sin_watch.items()):
+            actual = _mtime_ns(ruta)
+            if actual == anterior:
+                continue
+            self._registrar(ruta)
+            if actual is None:
+                del self._sin_watch[ruta]  # La carpeta ya no existe.
+            else:
+                self._sin_watch[ruta] = (actual, profundidad)
+                self._agregar_arbol(ruta, profundidad)  # También vigila sus subcarpetas nuevas.
+
+    def _agregar_arbol(self, ruta, profundidad):
+        """Vigila 'ruta' y sus subcarpetas respetando el límite de profundidad."""
+        limite = None if self.profundidad_max is None else self.profundidad_max - profundidad
+        for carpeta in _carpetas_hasta(ruta, limite):
+            relativa = os.path.relpath(carpeta, ruta)
+            nivel = 0 if relativa == "." else relativa.count(os.sep) + 1
+            self._agregar_watch(carpeta, profundidad + nivel)
+
+    def _leer_eventos(self):
+        try:
+            datos = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        posicion = 0
+        while posicion + self._CABECERA.size <= len(datos):
+            wd, mascara, _, largo = self._CABECERA.unpack_from(datos, posicion)
+            posicion += self._CABECERA.size
+            nombre = os.fsdecode(datos[posicion:posicion + largo].rstrip(b"\0"))
+            posicion += largo
+
+            if mascara & self.IN_Q_OVERFLOW:
+                # Se perdieron eventos: se avisa de todas las carpetas vigiladas para que se relean.
+                for carpeta, _ in list(self._carpetas.values()):
+                    self._registrar(carpeta)
+                continue
+            if wd not in self._carpetas:
+                continue
+            carpeta, profundidad = self._carpetas[wd]
+            if mascara & self.IN_IGNORED:
+                del self._carpetas[wd]  # La carpeta se borró o se dejó de vigilar.
+                continue
+            self._registrar(carpeta)
+
+            # Subcarpeta nueva (creada o movida dentro): también hay que vigilarla.
+            if mascara & self.IN_ISDIR and mascara & (self.IN_CREATE | self.IN_MOVED_TO):
+                if self.profundidad_max is None or profundidad < self.profundidad_max:
+                    self._agregar_arbol(os.path.join(carpeta, nombre), profundidad + 1)
+
+    def _ejecutar(self):
+        try:
+            while not self._detener.is_set():
+                espera = self._tiempo_hasta_aviso()
+                espera = 0.5 if espera is None else min(espera, 0.5)  # Revisa la señal de detener a menudo.
+                listos, _, _ = select.select([self._fd], [], [], espera)
+                if listos:
+                    self._leer_eventos()
+                if self._sin_watch and time.monotonic() >= self._proximo_sondeo:
+                    self._sondear()
+                    self._proximo_sondeo = time.monotonic() + INTERVALO_SONDEO
+                self._avisar_si_toca()
+        finally:
+            os.close(self._fd)
+
+
+def crear_vigilante(raiz, al_cambiar, profundidad_max=None, **kwargs):
+    """
+    Devuelve el mejor vigilante disponible: inotify en Linux y, si no es posible, el modo por sondeo.
+    El vigilante se devuelve sin iniciar; hay que llamar a iniciar() y, al terminar, a detener().
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return VigilanteInotify(raiz, al_cambiar, profundidad_max, **kwargs)
+        except (OSError, AttributeError):
+            pass  # Sin inotify, o sin poder vigilar la propia raíz (límite de watches, permisos): se usa el sondeo.
+    return VigilanteSondeo(raiz, al_cambiar, profundidad_max, **kwargs)